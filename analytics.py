@@ -0,0 +1,250 @@
+import time
+from datetime import datetime
+
+
+# ================= RUNNING AGGREGATES =================
+# Per-movie counters kept up to date on every feedback add/delete, so the
+# CinemaPulse score, breakdown, trend and average rating can be derived in
+# O(1) instead of re-reading every feedback of the movie.
+SENTIMENT_FIELDS = {
+    "Positive": "positive_count",
+    "Neutral": "neutral_count",
+    "Negative": "negative_count"
+}
+
+AGGREGATE_FIELDS = ("review_count", "rating_sum") + tuple(SENTIMENT_FIELDS.values())
+
+
+def empty_aggregate():
+    return {field: 0 for field in AGGREGATE_FIELDS}
+
+
+def aggregate_from_item(item):
+    """Read the counters out of a stored record (missing fields count as 0)."""
+    return {field: int(item.get(field, 0) or 0) for field in AGGREGATE_FIELDS}
+
+
+def aggregate_delta(feedback, sign=1):
+    delta = {"review_count": sign, "rating_sum": sign * int(feedback["rating"])}
+    sentiment_field = SENTIMENT_FIELDS.get(feedback["sentiment"])
+    if sentiment_field:
+        delta[sentiment_field] = sign
+    return delta
+
+
+def apply_feedback(aggregate, feedback, sign=1):
+    for field, value in aggregate_delta(feedback, sign).items():
+        aggregate[field] = max(aggregate.get(field, 0) + value, 0)
+    return aggregate
+
+
+def aggregate_feedbacks(feedbacks):
+    """Rebuild-from-scratch path, used for repair and at startup."""
+    aggregate = empty_aggregate()
+    for feedback in feedbacks:
+        apply_feedback(aggregate, feedback)
+    return aggregate
+
+
+def average_rating(aggregate):
+    if not aggregate["review_count"]:
+        return 0.0
+    return round(aggregate["rating_sum"] / aggregate["review_count"], 1)
+
+
+def score_trend(score):
+    if score > 75:
+        return "Trending Up"
+    elif score > 50:
+        return "Stable"
+    return "Trending Down"
+
+
+def sentiment_score(aggregate):
+    """CinemaPulse score (0-100) of a set of counters."""
+    total = aggregate["review_count"]
+    if total <= 0:
+        return 0
+    return int((
+        aggregate["positive_count"] * 100 + aggregate["neutral_count"] * 50
+        + aggregate["negative_count"] * 10
+    ) / total)
+
+
+def analytics_from_aggregate(aggregate, buckets=None, now=None):
+    """Score, breakdown and trend of a movie.
+
+    With the movie's hourly ``buckets`` the trend compares the last day
+    against everything before it (see window_trend); without them it falls
+    back to thresholds on the lifetime score.
+    """
+    total = aggregate["review_count"]
+
+    if not total:
+        return {
+            "score": 0,
+            "breakdown": {"positive": 0, "neutral": 0, "negative": 0},
+            "trend": "Stable",
+            "last_updated": None
+        }
+
+    positive = aggregate["positive_count"]
+    neutral = aggregate["neutral_count"]
+    negative = aggregate["negative_count"]
+
+    score = sentiment_score(aggregate)
+
+    return {
+        "score": score,
+        "breakdown": {
+            "positive": int((positive / total) * 100),
+            "neutral": int((neutral / total) * 100),
+            "negative": int((negative / total) * 100)
+        },
+        "trend": score_trend(score) if buckets is None else window_trend(aggregate, buckets, now),
+        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M")
+    }
+
+
+# ================= TREND BUCKETS =================
+# Per-movie ring of hourly counters: slot "h<hour % TREND_BUCKETS>" holds the
+# hour it counts plus the usual aggregate fields. A slot is reset when a
+# newer hour lands on it, so the ring always covers the last week and any
+# sliding-window question costs O(buckets), not O(reviews).
+TREND_BUCKETS = 168
+# "Recent" window compared against the movie's older reviews
+TREND_RECENT_HOURS = 24
+# Reviews needed on each side before a trend is called
+TREND_MIN_REVIEWS = 3
+# Score points the recent window must move to be Trending Up / Down
+TREND_DELTA = 10
+
+
+def trend_hour(seconds):
+    return int(seconds // 3600)
+
+
+def trend_slot(hour):
+    return f"h{hour % TREND_BUCKETS}"
+
+
+def empty_bucket(hour):
+    return {"hour": hour, **empty_aggregate()}
+
+
+def add_to_buckets(buckets, feedback, hour, sign=1):
+    """Count one feedback add/delete in the ring (in-memory app)."""
+    slot = trend_slot(hour)
+    bucket = buckets.get(slot)
+    if bucket is None or bucket["hour"] < hour:
+        if sign < 0:
+            return
+        bucket = buckets[slot] = empty_bucket(hour)
+    elif bucket["hour"] > hour:
+        # Older than the ring: only the lifetime counters know about it
+        return
+    apply_feedback(bucket, feedback, sign)
+
+
+def buckets_from_feedbacks(feedbacks, now):
+    """Rebuild path: the ring of one movie from its timestamped feedbacks."""
+    current = trend_hour(now)
+    buckets = {}
+    for feedback in feedbacks:
+        hour = trend_hour(feedback_time(feedback))
+        if 0 <= current - hour < TREND_BUCKETS:
+            add_to_buckets(buckets, feedback, hour)
+    return buckets
+
+
+def window_aggregate(buckets, now, hours, offset=0):
+    """Counters of the reviews made ``offset`` to ``offset + hours`` hours ago."""
+    current = trend_hour(now if now is not None else time.time())
+    total = empty_aggregate()
+    for bucket in buckets.values():
+        age = current - int(bucket["hour"])
+        if offset <= age < offset + hours:
+            for field in AGGREGATE_FIELDS:
+                total[field] += int(bucket.get(field, 0))
+    return total
+
+
+def hourly_series(buckets, now, hours):
+    """Counters per hour for the last ``hours`` hours, oldest first."""
+    current = trend_hour(now if now is not None else time.time())
+    by_hour = {int(bucket["hour"]): bucket for bucket in buckets.values()}
+    series = []
+    for hour in range(current - hours + 1, current + 1):
+        bucket = by_hour.get(hour, {})
+        series.append({
+            "hour": datetime.fromtimestamp(hour * 3600).strftime("%Y-%m-%d %H:00"),
+            **{field: int(bucket.get(field, 0)) for field in AGGREGATE_FIELDS}
+        })
+    return series
+
+
+def window_trend(aggregate, buckets, now=None):
+    """Trend of the last TREND_RECENT_HOURS against the movie's older reviews.
+
+    A quiet movie is Stable whatever its lifetime score; a movie reviewed
+    only recently falls back to the lifetime thresholds.
+    """
+    recent = window_aggregate(buckets, now, TREND_RECENT_HOURS)
+    if recent["review_count"] < TREND_MIN_REVIEWS:
+        return "Stable"
+
+    baseline = {field: max(aggregate[field] - recent[field], 0) for field in AGGREGATE_FIELDS}
+    if baseline["review_count"] < TREND_MIN_REVIEWS:
+        return score_trend(sentiment_score(recent))
+
+    delta = sentiment_score(recent) - sentiment_score(baseline)
+    if delta >= TREND_DELTA:
+        return "Trending Up"
+    elif delta <= -TREND_DELTA:
+        return "Trending Down"
+    return "Stable"
+
+
+# ================= REVIEW VELOCITY =================
+# How fast a movie is being reviewed: every review counts 1 and the count
+# halves every ``half_life`` seconds. Stored as (velocity, velocity_at)
+# so it can be carried forward to any later time.
+def decay_velocity(velocity, velocity_at, now, half_life):
+    if not velocity:
+        return 0.0
+    return float(velocity) * 0.5 ** (max(now - float(velocity_at), 0) / half_life)
+
+
+def bump_velocity(velocity, velocity_at, now, half_life):
+    """Velocity as of ``now`` after one more review."""
+    return decay_velocity(velocity, velocity_at, now, half_life) + 1.0
+
+
+# Parsed timestamps; minute resolution keeps this small even for millions
+# of feedbacks
+_feedback_times = {}
+
+
+def feedback_time(feedback):
+    """Epoch seconds of a feedback's "YYYY-MM-DD HH:MM" timestamp."""
+    stamp = feedback.get("timestamp") or ""
+    seconds = _feedback_times.get(stamp)
+    if seconds is None:
+        try:
+            seconds = time.mktime(datetime.strptime(stamp, "%Y-%m-%d %H:%M").timetuple())
+        except ValueError:
+            seconds = 0.0
+        if len(_feedback_times) < 100000:
+            _feedback_times[stamp] = seconds
+    return seconds
+
+
+def average_by_genre(movies):
+    """Average movie rating per genre, for the admin genre chart."""
+    totals = {}
+    for movie in movies:
+        genre = movie.get("genre") or "Other"
+        total = totals.setdefault(genre, [0.0, 0])
+        total[0] += float(movie.get("rating") or 0)
+        total[1] += 1
+    return {genre: round(s / n, 1) for genre, (s, n) in totals.items()}
@@ -1,9 +1,38 @@
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from markupsafe import Markup
 import uuid
+import atexit
+from collections import Counter
+import threading
+import time
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 from flask_mail import Mail, Message
+from feedback_store import FeedbackStore
+from storage import open_storage
+from notifications import NotificationOutbox
+from sentiment import sentiment_engine
+from rescore import run_rescore, list_pages
+from bulk_import import CHUNK_SIZE, read_rows, run_import, spool_upload
+from export import FORMATS as EXPORT_FORMATS, export_filename, parse_export_args, since_filter, stream_export
+from http_cache import DataVersion, HttpCache
+from instrumentation import Instrumentation, downstream
+from view_cache import (
+    FAVORITE_SLOT, ViewModelCache, fill_fragment, fragment_size, split_fragment
+)
+from analytics import (
+    AGGREGATE_FIELDS, TREND_BUCKETS, TREND_RECENT_HOURS, add_to_buckets,
+    aggregate_feedbacks, analytics_from_aggregate, apply_feedback, average_by_genre,
+    average_rating, buckets_from_feedbacks, bump_velocity, empty_aggregate, feedback_time,
+    hourly_series, sentiment_score, trend_hour, window_aggregate, window_trend
+)
+from leaderboard import LEADERBOARD_LIMIT, LEADERBOARD_METRICS, Leaderboard
+from search_index import SEARCH_LIMIT, MovieSearchIndex
+from comment_index import COMMENT_SEARCH_LIMIT, CommentIndex, highlight
+from pagination import (
+    FEEDBACK_PAGE_SIZE, MAX_PAGE_SIZE, MOVIES_PAGE_SIZE, encode_cursor, key_positions, page_after, page_args
+)
 
 load_dotenv()  # loads .env file variables
 
@@ -34,7 +63,7 @@ movies = {
 }
 
 # ================= FEEDBACK TABLE =================
-feedbacks = [
+feedbacks = FeedbackStore([
     {
         "id": str(uuid.uuid4()),
         "user_email": "anonymous@cinemapulse.com",
@@ -62,11 +91,150 @@ feedbacks = [
         "sentiment": "Positive",
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
     }
-]
+])
+
+# ================= STORAGE =================
+# Where the tables above live:
+#   memory         in this process, made durable by a write-ahead log in
+#                  CINEMAPULSE_DATA_DIR (one worker)
+#   sqlite:<path>  in a SQLite database shared by every worker on the
+#                  host, for gunicorn -w N
+STORAGE = os.getenv("CINEMAPULSE_STORAGE", "memory")
+# Directory for the write-ahead log and snapshots of the in-memory tables
+# ("" keeps them in memory only)
+DATA_DIR = os.getenv("CINEMAPULSE_DATA_DIR", "cinemapulse-data")
+# 0: a write returns once it is fsynced (concurrent writes share one
+# fsync); otherwise fsync every this many ms and accept losing that window
+# on a crash (SQLite: synchronous=NORMAL)
+WAL_FSYNC_MS = float(os.getenv("CINEMAPULSE_WAL_FSYNC_MS", "0"))
+# Log records between snapshots
+SNAPSHOT_EVERY = int(os.getenv("CINEMAPULSE_SNAPSHOT_EVERY", "50000"))
+# SQLite connections per worker process
+SQLITE_POOL_SIZE = int(os.getenv("CINEMAPULSE_SQLITE_POOL_SIZE", "8"))
+# Seconds the shared change feed is kept; a worker idle for longer
+# rebuilds its analytics and indexes from the tables
+CHANGE_RETENTION = float(os.getenv("CINEMAPULSE_CHANGE_RETENTION", "3600"))
+
+store = open_storage(
+    STORAGE, users, movies, feedbacks,
+    data_dir=DATA_DIR,
+    fsync_interval=WAL_FSYNC_MS / 1000,
+    snapshot_every=SNAPSHOT_EVERY,
+    pool_size=SQLITE_POOL_SIZE,
+    retention=CHANGE_RETENTION
+)
+atexit.register(store.close)
+
+# With SQLite, users and feedbacks are read from the database and movies is
+# this worker's copy of the catalog
+users = store.users
+movies = store.movies
+feedbacks = store.feedbacks
+
+# ================= INSTRUMENTATION =================
+# Sampling profiler: requests slower than PROFILE_SLOW_MS (0 = off) have
+# their stacks sampled every PROFILE_INTERVAL_MS written to PROFILE_DIR as
+# folded stacks for flamegraphs
+PROFILE_SLOW_MS = float(os.getenv("CINEMAPULSE_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("CINEMAPULSE_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("CINEMAPULSE_PROFILE_DIR", "profiles")
+# Bearer token /metrics asks for (unset: open to the scraper)
+METRICS_TOKEN = os.getenv("CINEMAPULSE_METRICS_TOKEN")
+
+# SQLite work (storage.ConnectionPool) and SMTP sends are timed as
+# downstream calls; /metrics serves the per-route histograms
+instrumentation = Instrumentation(
+    app,
+    services=("sqlite", "smtp") if STORAGE.startswith("sqlite") else ("smtp",),
+    token=METRICS_TOKEN,
+    profile_threshold=PROFILE_SLOW_MS / 1000,
+    profile_interval=PROFILE_INTERVAL_MS / 1000,
+    profile_dir=PROFILE_DIR
+)
+
+# ================= HTTP CACHING =================
+# Bumped by every feedback, favorite and movie write; drives the ETags of
+# the dashboards and JSON APIs (304 when unchanged). With SQLite the
+# version is the shared change sequence, the same in every worker.
+data_version = DataVersion(store.version_stamp())
+http_cache = HttpCache(app, data_version)
 
 # ================= MOVIE ANALYTICS TABLE =================
 movie_analytics = {}
 
+# Running per-movie counters (count, rating sum, sentiment counts)
+movie_aggregates = {}
+
+# movie id -> ring of hourly counters, for the trend (see analytics.py)
+movie_trend_buckets = {}
+
+# movie id -> movie record (same dict objects as in `movies`)
+movies_by_id = {}
+
+# ================= LEADERBOARD =================
+# Review velocity halves every this many hours
+VELOCITY_HALF_LIFE = float(os.getenv("CINEMAPULSE_VELOCITY_HALF_LIFE_HOURS", "24")) * 3600
+
+# Top movies by score / rating / velocity, updated with the analytics
+leaderboard = Leaderboard(VELOCITY_HALF_LIFE)
+
+# movie id -> (decayed review count, as of epoch seconds)
+movie_velocity = {}
+
+# ================= MOVIE SEARCH =================
+# Inverted index over titles, genres and languages (/api/movies/search)
+movie_search = MovieSearchIndex(movies.values())
+
+# ================= COMMENT SEARCH =================
+# Inverted index over review comments, for moderation (/admin/feedback/search).
+# Built by the first search, so startup does not tokenize every review.
+comment_index = CommentIndex()
+comment_index_lock = threading.Lock()
+comment_index_state = {"built": False}
+
+def current_comment_index():
+    with comment_index_lock:
+        if not comment_index_state["built"]:
+            comment_index.rebuild(feedbacks)
+            comment_index_state["built"] = True
+    return comment_index
+
+# ================= USER DASHBOARD SUMMARIES =================
+# Materialized per-user dashboard data (stats, favorite ids, recent history
+# with movie names). An entry is valid while the user's dashboard version
+# and the catalog version it was built from are unchanged.
+user_summaries = ViewModelCache("user_summaries")
+
+# email -> bumped by each of the user's feedback and favorite writes
+dashboard_versions = {}
+
+# Reviews shown under "My Recent Reviews"
+DASHBOARD_HISTORY_SIZE = 5
+
+# Bumped by every catalog edit (and bulk rescoring)
+catalog_version = 0
+
+def bump_catalog_version():
+    global catalog_version
+    catalog_version += 1
+
+# ================= MOVIE CARD FRAGMENTS =================
+# Rendered user-dashboard cards, shared by every user; the favorite heart is
+# filled in per request. Capped by count and by total cached HTML size.
+MOVIE_CARD_CACHE_SIZE = int(os.getenv("CINEMAPULSE_CARD_CACHE_SIZE", "2000"))
+MOVIE_CARD_CACHE_BYTES = int(os.getenv("CINEMAPULSE_CARD_CACHE_BYTES", str(8 * 1024 * 1024)))
+
+movie_cards = ViewModelCache(
+    "movie_cards",
+    maxsize=MOVIE_CARD_CACHE_SIZE,
+    weigh=fragment_size,
+    max_weight=MOVIE_CARD_CACHE_BYTES
+)
+
+def touch_user_dashboard(email):
+    """Invalidate one user's summary after a feedback or favorite write."""
+    dashboard_versions[email] = dashboard_versions.get(email, 0) + 1
+
 # ================= HELPERS =================
 
 def default_analytics_payload():
@@ -81,10 +249,90 @@ def is_logged_in():
     return "user_email" in session
 
 def get_feedbacks_for_movie(movie_id):
-    return [f for f in feedbacks if f["movie_id"] == movie_id]
+    return feedbacks.for_movie(movie_id)
 
 def get_feedbacks_for_user(user_email):
-    return [f for f in feedbacks if f["user_email"] == user_email]
+    return feedbacks.for_user(user_email)
+
+def build_user_summary(email, user):
+    favorites = user.get("favorites", [])
+    history = [
+        {**fb, "movie_name": movies_by_id.get(fb["movie_id"], {}).get("name", "Unknown")}
+        for fb in feedbacks.for_user(email, limit=DASHBOARD_HISTORY_SIZE)
+    ]
+    return {
+        "favorite_ids": frozenset(favorites),
+        "favorites": sorted(
+            (movies_by_id[movie_id] for movie_id in favorites if movie_id in movies_by_id),
+            key=lambda movie: movie["name"]
+        ),
+        "history": history,
+        "stats": {
+            "total_movies": len(movies),
+            "total_reviews": feedbacks.count_for_user(email),
+            "total_favorites": len(favorites)
+        }
+    }
+
+def movie_card_version(movie, now):
+    # The trend slides with the clock, so a card is redrawn every trend hour
+    aggregate = movie_aggregates.get(movie["id"], empty_aggregate())
+    return (
+        tuple(aggregate[field] for field in AGGREGATE_FIELDS), trend_hour(now),
+        movie["name"], movie["genre"], movie["language"], movie["image"], movie["rating"]
+    )
+
+def render_movie_card(movie, now):
+    payload = {
+        **movie,
+        "avg_rating": movie["rating"],
+        "review_count": feedbacks.count_for_movie(movie["id"]),
+        "analytics": current_analytics(movie["id"], now)
+    }
+    html = render_template("_movie_card.html", movie=payload, favorite_class=FAVORITE_SLOT)
+    return split_fragment(html)
+
+def movie_card(movie, is_favorite, now):
+    """Card HTML from the fragment cache, with this user's favorite state."""
+    parts = movie_cards.get(
+        movie["id"], movie_card_version(movie, now), lambda: render_movie_card(movie, now)
+    )
+    return Markup(fill_fragment(parts, "fas" if is_favorite else "far"))
+
+def get_user_summary(email, user):
+    return user_summaries.get(
+        email,
+        (dashboard_versions.get(email, 0), catalog_version),
+        lambda: build_user_summary(email, user)
+    )
+
+# The movie grid's list and its id -> position map, rebuilt when the
+# catalog changes (bulk imports add movies before announcing themselves)
+movie_list_state = {"current": (None, [], {})}
+
+def movie_list():
+    """-> (movies, id -> index in movies), swapped in as one tuple."""
+    version = (catalog_version, len(movies))
+    current_version, catalog, positions = movie_list_state["current"]
+    if current_version != version:
+        catalog = list(movies.values())
+        positions = key_positions(catalog)
+        movie_list_state["current"] = (version, catalog, positions)
+    return catalog, positions
+
+def movies_page():
+    """Current page of the movie grid (?cursor=) plus paging info for templates."""
+    try:
+        start_key, limit = page_args(request.args, MOVIES_PAGE_SIZE)
+    except ValueError:
+        start_key, limit = None, MOVIES_PAGE_SIZE
+
+    catalog, positions = movie_list()
+    page_movies, last_key = page_after(catalog, start_key, limit, positions=positions)
+    return page_movies, {
+        "cursor": request.args.get("cursor") if start_key else None,
+        "next_cursor": encode_cursor(last_key)
+    }
 
 # ================= FAVORITE TOGGLE =================
 @app.route("/movie/favorite/toggle/<movie_id>", methods=["POST"])
@@ -92,23 +340,20 @@ def toggle_favorite(movie_id):
     if not is_logged_in():
         return jsonify({"success": False, "message": "Not logged in"}), 401
 
-    user = users.get(session["user_email"])
-    if not user:
+    # The dashboard sends the state it wants (favorite=1/0), so repeated
+    # clicks are idempotent; without it the favorite is flipped
+    wanted = request.form.get("favorite")
+    result = store.set_favorite(
+        session["user_email"], movie_id, wanted == "1" if wanted in ("1", "0") else None
+    )
+    if result is None:
         return jsonify({"success": False, "message": "User not found"}), 404
-
-    favorites = user.setdefault("favorites", [])
-
-    if movie_id in favorites:
-        favorites.remove(movie_id)
-        is_favorite = False
-    else:
-        favorites.append(movie_id)
-        is_favorite = True
+    is_favorite, total_favorites = result
 
     return jsonify({
         "success": True,
         "is_favorite": is_favorite,
-        "total_favorites": len(favorites)
+        "total_favorites": total_favorites
     })
 
 # ================= EMAIL CONFIG =================
@@ -122,101 +367,266 @@ app.config['MAIL_DEFAULT_SENDER'] = os.getenv("MAIL_FROM")
 
 mail = Mail(app)
 
+# Idle SMTP connections are closed and reopened after this many seconds
+MAIL_IDLE_TIMEOUT = 60
+
+# One reusable SMTP connection per outbox worker thread
+smtp_local = threading.local()
+
+def get_smtp_connection():
+    conn = getattr(smtp_local, "conn", None)
+    if conn and time.time() - smtp_local.last_used > MAIL_IDLE_TIMEOUT:
+        close_smtp_connection()
+        conn = None
+
+    if conn is None:
+        with downstream("smtp", "connect", app.config['MAIL_SERVER'] or ""):
+            conn = mail.connect()
+            conn.__enter__()
+        smtp_local.conn = conn
+
+    smtp_local.last_used = time.time()
+    return conn
+
+def close_smtp_connection():
+    conn = getattr(smtp_local, "conn", None)
+    smtp_local.conn = None
+    if conn:
+        try:
+            conn.__exit__(None, None, None)
+        except Exception:
+            pass
+
+def send_email_batch(batch):
+    with app.app_context():
+        try:
+            conn = get_smtp_connection()
+            for item in batch:
+                msg = Message(item["subject"], recipients=item["to"])
+                msg.body = item["message"]
+                with downstream("smtp", "send", app.config['MAIL_SERVER'] or ""):
+                    conn.send(msg)
+                item["sent"] = True
+                print(f"[EMAIL SENT] {item['subject']}")
+        except Exception as e:
+            print("Email error:", e)
+            close_smtp_connection()
+            raise
+
+# Emails are queued and sent by background workers, never on the request thread
+email_outbox = NotificationOutbox(
+    send_email_batch,
+    name="email",
+    maxsize=int(os.getenv("NOTIFY_QUEUE_SIZE", "1000")),
+    workers=int(os.getenv("NOTIFY_WORKERS", "2")),
+    digest_subjects=("User Login", "Admin Login"),
+    digest_window=float(os.getenv("NOTIFY_DIGEST_SECONDS", "60"))
+).start()
+atexit.register(email_outbox.stop)
+
 
 def send_email_notification(subject, message, to=None):
-    try:
-        if not to:
-            to = [app.config['MAIL_DEFAULT_SENDER']]  # default admin mailbox
+    if not to:
+        to = [app.config['MAIL_DEFAULT_SENDER']]  # default admin mailbox
 
-        msg = Message(subject, recipients=to)
-        msg.body = message
-        mail.send(msg)
-        print(f"[EMAIL SENT] {subject}")
-    except Exception as e:
-        print("Email error:", e)
+    email_outbox.submit(subject, message, to)
 
 # ================= MOVIE RATING LOGIC =================
 def update_movie_rating(movie_id):
-    movie_feedbacks = [f for f in feedbacks if f["movie_id"] == movie_id]
-
-    if not movie_feedbacks:
-        new_rating = 0.0
-    else:
-        new_rating = round(
-            sum(f["rating"] for f in movie_feedbacks) / len(movie_feedbacks),
-            1
-        )
-
-    for movie in movies.values():
-        if movie["id"] == movie_id:
-            movie["rating"] = new_rating
-            break
+    movie = movies_by_id.get(movie_id)
+    if movie:
+        movie["rating"] = average_rating(movie_aggregates.get(movie_id, empty_aggregate()))
 
 
 # Simple local sentiment (placeholder for AWS AI later)
 def simple_sentiment_analysis(comment):
-    positive_words = ["amazing", "great", "excellent", "masterpiece", "good", "love"]
-    negative_words = ["bad", "boring", "waste", "poor", "predictable"]
-
-    text = comment.lower()
-    score = 0
-
-    for w in positive_words:
-        if w in text:
-            score += 1
-    for w in negative_words:
-        if w in text:
-            score -= 1
-
-    if score > 0:
-        return "Positive"
-    elif score < 0:
-        return "Negative"
-    return "Neutral"
+    return sentiment_engine.score(comment)
 
 # ================= MOVIE ANALYTICS LOGIC =================
 def init_movie_analytics():
     for key, movie in movies.items():
+        movies_by_id[movie["id"]] = movie
         movie_analytics[movie["id"]] = default_analytics_payload()
-        
+    rebuild_all_movie_aggregates()
+
 
 def update_movie_analytics(movie_id):
-    movie_feedbacks = [f for f in feedbacks if f["movie_id"] == movie_id]
+    aggregate = movie_aggregates.get(movie_id)
 
-    if not movie_feedbacks:
+    if not aggregate or not aggregate["review_count"]:
         movie_analytics[movie_id] = default_analytics_payload()
+    else:
+        movie_analytics[movie_id] = analytics_from_aggregate(
+            aggregate, movie_trend_buckets.get(movie_id, {}), time.time()
+        )
+
+    update_leaderboard(movie_id)
+
+
+def current_analytics(movie_id, now):
+    """Stored analytics with the trend taken from the hourly buckets at
+    ``now``: a movie that stops getting reviews drifts back to Stable
+    without a write."""
+    analytics = movie_analytics.get(movie_id) or default_analytics_payload()
+    aggregate = movie_aggregates.get(movie_id)
+    if not aggregate or not aggregate["review_count"]:
+        return analytics
+    return {**analytics, "trend": window_trend(aggregate, movie_trend_buckets.get(movie_id, {}), now)}
+
+
+def update_leaderboard(movie_id):
+    movie = movies_by_id.get(movie_id)
+    if not movie:
+        leaderboard.remove(movie_id)
         return
 
-    positive = sum(1 for f in movie_feedbacks if f["sentiment"] == "Positive")
-    neutral  = sum(1 for f in movie_feedbacks if f["sentiment"] == "Neutral")
-    negative = sum(1 for f in movie_feedbacks if f["sentiment"] == "Negative")
-    total = len(movie_feedbacks)
+    aggregate = movie_aggregates.get(movie_id) or empty_aggregate()
+    leaderboard.update(
+        movie,
+        movie_analytics.get(movie_id, {}).get("score", 0),
+        average_rating(aggregate),
+        aggregate["review_count"],
+        *movie_velocity.get(movie_id, (0.0, 0.0))
+    )
 
-    score = int((positive * 100 + neutral * 50 + negative * 10) / total)
 
-    if score > 75:
-        trend = "Trending Up"
-    elif score > 50:
-        trend = "Stable"
-    else:
-        trend = "Trending Down"
-
-    movie_analytics[movie_id] = {
-        "score": score,
-        "breakdown": {
-            "positive": int((positive / total) * 100),
-            "neutral": int((neutral / total) * 100),
-            "negative": int((negative / total) * 100)
-        },
-        "trend": trend,
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M")
-    }
+def record_feedback(feedback, sign=1):
+    """Apply one feedback add (sign=1) or delete (sign=-1) in O(1)."""
+    movie_id = feedback["movie_id"]
+    apply_feedback(movie_aggregates.setdefault(movie_id, empty_aggregate()), feedback, sign)
+    # A delete comes out of the bucket of the hour it was written in
+    hour = trend_hour(time.time() if sign > 0 else feedback_time(feedback))
+    add_to_buckets(movie_trend_buckets.setdefault(movie_id, {}), feedback, hour, sign)
+    if sign > 0:
+        now = time.time()
+        movie_velocity[movie_id] = (
+            bump_velocity(*movie_velocity.get(movie_id, (0.0, now)), now, VELOCITY_HALF_LIFE), now
+        )
+    update_movie_analytics(movie_id)
+    update_movie_rating(movie_id)
+
+
+def rebuild_movie_aggregate(movie_id):
+    """Repair path: recompute one movie's counters from its feedbacks."""
+    movie_reviews = get_feedbacks_for_movie(movie_id)
+    movie_aggregates[movie_id] = aggregate_feedbacks(movie_reviews)
+    movie_trend_buckets[movie_id] = buckets_from_feedbacks(movie_reviews, time.time())
+    update_movie_analytics(movie_id)
+    update_movie_rating(movie_id)
+
+
+def rebuild_all_movie_aggregates():
+    """Recompute every movie's counters in a single pass over the feedbacks.
+
+    Feedbacks are counted per (movie, rating, sentiment) and per (movie,
+    timestamp) with Counter, so the per-feedback work runs in C and only
+    the distinct keys are folded into counters and velocities here.
+    """
+    # With SQLite, changes are held back until the rebuild is done, so the
+    # counters then continue from exactly these rows
+    with store.feedback_rows() as rows:
+        movie_aggregates.clear()
+        movie_trend_buckets.clear()
+        movie_velocity.clear()
+        now = time.time()
+
+        by_rating = Counter((f["movie_id"], f["rating"], f["sentiment"]) for f in rows)
+        for (movie_id, rating, sentiment), count in by_rating.items():
+            apply_feedback(
+                movie_aggregates.setdefault(movie_id, empty_aggregate()),
+                {"rating": rating, "sentiment": sentiment}, count
+            )
+
+        by_minute = Counter((f["movie_id"], f["timestamp"]) for f in rows)
+        for (movie_id, timestamp), count in by_minute.items():
+            # Each review's weight today, from its timestamp
+            age = max(now - feedback_time({"timestamp": timestamp}), 0)
+            velocity = movie_velocity.get(movie_id, (0.0, now))[0]
+            movie_velocity[movie_id] = (velocity + count * 0.5 ** (age / VELOCITY_HALF_LIFE), now)
+
+        # Only the last TREND_BUCKETS hours go into the rings; timestamps sort
+        # as strings, so older reviews are skipped without parsing them
+        oldest = datetime.fromtimestamp((trend_hour(now) - TREND_BUCKETS + 1) * 3600).strftime("%Y-%m-%d %H:%M")
+        for f in rows:
+            if f["timestamp"] >= oldest:
+                hour = trend_hour(feedback_time(f))
+                if trend_hour(now) - hour < TREND_BUCKETS:
+                    add_to_buckets(movie_trend_buckets.setdefault(f["movie_id"], {}), f, hour)
+
+        for movie_id in movies_by_id:
+            update_movie_analytics(movie_id)
+            update_movie_rating(movie_id)
+
+# ================= TABLE CHANGES =================
+def apply_change(op, args):
+    """Update the derived state (analytics, leaderboard, indexes, caches)
+    for one table write. The storage calls this after every write, in
+    order; with SQLite that includes the writes of the other workers."""
+    if op in ("feedback_put", "feedback_delete"):
+        feedback = args[0]
+        if op == "feedback_put":
+            record_feedback(feedback)
+            comment_index.add(feedback)
+        else:
+            record_feedback(feedback, sign=-1)
+            comment_index.remove(feedback)
+        touch_user_dashboard(feedback["user_email"])
+        movie_cards.invalidate(feedback["movie_id"])
+    elif op == "favorite":
+        touch_user_dashboard(args[0])
+    elif op == "movie_put":
+        movie = args[2]
+        movie_id = movie["id"]
+        if movie_id not in movies_by_id:
+            movie_analytics[movie_id] = default_analytics_payload()
+            movie_aggregates[movie_id] = empty_aggregate()
+        movies_by_id[movie_id] = movie
+        # Recalculate rating based only on feedbacks
+        update_movie_rating(movie_id)
+        update_leaderboard(movie_id)
+        movie_search.add(movie)
+        bump_catalog_version()
+        movie_cards.invalidate(movie_id)
+    elif op == "movie_delete":
+        movie_id = args[1]
+        movies_by_id.pop(movie_id, None)
+        comment_index.remove_movie(movie_id)
+        movie_analytics.pop(movie_id, None)
+        movie_aggregates.pop(movie_id, None)
+        movie_trend_buckets.pop(movie_id, None)
+        movie_velocity.pop(movie_id, None)
+        leaderboard.remove(movie_id)
+        movie_search.remove(movie_id)
+        bump_catalog_version()
+        movie_cards.invalidate(movie_id)
+    elif op == "analytics_rebuild":
+        rebuild_all_movie_aggregates()
+        bump_catalog_version()
+    elif op in ("reset", "bulk_import"):
+        # This worker missed pruned changes, or rows were bulk imported
+        # without a change each: rebuild everything from the tables
+        movies_by_id.clear()
+        movie_analytics.clear()
+        leaderboard.replace([])
+        init_movie_analytics()
+        movie_search.replace(movies.values())
+        with comment_index_lock:
+            comment_index_state["built"] = False
+        bump_catalog_version()
+        movie_cards.invalidate()
+    # feedback_sentiments: counters are rebuilt once the whole rescore is
+    # written (analytics_rebuild)
+    data_version.bump()
+
+store.listen(apply_change)
+
+@app.before_request
+def sync_tables():
+    """Pick up the other workers' writes before serving a request."""
+    store.poll()
 
 # Initialize analytics
 init_movie_analytics()
-for f in feedbacks:
-    update_movie_analytics(f["movie_id"])
-    update_movie_rating(f["movie_id"])
 
 # ================= PUBLIC =================
 @app.route("/")
@@ -244,14 +654,14 @@ def register():
         if email in users:
             return "User already exists"
 
-        users[email] = {
+        store.put_user(email, {
             "id": str(uuid.uuid4()),
             "name": name,
             "password": password,
             "favorite_genre": favorite_genre,
             "age_group": age_group,
-            "favorites": []
-        }
+            "favorites": set()
+        })
         send_email_notification(
             "New User Registration",
             f"User {name} ({email}) registered on CinemaPulse."
@@ -293,52 +703,31 @@ def user_dashboard():
     if not user:
         return redirect(url_for("logout"))
 
-    favorites = user.setdefault("favorites", [])
-    user_feedbacks = get_feedbacks_for_user(session["user_email"])
+    # Nothing changed since the browser's copy: skip building the page
+    now = time.time()
+    etag = http_cache.etag("user_dashboard", session["user_email"], request.full_path, trend_hour(now))
+    not_modified = http_cache.not_modified(etag)
+    if not_modified:
+        return not_modified
 
-    movies_payload = []
-    for movie in movies.values():
-        movie_id = movie["id"]
-        movie_feedbacks = sorted(
-            get_feedbacks_for_movie(movie_id),
-            key=lambda fb: fb["timestamp"],
-            reverse=True
-        )
-        avg_rating = movie["rating"]
-        if movie_feedbacks:
-            avg_rating = round(sum(fb["rating"] for fb in movie_feedbacks) / len(movie_feedbacks), 1)
+    # Cached until this user writes or the catalog changes
+    summary = get_user_summary(session["user_email"], user)
+    favorites = summary["favorite_ids"]
 
-        analytics = movie_analytics.get(movie_id, default_analytics_payload())
+    # One page of movie cards (cached fragments); reviews are loaded lazily
+    # by the dashboard JS
+    page_movies, page = movies_page()
+    cards = [movie_card(movie, movie["id"] in favorites, now) for movie in page_movies]
 
-        movies_payload.append({
-            **movie,
-            "avg_rating": avg_rating,
-            "feedbacks": movie_feedbacks,
-            "analytics": analytics,
-            "is_favorite": movie_id in favorites
-        })
-
-    favorite_movies = [movie for movie in movies_payload if movie["is_favorite"]]
-
-    feedback_history = []
-    for fb in sorted(user_feedbacks, key=lambda item: item["timestamp"], reverse=True):
-        movie_name = next((movie["name"] for movie in movies_payload if movie["id"] == fb["movie_id"]), "Unknown")
-        feedback_history.append({**fb, "movie_name": movie_name})
-
-    stats = {
-        "total_movies": len(movies_payload),
-        "total_reviews": len(user_feedbacks),
-        "total_favorites": len(favorites)
-    }
-
-    return render_template(
+    return http_cache.finish(render_template(
         "user_dashboard.html",
         user=user,
-        movies=movies_payload,
-        favorites=favorite_movies,
-        feedback_history=feedback_history,
-        stats=stats
-    )
+        cards=cards,
+        favorites=summary["favorites"],
+        feedback_history=summary["history"],
+        stats=summary["stats"],
+        page=page
+    ), etag)
 
 @app.route("/movie/feedback/add", methods=["POST"])
 def add_feedback():
@@ -351,22 +740,20 @@ def add_feedback():
 
     key = movie_name.lower().replace(" ", "_")
 
-    if key in movies:
+    movie = movies.get(key)
+    if movie:
         sentiment = simple_sentiment_analysis(comment)
 
-        feedbacks.append({
+        store.add_feedback({
             "id": str(uuid.uuid4()),
             "user_email": session["user_email"],
-            "movie_id": movies[key]["id"],
+            "movie_id": movie["id"],
             "rating": rating,
             "comment": comment,
             "sentiment": sentiment,
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
         })
 
-        update_movie_analytics(movies[key]["id"])
-        update_movie_rating(movies[key]["id"])
-
         send_email_notification(
             "New Feedback Added",
             f"""
@@ -380,6 +767,100 @@ Comment: {comment}
 
     return redirect(url_for("user_dashboard"))
 
+# ================= FEEDBACK API =================
+@app.route("/api/movies/<movie_id>/feedbacks")
+def movie_feedbacks(movie_id):
+    if not is_logged_in() and not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    etag = http_cache.etag("movie_feedbacks", request.full_path)
+    not_modified = http_cache.not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    try:
+        start_key, limit = page_args(request.args, FEEDBACK_PAGE_SIZE)
+        after = (start_key["timestamp"], start_key["id"]) if start_key else None
+    except (ValueError, KeyError):
+        return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+    items, last_key = feedbacks.page_for_movie(movie_id, after, limit)
+    next_key = {"timestamp": last_key[0], "id": last_key[1]} if last_key else None
+
+    return http_cache.finish(jsonify({
+        "success": True,
+        "feedbacks": items,
+        "next_cursor": encode_cursor(next_key)
+    }), etag)
+
+# ================= LEADERBOARD API =================
+@app.route("/api/leaderboard")
+def leaderboard_api():
+    if not is_logged_in() and not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    by = request.args.get("by", "score")
+    if by not in LEADERBOARD_METRICS:
+        return jsonify({"success": False, "message": f"by must be one of {', '.join(LEADERBOARD_METRICS)}"}), 400
+
+    try:
+        limit = min(max(int(request.args.get("limit", LEADERBOARD_LIMIT)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit"}), 400
+
+    return jsonify({
+        "success": True,
+        "by": by,
+        "movies": leaderboard.top(by, request.args.get("genre"), request.args.get("language"), limit)
+    })
+
+# ================= SEARCH API =================
+@app.route("/api/movies/search")
+def search_movies():
+    if not is_logged_in() and not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    try:
+        limit = min(max(int(request.args.get("limit", SEARCH_LIMIT)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit"}), 400
+
+    result = movie_search.search(
+        request.args.get("q", ""),
+        request.args.get("genre"),
+        request.args.get("language"),
+        limit
+    )
+    return jsonify({"success": True, **result})
+
+# ================= TREND API =================
+@app.route("/api/movies/<movie_id>/trend")
+def movie_trend(movie_id):
+    if not is_logged_in() and not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    if movie_id not in movies_by_id:
+        return jsonify({"success": False, "message": "Movie not found"}), 404
+
+    try:
+        hours = min(max(int(request.args.get("hours", TREND_RECENT_HOURS)), 1), TREND_BUCKETS)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid hours"}), 400
+
+    # Everything below reads the hourly ring: O(buckets), not O(reviews)
+    now = time.time()
+    buckets = movie_trend_buckets.get(movie_id, {})
+    window = window_aggregate(buckets, now, hours)
+
+    return jsonify({
+        "success": True,
+        "movie_id": movie_id,
+        "hours": hours,
+        "trend": window_trend(movie_aggregates.get(movie_id) or empty_aggregate(), buckets, now),
+        "window": {**window, "score": sentiment_score(window), "rating": average_rating(window)},
+        "series": hourly_series(buckets, now, hours)
+    })
+
 # ================= ADMIN AUTH =================
 @app.route("/admin/login", methods=["GET", "POST"])
 def admin_login():
@@ -405,19 +886,36 @@ def admin_dashboard():
     if not session.get("admin_logged_in"):
         return redirect(url_for("admin_login"))
 
+    now = time.time()
+    etag = http_cache.etag("admin_dashboard", request.full_path, trend_hour(now))
+    not_modified = http_cache.not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    page_movies, page = movies_page()
+
     movies_with_feedbacks = {}
-    for key, movie in movies.items():
+    for movie in page_movies:
+        key = movie["name"].lower().replace(" ", "_")
         movies_with_feedbacks[key] = {
             **movie,
-            "feedbacks": get_feedbacks_for_movie(movie["id"]),
-            "analytics": movie_analytics.get(movie["id"], {})
+            "review_count": feedbacks.count_for_movie(movie["id"]),
+            "analytics": current_analytics(movie["id"], now)
         }
 
-    return render_template(
+    stats = {
+        "total_movies": len(movies),
+        "total_feedbacks": len(feedbacks)
+    }
+
+    return http_cache.finish(render_template(
         "admin_dashboard.html",
         movies=movies_with_feedbacks,
-        analytics=movie_analytics
-    )
+        analytics=movie_analytics,
+        stats=stats,
+        genre_ratings=average_by_genre(movies.values()),
+        page=page
+    ), etag)
 
 # ================= ADMIN MOVIE CRUD =================
 @app.route("/admin/movie/add", methods=["POST"])
@@ -434,16 +932,14 @@ def add_movie():
     key = name.lower().replace(" ", "_")
     movie_id = str(uuid.uuid4())
 
-    movies[key] = {
+    store.put_movie(key, key, {
         "id": movie_id,
         "name": name,
         "genre": genre,
         "language": language,
         "image": image,
         "rating": rating
-    }
-
-    movie_analytics[movie_id] = default_analytics_payload()
+    })
 
     send_email_notification(
         "New Movie Added",
@@ -466,44 +962,28 @@ def update_movie():
     old_key = old_name.lower().replace(" ", "_")
     new_key = name.lower().replace(" ", "_")
 
-    if old_key in movies:
-        movie_data = movies.pop(old_key)
-
-        movie_data.update({
+    movie_data = movies.get(old_key)
+    if movie_data:
+        store.put_movie(old_key, new_key, {
+            **movie_data,
             "name": name,
             "genre": genre,
             "language": language,
             "image": image
         })
 
-        movies[new_key] = movie_data
-
-        # Recalculate rating based only on feedbacks
-        update_movie_rating(movie_data["id"])
-
     return redirect(url_for("admin_dashboard"))
 
 @app.route("/admin/movie/delete", methods=["POST"])
 def delete_movie():
-    global feedbacks
-
     if not session.get("admin_logged_in"):
         return redirect(url_for("admin_login"))
 
     name = request.form["name"]
     key = name.lower().replace(" ", "_")
 
-    if key in movies:
-        movie_id = movies[key]["id"]
-        del movies[key]
-
-        # Remove related feedbacks
-        feedbacks = [f for f in feedbacks if f["movie_id"] != movie_id]
-
-        # Remove analytics
-        if movie_id in movie_analytics:
-            del movie_analytics[movie_id]
-
+    # Related feedbacks go with it
+    if store.delete_movie(key):
         send_email_notification(
             "Movie Deleted",
             f"Admin deleted movie: {name}"
@@ -514,24 +994,289 @@ def delete_movie():
 # ================= ADMIN FEEDBACK DELETE =================
 @app.route("/admin/feedback/delete", methods=["POST"])
 def delete_feedback():
-    global feedbacks
-
     if not session.get("admin_logged_in"):
         return redirect(url_for("admin_login"))
 
-    feedback_id = request.form["feedback_id"]
-    movie_id = None
+    store.remove_feedback(request.form["feedback_id"])
 
-    for f in feedbacks:
-        if f["id"] == feedback_id:
-            movie_id = f["movie_id"]
-            break
+    return redirect(url_for("admin_dashboard"))
+
+# ================= ADMIN COMMENT SEARCH =================
+@app.route("/admin/feedback/search")
+def search_feedback_comments():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
 
-    feedbacks = [f for f in feedbacks if f["id"] != feedback_id]
+    try:
+        start_key, limit = page_args(request.args, COMMENT_SEARCH_LIMIT)
+        after = (start_key["timestamp"], start_key["id"]) if start_key else None
+    except (ValueError, KeyError):
+        return jsonify({"success": False, "message": "Invalid cursor"}), 400
 
-    if movie_id:
-        update_movie_analytics(movie_id)
-        update_movie_rating(movie_id)
+    result = current_comment_index().search(
+        request.args.get("q", ""), request.args.get("movie_id") or None, after, limit
+    )
+
+    items = []
+    for _, feedback_id, _ in result["hits"]:
+        feedback = feedbacks.get(feedback_id)
+        if feedback:
+            items.append({**feedback, "highlight": str(highlight(feedback["comment"], result["terms"]))})
+
+    next_key = result["next_key"]
+    return jsonify({
+        "success": True,
+        "total": result["total"],
+        "feedbacks": items,
+        "next_cursor": encode_cursor({"timestamp": next_key[0], "id": next_key[1]} if next_key else None)
+    })
+
+# ================= ADMIN JOBS =================
+# Background admin jobs: job_id -> status dict (polled by the admin UI)
+admin_jobs = {}
+admin_jobs_lock = threading.Lock()
+
+def update_job(job_id, **fields):
+    if not job_id:
+        return
+    with admin_jobs_lock:
+        admin_jobs[job_id].update(fields)
+
+def start_job(kind, target, *args, **fields):
+    job_id = str(uuid.uuid4())
+    with admin_jobs_lock:
+        admin_jobs[job_id] = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "running",
+            "started": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "finished": None,
+            **fields
+        }
+
+    threading.Thread(target=target, args=(*args, job_id), daemon=True).start()
+    return job_id
+
+def finish_job(job_id, **fields):
+    update_job(
+        job_id,
+        status="done",
+        finished=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **fields
+    )
+
+@app.route("/admin/jobs/<job_id>")
+def job_status(job_id):
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    with admin_jobs_lock:
+        job = admin_jobs.get(job_id)
+        job = dict(job) if job else None
+
+    if not job:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+
+    return jsonify({"success": True, **job})
+
+# ================= ADMIN SENTIMENT RESCORE =================
+# Worker processes for admin-triggered rescoring. Spawned workers re-import
+# the main module, so the web job scores in-thread unless this is raised;
+# the rescore.py CLI uses a process pool by default.
+RESCORE_PROCESSES = int(os.getenv("CINEMAPULSE_RESCORE_PROCESSES", "1"))
+
+def write_rescored_feedbacks(items):
+    store.set_sentiments([(item["id"], item["sentiment"]) for item in items])
+
+def rescore_all_feedbacks(job_id=None):
+    try:
+        result = run_rescore(
+            list_pages(list(feedbacks)),
+            write_rescored_feedbacks,
+            # Every worker rebuilds its counters; this also refreshes every
+            # user's history, which may show new labels
+            lambda aggregates: store.announce("analytics_rebuild"),
+            processes=RESCORE_PROCESSES,
+            progress=lambda stats: update_job(job_id, **stats)
+        )
+        finish_job(job_id, **result)
+    except Exception as e:
+        print("Rescore error:", e)
+        update_job(job_id, status="failed", error=str(e))
+
+@app.route("/admin/sentiment/rescore", methods=["POST"])
+def rescore_sentiment():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    job_id = start_job("rescore", rescore_all_feedbacks, scanned=0, changed=0)
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for("job_status", job_id=job_id)
+    }), 202
+
+# ================= ADMIN COMMENT REINDEX =================
+def reindex_comments(job_id=None):
+    try:
+        with comment_index_lock:
+            comment_index.rebuild(feedbacks)
+            comment_index_state["built"] = True
+        finish_job(job_id, **comment_index.stats())
+    except Exception as e:
+        print("Comment reindex error:", e)
+        update_job(job_id, status="failed", error=str(e))
+
+@app.route("/admin/feedback/reindex", methods=["POST"])
+def reindex_feedback_comments():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    job_id = start_job("reindex_comments", reindex_comments)
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for("job_status", job_id=job_id)
+    }), 202
+
+# ================= ADMIN BULK IMPORT =================
+# Worker processes scoring imported reviews (see RESCORE_PROCESSES)
+IMPORT_PROCESSES = int(os.getenv("CINEMAPULSE_IMPORT_PROCESSES", "1"))
+
+def finish_bulk_import(aggregates):
+    # Every worker rebuilds its counters and indexes from the tables once
+    store.announce("bulk_import")
+
+def run_bulk_import(movies_path=None, reviews_path=None, processes=IMPORT_PROCESSES,
+                    chunk_size=CHUNK_SIZE, progress=None):
+    result = run_import(
+        read_rows(movies_path) if movies_path else None,
+        read_rows(reviews_path) if reviews_path else None,
+        list(movies.values()),
+        store.put_movies,
+        store.add_feedbacks,
+        finish_bulk_import,
+        processes=processes,
+        chunk_size=chunk_size,
+        progress=progress
+    )
+    # One notification for the whole import instead of one per row
+    send_email_notification(
+        "Bulk Import Finished",
+        f"Imported {result['movies']} movies and {result['reviews']} reviews "
+        f"({result['rejected']} rows rejected) in {result['seconds']}s"
+    )
+    return result
+
+def bulk_import_job(movies_path, reviews_path, job_id=None):
+    try:
+        result = run_bulk_import(
+            movies_path, reviews_path, progress=lambda stats: update_job(job_id, **stats)
+        )
+        finish_job(job_id, **result)
+    except Exception as e:
+        print("Bulk import error:", e)
+        update_job(job_id, status="failed", error=str(e))
+    finally:
+        for path in (movies_path, reviews_path):
+            if path:
+                os.remove(path)
+
+@app.route("/admin/import", methods=["POST"])
+def bulk_import():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    uploads = {name: request.files.get(name) for name in ("movies", "reviews")}
+    if not any(uploads.values()):
+        return jsonify({"success": False, "message": "Upload a movies and/or reviews file"}), 400
+
+    paths = {}
+    try:
+        for name, upload in uploads.items():
+            if upload:
+                paths[name] = spool_upload(upload.stream, upload.filename)
+    except ValueError as e:
+        for path in paths.values():
+            os.remove(path)
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    job_id = start_job(
+        "import", bulk_import_job, paths.get("movies"), paths.get("reviews"),
+        movies=0, reviews=0, skipped=0, rejected=0
+    )
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for("job_status", job_id=job_id)
+    }), 202
+
+# ================= ADMIN EXPORT =================
+def analytics_rows():
+    now = time.time()
+    for movie_id in list(movies_by_id):
+        yield {
+            "movie_id": movie_id,
+            **current_analytics(movie_id, now),
+            **movie_aggregates.get(movie_id, empty_aggregate())
+        }
+
+def export_rows(dataset, columns, since=None):
+    """Rows of one dataset for export.py, which projects them to ``columns``."""
+    if dataset == "feedbacks":
+        return store.iter_feedbacks(since)
+    if dataset == "movies":
+        return list(movies.values())
+    return since_filter(analytics_rows(), "last_updated", since)
+
+@app.route("/admin/export/<dataset>")
+def export_data(dataset):
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    try:
+        dataset, fmt, columns, since = parse_export_args(
+            dataset, request.args.get("format"), request.args.get("columns"), request.args.get("since")
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    # Streamed as it is encoded (chunked transfer), never built in memory
+    return app.response_class(
+        stream_export(export_rows(dataset, columns, since), dataset, fmt, columns),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(dataset, fmt, since)}"'}
+    )
+
+# ================= ADMIN NOTIFICATION METRICS =================
+@app.route("/admin/notifications/stats")
+def notification_stats():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    return jsonify({"success": True, "email": email_outbox.stats()})
+
+# ================= ADMIN CACHE METRICS =================
+@app.route("/admin/cache/stats")
+def cache_stats():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    return jsonify({
+        "success": True,
+        "user_summaries": user_summaries.stats(),
+        "movie_cards": movie_cards.stats(),
+        "comment_index": comment_index.stats(),
+        "storage": store.stats()
+    })
+
+# ================= ADMIN ANALYTICS REPAIR =================
+@app.route("/admin/analytics/rebuild", methods=["POST"])
+def rebuild_analytics():
+    if not session.get("admin_logged_in"):
+        return redirect(url_for("admin_login"))
+
+    store.announce("analytics_rebuild")
 
     return redirect(url_for("admin_dashboard"))
 
@@ -1,10 +1,44 @@
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from markupsafe import Markup
 import uuid
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
+import os
 import boto3
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
+from analytics import (
+    AGGREGATE_FIELDS, SENTIMENT_FIELDS, TREND_BUCKETS, TREND_RECENT_HOURS, aggregate_delta, aggregate_feedbacks,
+    aggregate_from_item, analytics_from_aggregate, average_rating,
+    buckets_from_feedbacks, bump_velocity, empty_aggregate, empty_bucket, feedback_time,
+    hourly_series, sentiment_score, trend_hour, trend_slot, window_aggregate, window_trend
+)
+from leaderboard import LEADERBOARD_LIMIT, LEADERBOARD_METRICS, Leaderboard
+from search_index import SEARCH_LIMIT, MovieSearchIndex
+from comment_index import COMMENT_SEARCH_LIMIT, CommentIndex, highlight
+from notifications import NotificationOutbox
+from catalog_cache import CatalogCache, make_version_stamp
+from background_refresh import BackgroundRefresh
+from http_cache import DataVersion, HttpCache
+from instrumentation import Instrumentation, instrument_boto3, phase, submit
+from view_cache import (
+    FAVORITE_SLOT, ViewModelCache, fill_fragment, fragment_size, split_fragment
+)
+from sentiment import sentiment_engine
+from rescore import run_rescore, dynamo_pages
+from bulk_import import CHUNK_SIZE, read_rows, run_import, spool_upload
+from export import FORMATS as EXPORT_FORMATS, export_filename, parse_export_args, stream_export
+from dynamo_utils import (
+    scan_all, parallel_scan, iter_scan_pages, query_index, query_page, iter_query_pages,
+    count_index, batch_get, batch_delete
+)
+from pagination import (
+    FEEDBACK_PAGE_SIZE, MAX_PAGE_SIZE, MOVIES_PAGE_SIZE, encode_cursor, page_after, page_args
+)
 
 app = Flask(__name__)
 app.secret_key = "palak_cinemaPulse_secret_key"
@@ -23,17 +57,121 @@ movies_table = dynamodb.Table("CinemaPulse-Movies")
 feedbacks_table = dynamodb.Table("CinemaPulse-Feedbacks")
 analytics_table = dynamodb.Table("CinemaPulse-Analytics")
 
+# Feedback GSIs (see create_tables.py), both sorted by timestamp
+FEEDBACK_MOVIE_INDEX = "movie_id-timestamp"
+FEEDBACK_USER_INDEX = "user_email-timestamp"
+# Attributes of a movie_id-timestamp LastEvaluatedKey (table key + index keys)
+FEEDBACK_CURSOR_FIELDS = {"id", "movie_id", "timestamp"}
+
+# Segments used for parallel scans (admin dashboard totals)
+SCAN_SEGMENTS = int(os.getenv("CINEMAPULSE_SCAN_SEGMENTS", "4"))
+
+# Sentiment re-scoring job: resumable checkpoint file, worker processes
+RESCORE_CHECKPOINT = os.getenv("CINEMAPULSE_RESCORE_CHECKPOINT", "rescore.ckpt")
+# Worker processes for admin-triggered rescoring. Spawned workers re-import
+# the main module, so the web job scores in-thread unless this is raised;
+# the rescore.py CLI uses a process pool by default.
+RESCORE_PROCESSES = int(os.getenv("CINEMAPULSE_RESCORE_PROCESSES", "1"))
+
+# Worker processes scoring bulk-imported reviews (as for rescoring)
+IMPORT_PROCESSES = int(os.getenv("CINEMAPULSE_IMPORT_PROCESSES", "1"))
+
+# Items per scan page read by exports (one page is held at a time)
+EXPORT_PAGE_SIZE = 1000
+
+# Cascade deletes: ids fetched per query page, batch_writer threads
+CASCADE_PAGE_SIZE = 500
+CASCADE_WORKERS = int(os.getenv("CINEMAPULSE_CASCADE_WORKERS", "4"))
+
+# Movie catalog cache: seconds before a full reload, and an optional shared
+# version stamp (a file path or redis:// URL) so every gunicorn worker sees
+# admin edits within CATALOG_CHECK_INTERVAL seconds
+CATALOG_TTL = float(os.getenv("CINEMAPULSE_CATALOG_TTL", "300"))
+CATALOG_STAMP = os.getenv("CINEMAPULSE_CATALOG_STAMP")
+CATALOG_CHECK_INTERVAL = float(os.getenv("CINEMAPULSE_CATALOG_CHECK_INTERVAL", "1"))
+
+# Rendered movie-card fragments: max entries and max cached HTML bytes
+MOVIE_CARD_CACHE_SIZE = int(os.getenv("CINEMAPULSE_CARD_CACHE_SIZE", "2000"))
+MOVIE_CARD_CACHE_BYTES = int(os.getenv("CINEMAPULSE_CARD_CACHE_BYTES", str(8 * 1024 * 1024)))
+
+# Leaderboard: review velocity half-life, and seconds between background
+# rebuilds of the local index from the analytics table (other workers' writes)
+VELOCITY_HALF_LIFE = float(os.getenv("CINEMAPULSE_VELOCITY_HALF_LIFE_HOURS", "24")) * 3600
+LEADERBOARD_TTL = float(os.getenv("CINEMAPULSE_LEADERBOARD_TTL", "30"))
+
+# Comment search: seconds between background rebuilds of the local index
+# from a scan of the Feedbacks table (other workers' reviews)
+COMMENT_INDEX_TTL = float(os.getenv("CINEMAPULSE_COMMENT_INDEX_TTL", "300"))
+
+# Data version behind the dashboard / API ETags: share it between workers
+# (a file path or redis:// URL) or each worker only sees its own writes
+DATA_VERSION_STAMP = os.getenv("CINEMAPULSE_DATA_VERSION_STAMP")
+
+# Sampling profiler: requests slower than PROFILE_SLOW_MS (0 = off) have
+# their stacks sampled every PROFILE_INTERVAL_MS written to PROFILE_DIR as
+# folded stacks for flamegraphs
+PROFILE_SLOW_MS = float(os.getenv("CINEMAPULSE_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("CINEMAPULSE_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("CINEMAPULSE_PROFILE_DIR", "profiles")
+# Bearer token /metrics asks for (unset: open to the scraper)
+METRICS_TOKEN = os.getenv("CINEMAPULSE_METRICS_TOKEN")
+
+# ================= INSTRUMENTATION =================
+# Every DynamoDB and SNS call is timed and counted against the request
+# making it; /metrics serves the per-route histograms
+instrument_boto3(dynamodb.meta.client, "dynamodb")
+instrument_boto3(sns, "sns")
+instrumentation = Instrumentation(
+    app,
+    token=METRICS_TOKEN,
+    profile_threshold=PROFILE_SLOW_MS / 1000,
+    profile_interval=PROFILE_INTERVAL_MS / 1000,
+    profile_dir=PROFILE_DIR
+)
+
+# ================= HTTP CACHING =================
+data_version = DataVersion(make_version_stamp(DATA_VERSION_STAMP, "cinemapulse:data:version"))
+http_cache = HttpCache(app, data_version)
+
 # ================= SNS NOTIFICATION =================
+# PublishBatch accepts at most 10 entries per call
+SNS_BATCH_LIMIT = 10
+
+def publish_sns_batch(batch):
+    for start in range(0, len(batch), SNS_BATCH_LIMIT):
+        chunk = batch[start:start + SNS_BATCH_LIMIT]
+        try:
+            res = sns.publish_batch(
+                TopicArn=SNS_TOPIC_ARN,
+                PublishBatchRequestEntries=[
+                    {"Id": str(i), "Subject": item["subject"][:100], "Message": item["message"]}
+                    for i, item in enumerate(chunk)
+                ]
+            )
+        except ClientError as e:
+            print("SNS Error:", e)
+            raise
+
+        for entry in res.get("Successful", []):
+            chunk[int(entry["Id"])]["sent"] = True
+            print(f"[SNS SENT] {chunk[int(entry['Id'])]['subject']}")
+
+        if res.get("Failed"):
+            raise RuntimeError(f"SNS publish_batch failed for {len(res['Failed'])} message(s)")
+
+# Notifications are queued and published by background workers
+sns_outbox = NotificationOutbox(
+    publish_sns_batch,
+    name="sns",
+    maxsize=int(os.getenv("NOTIFY_QUEUE_SIZE", "1000")),
+    workers=int(os.getenv("NOTIFY_WORKERS", "2")),
+    digest_subjects=("User Login", "Admin Login"),
+    digest_window=float(os.getenv("NOTIFY_DIGEST_SECONDS", "60"))
+).start()
+atexit.register(sns_outbox.stop)
+
 def send_notification(subject, message):
-    try:
-        sns.publish(
-            TopicArn=SNS_TOPIC_ARN,
-            Subject=subject,
-            Message=message
-        )
-        print(f"[SNS SENT] {subject}")
-    except ClientError as e:
-        print("SNS Error:", e)
+    sns_outbox.submit(subject, message)
 
 # ================= HELPERS =================
 def is_logged_in():
@@ -48,88 +186,601 @@ def default_analytics_payload(movie_id=""):
         "last_updated": None
     }
 
-def get_feedbacks_for_movie(movie_id):
-    res = feedbacks_table.scan()
-    items = res.get("Items", [])
-    return [f for f in items if f["movie_id"] == movie_id]
-
-def get_feedbacks_for_user(user_email):
-    res = feedbacks_table.scan()
-    items = res.get("Items", [])
-    return [f for f in items if f["user_email"] == user_email]
+def get_feedbacks_for_movie(movie_id, limit=None, attributes=None):
+    # Newest first, reading only this movie's items
+    return query_index(
+        feedbacks_table, FEEDBACK_MOVIE_INDEX, Key("movie_id").eq(movie_id),
+        limit=limit, attributes=attributes
+    )
 
-# ================= SIMPLE SENTIMENT =================
-def simple_sentiment_analysis(comment):
-    positive_words = ["amazing", "great", "excellent", "masterpiece", "good", "love"]
-    negative_words = ["bad", "boring", "waste", "poor", "predictable"]
+def get_feedbacks_for_user(user_email, limit=None):
+    return query_index(
+        feedbacks_table, FEEDBACK_USER_INDEX, Key("user_email").eq(user_email),
+        limit=limit
+    )
 
-    text = comment.lower()
-    score = 0
+# Analytics attributes the dashboards show; the trend buckets are read to
+# work out the current trend and then dropped
+ANALYTICS_VIEW_FIELDS = [
+    "movie_id", "score", "breakdown", "trend", "last_updated", "trend_buckets", *AGGREGATE_FIELDS
+]
 
-    for w in positive_words:
-        if w in text:
-            score += 1
-    for w in negative_words:
-        if w in text:
-            score -= 1
+def get_analytics_for_movies(movie_ids, now=None):
+    """movie_id -> analytics item, fetched with batched BatchGetItem calls.
+
+    The stored trend is only rewritten when a review comes in, so it is
+    recomputed from the hourly buckets at ``now``: a movie that stops
+    getting reviews drifts back to Stable.
+    """
+    now = time.time() if now is None else now
+    items = batch_get(
+        dynamodb,
+        analytics_table.name,
+        [{"movie_id": movie_id} for movie_id in movie_ids],
+        ANALYTICS_VIEW_FIELDS
+    )
+    analytics = {}
+    for item in items:
+        buckets = item.pop("trend_buckets", None)
+        if buckets is not None and int(item.get("review_count", 0)):
+            item["trend"] = window_trend(aggregate_from_item(item), buckets, now)
+        analytics[item["movie_id"]] = item
+    return analytics
+
+def movie_rating(movie, analytics):
+    """Current average rating, from the analytics counters when present.
+
+    Cached catalog entries are not reloaded on every review, so the rating
+    shown on dashboards comes from the freshly read analytics row.
+    """
+    if "review_count" in analytics:
+        return Decimal(str(average_rating(aggregate_from_item(analytics))))
+    return movie.get("rating", 0.0)
+
+def feedback_json(feedback):
+    return {**feedback, "rating": int(feedback["rating"])}
+
+# ================= MOVIE CATALOG CACHE =================
+movie_catalog = CatalogCache(
+    lambda: scan_all(movies_table),
+    ttl=CATALOG_TTL,
+    stamp=make_version_stamp(CATALOG_STAMP),
+    check_interval=CATALOG_CHECK_INTERVAL
+)
+
+def movies_page():
+    """Current page of the movie grid (?cursor=) plus paging info for templates.
+
+    The cursor is the movie's table key, i.e. a Movies ExclusiveStartKey;
+    pages are cut from the cached catalog, which holds the scan order.
+    """
+    try:
+        start_key, limit = page_args(request.args, MOVIES_PAGE_SIZE)
+    except ValueError:
+        start_key, limit = None, MOVIES_PAGE_SIZE
+
+    catalog, positions = movie_catalog.movies_with_positions()
+    page_movies, last_key = page_after(catalog, start_key, limit, positions=positions)
+    return page_movies, {
+        "cursor": request.args.get("cursor") if start_key else None,
+        "next_cursor": encode_cursor(last_key)
+    }
 
-    if score > 0:
-        return "Positive"
-    elif score < 0:
-        return "Negative"
-    return "Neutral"
+# ================= LEADERBOARD =================
+# Top movies by score / rating / velocity. Local writes (reviews, catalog
+# edits) update it in place; a background thread rebuilds it from the
+# analytics counters (one small row per movie) every LEADERBOARD_TTL
+# seconds to pick up other workers' writes.
+leaderboard = Leaderboard(VELOCITY_HALF_LIFE)
 
-# ================= MOVIE ANALYTICS LOGIC =================
-def update_movie_analytics(movie_id):
-    feedbacks = get_feedbacks_for_movie(movie_id)
+def update_leaderboard(movie_id, score, aggregate, velocity):
+    movie = movie_catalog.get(movie_id)
+    if movie:
+        leaderboard.update(movie, score, average_rating(aggregate), aggregate["review_count"], *velocity)
+
+def load_leaderboard():
+    counters = {
+        a["movie_id"]: a
+        for a in parallel_scan(
+            analytics_table, SCAN_SEGMENTS,
+            ["movie_id", "score", "review_count", "rating_sum", "velocity", "velocity_at"]
+        )
+    }
+    entries = []
+    for movie in movie_catalog.movies():
+        item = counters.get(movie["id"], {})
+        aggregate = aggregate_from_item(item)
+        entries.append((
+            movie, item.get("score", 0), average_rating(aggregate), aggregate["review_count"],
+            item.get("velocity", 0), item.get("velocity_at", 0)
+        ))
+    leaderboard.replace(entries)
+
+leaderboard_refresh = BackgroundRefresh(load_leaderboard, LEADERBOARD_TTL, name="leaderboard")
+atexit.register(leaderboard_refresh.stop)
+
+def current_leaderboard():
+    leaderboard_refresh.ensure()
+    return leaderboard
+
+# ================= MOVIE SEARCH =================
+# Inverted index over the cached catalog; re-indexed whenever the catalog
+# reloads (TTL, or an edit from any worker)
+movie_search = MovieSearchIndex()
+movie_search_lock = threading.Lock()
+movie_search_state = {"generation": None}
+
+def current_movie_search():
+    generation = movie_catalog.generation
+    with movie_search_lock:
+        if movie_search_state["generation"] != generation:
+            movie_search.replace(movie_catalog.movies())
+            movie_search_state["generation"] = generation
+    return movie_search
+
+def movie_json(movie):
+    return {**movie, "rating": float(movie.get("rating") or 0)}
+
+# ================= COMMENT SEARCH =================
+# Inverted index over review comments, for moderation. Built by the first
+# search from a projected scan, then kept current by this worker's writes
+# and rebuilt by a background thread every COMMENT_INDEX_TTL seconds.
+COMMENT_INDEX_FIELDS = ["id", "movie_id", "timestamp", "comment"]
+
+comment_index = CommentIndex()
+# One rebuild at a time (background refresh, reindex job, bulk import)
+comment_index_lock = threading.Lock()
+
+def load_comment_index():
+    with comment_index_lock:
+        comment_index.rebuild(parallel_scan(feedbacks_table, SCAN_SEGMENTS, COMMENT_INDEX_FIELDS))
+
+comment_index_refresh = BackgroundRefresh(load_comment_index, COMMENT_INDEX_TTL, name="comment-index")
+atexit.register(comment_index_refresh.stop)
+
+def current_comment_index():
+    comment_index_refresh.ensure()
+    return comment_index
+
+# ================= USER DASHBOARD SUMMARIES =================
+# Materialized per-user dashboard data (stats, favorite ids, recent history
+# with movie names). Entries are versioned by the user row's
+# dashboard_version counter, bumped on that user's feedback and favorite
+# writes (so every worker sees it with the GetItem it already does), and by
+# the catalog generation.
+user_summaries = ViewModelCache("user_summaries")
+
+# Reviews shown under "My Recent Reviews"
+DASHBOARD_HISTORY_SIZE = 5
+
+def touch_user_dashboard(email):
+    users_table.update_item(
+        Key={"email": email},
+        UpdateExpression="ADD dashboard_version :one",
+        ConditionExpression="attribute_exists(email)",
+        ExpressionAttributeValues={":one": 1}
+    )
 
-    if not feedbacks:
-        analytics_table.put_item(Item=default_analytics_payload(movie_id))
-        return
+def build_user_summary(email, user):
+    favorites = user.get("favorites", set())
 
-    positive = sum(1 for f in feedbacks if f["sentiment"] == "Positive")
-    neutral = sum(1 for f in feedbacks if f["sentiment"] == "Neutral")
-    negative = sum(1 for f in feedbacks if f["sentiment"] == "Negative")
-    total = len(feedbacks)
+    history = []
+    for fb in get_feedbacks_for_user(email, limit=DASHBOARD_HISTORY_SIZE):
+        movie = movie_catalog.get(fb["movie_id"])
+        history.append({**fb, "movie_name": movie["name"] if movie else "Unknown"})
 
-    score = int((positive * 100 + neutral * 50 + negative * 10) / total)
+    return {
+        "favorite_ids": frozenset(favorites),
+        "favorites": sorted(
+            (m for m in map(movie_catalog.get, favorites) if m), key=lambda m: m["name"]
+        ),
+        "history": history,
+        "stats": {
+            "total_movies": len(movie_catalog.movies()),
+            "total_reviews": count_index(
+                feedbacks_table, FEEDBACK_USER_INDEX, Key("user_email").eq(email)
+            ),
+            "total_favorites": len(favorites)
+        }
+    }
 
-    if score > 75:
-        trend = "Trending Up"
-    elif score > 50:
-        trend = "Stable"
-    else:
-        trend = "Trending Down"
+# ================= MOVIE CARD FRAGMENTS =================
+# Rendered user-dashboard cards, shared by every user; the favorite heart is
+# filled in per request. The version comes from the analytics row read for
+# the page anyway, so edits made through other workers are picked up too.
+movie_cards = ViewModelCache(
+    "movie_cards",
+    maxsize=MOVIE_CARD_CACHE_SIZE,
+    weigh=fragment_size,
+    max_weight=MOVIE_CARD_CACHE_BYTES
+)
+
+def movie_card_version(movie, analytics):
+    return (
+        tuple(aggregate_from_item(analytics).values()),
+        analytics.get("score"), analytics.get("trend"),
+        movie["name"], movie["genre"], movie["language"], movie["image"]
+    )
 
+def render_movie_card(movie, analytics):
+    avg_rating = movie_rating(movie, analytics)
     payload = {
-        "movie_id": movie_id,
-        "score": score,
-        "breakdown": {
-            "positive": int((positive / total) * 100),
-            "neutral": int((neutral / total) * 100),
-            "negative": int((negative / total) * 100)
-        },
-        "trend": trend,
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M")
+        **movie,
+        "rating": avg_rating,
+        "avg_rating": avg_rating,
+        "review_count": int(analytics.get("review_count", 0)),
+        "analytics": analytics
     }
+    html = render_template("_movie_card.html", movie=payload, favorite_class=FAVORITE_SLOT)
+    return split_fragment(html)
+
+def movie_card(movie, analytics, is_favorite):
+    """Card HTML from the fragment cache, with this user's favorite state."""
+    parts = movie_cards.get(
+        movie["id"], movie_card_version(movie, analytics),
+        lambda: render_movie_card(movie, analytics)
+    )
+    return Markup(fill_fragment(parts, "fas" if is_favorite else "far"))
 
-    analytics_table.put_item(Item=payload)
+def get_user_summary(email, user):
+    return user_summaries.get(
+        email,
+        (int(user.get("dashboard_version", 0)), movie_catalog.generation),
+        lambda: build_user_summary(email, user)
+    )
 
-# ================= MOVIE RATING LOGIC =================
-def update_movie_rating(movie_id):
-    feedbacks = get_feedbacks_for_movie(movie_id)
+# ================= SIMPLE SENTIMENT =================
+def simple_sentiment_analysis(comment):
+    return sentiment_engine.score(comment)
 
-    if not feedbacks:
-        new_rating = Decimal("0.0")
-    else:
-        new_rating = Decimal(str(round(sum(float(f["rating"]) for f in feedbacks) / len(feedbacks), 1)))
+# ================= MOVIE ANALYTICS LOGIC =================
+def update_movie_analytics(movie_id, aggregate, velocity=None, buckets=None):
+    analytics = analytics_from_aggregate(aggregate, buckets, time.time())
+
+    expression = "SET score = :s, breakdown = :b, trend = :t, last_updated = :u"
+    values = {
+        ":s": analytics["score"],
+        ":b": analytics["breakdown"],
+        ":t": analytics["trend"],
+        ":u": analytics["last_updated"]
+    }
+    if velocity:
+        expression += ", velocity = :vel, velocity_at = :vat"
+        values[":vel"] = Decimal(str(round(velocity[0], 6)))
+        values[":vat"] = Decimal(str(round(velocity[1], 3)))
+
+    analytics_table.update_item(
+        Key={"movie_id": movie_id},
+        UpdateExpression=expression,
+        ExpressionAttributeValues=values
+    )
+    return analytics
 
+# ================= MOVIE RATING LOGIC =================
+def update_movie_rating(movie_id, aggregate):
     movies_table.update_item(
         Key={"id": movie_id},
         UpdateExpression="SET rating = :r",
-        ExpressionAttributeValues={":r": new_rating}
+        ConditionExpression="attribute_exists(id)",
+        ExpressionAttributeValues={":r": Decimal(str(average_rating(aggregate)))}
+    )
+
+# ================= RUNNING AGGREGATES =================
+def add_feedback_counters(movie_id, delta, hour=None):
+    """ADD ``delta`` to the movie's counters and, when ``hour`` is given, to
+    that hour's trend bucket -> the updated analytics row.
+
+    The bucket is only touched while its ring slot still holds ``hour``
+    (ConditionalCheckFailed otherwise).
+    """
+    names = {f"#f{i}": field for i, field in enumerate(delta)}
+    values = {f":v{i}": value for i, value in enumerate(delta.values())}
+    expression = "ADD " + ", ".join(f"{n} {v}" for n, v in zip(names, values))
+
+    kwargs = {}
+    if hour is not None:
+        expression += " SET " + ", ".join(
+            f"#tb.#s.{n} = #tb.#s.{n} + {v}" for n, v in zip(names, values)
+        )
+        kwargs["ConditionExpression"] = "#tb.#s.#h = :hour"
+        names = {**names, "#tb": "trend_buckets", "#s": trend_slot(hour), "#h": "hour"}
+        values = {**values, ":hour": hour}
+
+    res = analytics_table.update_item(
+        Key={"movie_id": movie_id},
+        UpdateExpression=expression,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+        ReturnValues="ALL_NEW",
+        **kwargs
+    )
+    return res["Attributes"]
+
+def roll_trend_bucket(movie_id, hour):
+    """Start ``hour``'s bucket, replacing the older hour in its ring slot."""
+    names = {"#tb": "trend_buckets", "#s": trend_slot(hour), "#h": "hour"}
+    for attempt in range(2):
+        try:
+            analytics_table.update_item(
+                Key={"movie_id": movie_id},
+                UpdateExpression="SET #tb.#s = :bucket",
+                ConditionExpression="attribute_not_exists(#tb.#s) OR #tb.#s.#h < :hour",
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues={":bucket": empty_bucket(hour), ":hour": hour}
+            )
+            return
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            # Already started by a concurrent review (or holds a newer hour)
+            if code == "ConditionalCheckFailedException":
+                return
+            if attempt or code != "ValidationException":
+                raise
+        # Rows created before trend buckets have no map to put the slot in
+        analytics_table.update_item(
+            Key={"movie_id": movie_id},
+            UpdateExpression="SET #tb = if_not_exists(#tb, :empty)",
+            ExpressionAttributeNames={"#tb": "trend_buckets"},
+            ExpressionAttributeValues={":empty": {}}
+        )
+
+def record_feedback(feedback, sign=1):
+    """Apply one feedback add (sign=1) or delete (sign=-1) atomically.
+
+    The counters and the current hour's trend bucket are bumped with a
+    single update, so the cost stays constant no matter how many reviews
+    the movie already has. The first review of an hour first starts that
+    hour's bucket (one extra call).
+    """
+    movie_id = feedback["movie_id"]
+    delta = aggregate_delta(feedback, sign)
+
+    # A delete comes out of the bucket of the hour it was written in
+    now = time.time()
+    hour = trend_hour(now if sign > 0 else feedback_time(feedback))
+    in_ring = trend_hour(now) - hour < TREND_BUCKETS
+
+    try:
+        attributes = add_feedback_counters(movie_id, delta, hour if in_ring else None)
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("ConditionalCheckFailedException", "ValidationException"):
+            raise
+        attributes = None
+
+    if attributes is None and sign > 0:
+        roll_trend_bucket(movie_id, hour)
+        try:
+            attributes = add_feedback_counters(movie_id, delta, hour)
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("ConditionalCheckFailedException", "ValidationException"):
+                raise
+
+    if attributes is None:
+        # The bucket is gone (rolled past): only the lifetime counters change
+        attributes = add_feedback_counters(movie_id, delta)
+
+    aggregate = aggregate_from_item(attributes)
+
+    # Velocity is read-modify-write: two reviews of one movie landing at
+    # the same instant may count once, which is fine for a trend signal
+    velocity = None
+    if sign > 0:
+        now = time.time()
+        velocity = (
+            bump_velocity(attributes.get("velocity"), attributes.get("velocity_at", now), now, VELOCITY_HALF_LIFE),
+            now
+        )
+
+    analytics = update_movie_analytics(movie_id, aggregate, velocity, attributes.get("trend_buckets", {}))
+    try:
+        update_movie_rating(movie_id, aggregate)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+    update_leaderboard(
+        movie_id, analytics["score"], aggregate,
+        velocity or (attributes.get("velocity", 0), attributes.get("velocity_at", 0))
+    )
+    return aggregate
+
+
+def write_movie_aggregate(movie_id, aggregate, buckets=None, write_buckets=False):
+    """Overwrite a movie's counters, derived analytics and rating.
+
+    The trend is derived from ``buckets``; they are only stored with
+    ``write_buckets`` (rebuilt from the feedbacks themselves).
+    """
+    # SET rather than PutItem, so the review velocity survives a rebuild
+    fields = {**analytics_from_aggregate(aggregate, buckets, time.time()), **aggregate}
+    if write_buckets:
+        fields["trend_buckets"] = buckets
+    names = {f"#f{i}": field for i, field in enumerate(fields)}
+    values = {f":v{i}": value for i, value in enumerate(fields.values())}
+    analytics_table.update_item(
+        Key={"movie_id": movie_id},
+        UpdateExpression="SET " + ", ".join(f"{n} = {v}" for n, v in zip(names, values)),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values
+    )
+    update_movie_rating(movie_id, aggregate)
+
+def rebuild_movie_aggregate(movie_id):
+    """Repair path: recompute one movie's counters from its feedbacks."""
+    movie_reviews = get_feedbacks_for_movie(movie_id)
+    aggregate = aggregate_feedbacks(movie_reviews)
+    write_movie_aggregate(
+        movie_id, aggregate, buckets_from_feedbacks(movie_reviews, time.time()), write_buckets=True
+    )
+    return aggregate
+
+def write_rescored_sentiments(items):
+    """Write the new labels of a rescored page and move each change between
+    the movie's sentiment counters.
+
+    Only ``sentiment`` is SET, and only on feedbacks that still exist, so
+    reviews deleted during the rescore stay deleted. The label it replaces
+    comes back from the write itself, and the difference is ADDed to the
+    counters (and to the review's trend bucket while its hour is still in
+    the ring), so reviews added or removed meanwhile are never lost.
+    """
+    deltas = {}
+    current_hour = trend_hour(time.time())
+    for item in items:
+        try:
+            res = feedbacks_table.update_item(
+                Key={"id": item["id"]},
+                UpdateExpression="SET sentiment = :s",
+                ConditionExpression="attribute_exists(id)",
+                ExpressionAttributeValues={":s": item["sentiment"]},
+                ReturnValues="ALL_OLD"
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            continue  # deleted meanwhile
+
+        old = res["Attributes"]
+        old_field = SENTIMENT_FIELDS.get(old.get("sentiment"))
+        new_field = SENTIMENT_FIELDS.get(item["sentiment"])
+        if old_field == new_field:
+            continue
+        hour = trend_hour(feedback_time(old))
+        delta = deltas.setdefault((old["movie_id"], hour if current_hour - hour < TREND_BUCKETS else None), {})
+        if old_field:
+            delta[old_field] = delta.get(old_field, 0) - 1
+        if new_field:
+            delta[new_field] = delta.get(new_field, 0) + 1
+
+    touched = {}
+    for (movie_id, hour), delta in deltas.items():
+        delta = {field: value for field, value in delta.items() if value}
+        if not delta:
+            continue
+        attributes = None
+        if hour is not None:
+            try:
+                attributes = add_feedback_counters(movie_id, delta, hour)
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in ("ConditionalCheckFailedException", "ValidationException"):
+                    raise
+        if attributes is None:
+            # The bucket has rolled past: only the lifetime counters move
+            attributes = add_feedback_counters(movie_id, delta)
+        touched[movie_id] = attributes
+
+    for movie_id, attributes in touched.items():
+        aggregate = aggregate_from_item(attributes)
+        analytics = update_movie_analytics(movie_id, aggregate, buckets=attributes.get("trend_buckets", {}))
+        update_leaderboard(
+            movie_id, analytics["score"], aggregate,
+            (attributes.get("velocity", 0), attributes.get("velocity_at", 0))
+        )
+
+def finish_rescore(aggregates):
+    """Counters already moved page by page (write_rescored_sentiments); the
+    totals summed over the scan are stale by the end and are not written."""
+
+def write_feedbacks(items):
+    with feedbacks_table.batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+
+# ================= ADMIN JOBS =================
+# Background admin jobs: job_id -> status dict (polled by the admin UI)
+admin_jobs = {}
+admin_jobs_lock = threading.Lock()
+
+def update_job(job_id, **fields):
+    if not job_id:
+        return
+    with admin_jobs_lock:
+        admin_jobs[job_id].update(fields)
+
+def start_job(kind, target, *args, **fields):
+    """Run ``target(*args, job_id)`` on a daemon thread and track its status."""
+    job_id = str(uuid.uuid4())
+    with admin_jobs_lock:
+        admin_jobs[job_id] = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "running",
+            "started": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "finished": None,
+            **fields
+        }
+
+    threading.Thread(target=target, args=(*args, job_id), daemon=True).start()
+    return job_id
+
+def finish_job(job_id, **fields):
+    update_job(
+        job_id,
+        status="done",
+        finished=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **fields
     )
 
+# ================= MOVIE CASCADE DELETE =================
+def delete_movie_feedbacks(movie_id, job_id=None):
+    """Delete every feedback of a movie; returns the number removed.
+
+    Ids come from the movie_id GSI page by page, and each page is deleted
+    with BatchWriteItem in a thread pool, through the table client (boto3
+    resources are not thread-safe).
+    """
+    deleted = 0
+    with phase("fetch"), ThreadPoolExecutor(max_workers=CASCADE_WORKERS) as pool:
+        futures = []
+        for page in iter_query_pages(
+            feedbacks_table, FEEDBACK_MOVIE_INDEX, Key("movie_id").eq(movie_id),
+            page_size=CASCADE_PAGE_SIZE, attributes=["id"]
+        ):
+            if page:
+                futures.append(submit(
+                    pool, batch_delete, feedbacks_table.meta.client, feedbacks_table.name,
+                    [{"id": f["id"]} for f in page]
+                ))
+
+        for future in futures:
+            deleted += future.result()
+            update_job(job_id, deleted=deleted)
+
+    return deleted
+
+def cascade_delete_movie(movie_id, name, job_id=None):
+    try:
+        deleted = delete_movie_feedbacks(movie_id, job_id)
+
+        # Movie and analytics row go away together
+        client = dynamodb.meta.client
+        client.transact_write_items(TransactItems=[
+            {"Delete": {"TableName": movies_table.name, "Key": {"id": movie_id}}},
+            {"Delete": {"TableName": analytics_table.name, "Key": {"movie_id": movie_id}}}
+        ])
+        movie_catalog.invalidate()
+        movie_cards.invalidate(movie_id)
+        leaderboard.remove(movie_id)
+        comment_index.remove_movie(movie_id)
+        data_version.bump()
+
+        # Sweep feedbacks that were written while the cascade was running
+        stragglers = delete_movie_feedbacks(movie_id, job_id)
+        if stragglers:
+            analytics_table.delete_item(Key={"movie_id": movie_id})
+
+        finish_job(job_id, deleted=deleted + stragglers)
+
+        send_notification(
+            "Movie Deleted",
+            f"Admin deleted movie: {name}"
+        )
+    except Exception as e:
+        print("Cascade delete error:", e)
+        update_job(job_id, status="failed", error=str(e))
+        if not job_id:
+            raise
+
 # ==========================================================
 # ================= RUN ONLY ONCE SECTION ==================
 # ==========================================================
@@ -209,8 +860,7 @@ def register():
             "name": name,
             "password": password,
             "favorite_genre": favorite_genre,
-            "age_group": age_group,
-            "favorites": []
+            "age_group": age_group
         })
 
         send_notification(
@@ -252,36 +902,103 @@ def logout():
 
 
 # ================= FAVORITE TOGGLE =================
+# Favorites are a string set on the user row, changed with ADD / DELETE in
+# a single conditional UpdateItem that also bumps dashboard_version
+FAVORITE_TOGGLE_ATTEMPTS = 3
+
+def update_favorites(email, movie_id, add, only_if_changed=False):
+    """Add or remove one favorite; returns the favorites set afterwards."""
+    action = "ADD favorites :m, dashboard_version :one" if add else \
+        "DELETE favorites :m ADD dashboard_version :one"
+    condition = "attribute_exists(email)"
+    if only_if_changed:
+        condition += " AND NOT contains(favorites, :id)" if add else " AND contains(favorites, :id)"
+
+    values = {":m": {movie_id}, ":one": 1}
+    if only_if_changed:
+        values[":id"] = movie_id
+
+    for attempt in range(2):
+        try:
+            res = users_table.update_item(
+                Key={"email": email},
+                UpdateExpression=action,
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values,
+                # ALL_NEW, not UPDATED_NEW: a DELETE that removes nothing may
+                # not report the set back, and the user row is small
+                ReturnValues="ALL_NEW"
+            )
+            # DELETE of the last id removes the attribute altogether
+            return res["Attributes"].get("favorites", set())
+        except ClientError as e:
+            if attempt or e.response["Error"]["Code"] != "ValidationException":
+                raise
+            # Rows written before favorites became a set hold a list
+            migrate_favorites(email)
+
+def flip_favorite(email, movie_id):
+    """Toggle without knowing the current state (older clients).
+
+    Tries ADD-if-absent, then DELETE-if-present; each is conditional, so a
+    concurrent change just sends us round again.
+    """
+    for _ in range(FAVORITE_TOGGLE_ATTEMPTS):
+        for add in (True, False):
+            try:
+                return update_favorites(email, movie_id, add, only_if_changed=True)
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                last_error = e
+    raise last_error
+
+def migrate_favorites(email):
+    user = users_table.get_item(Key={"email": email}, ProjectionExpression="favorites").get("Item", {})
+    favorites = user.get("favorites")
+    if not isinstance(favorites, list):
+        return
+
+    kwargs = {"ConditionExpression": "favorites = :old"}
+    if favorites:
+        kwargs.update(UpdateExpression="SET favorites = :new",
+                      ExpressionAttributeValues={":old": favorites, ":new": set(favorites)})
+    else:
+        # DynamoDB has no empty sets: an absent attribute means no favorites
+        kwargs.update(UpdateExpression="REMOVE favorites",
+                      ExpressionAttributeValues={":old": favorites})
+    try:
+        users_table.update_item(Key={"email": email}, **kwargs)
+    except ClientError as e:
+        # Someone else migrated or changed it first
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
 @app.route("/movie/favorite/toggle/<movie_id>", methods=["POST"])
 def toggle_favorite(movie_id):
     if not is_logged_in():
         return jsonify({"success": False, "message": "Not logged in"}), 401
 
+    # The dashboard sends the state it wants (favorite=1/0): one idempotent
+    # ADD/DELETE, so double clicks and other tabs can't undo each other
+    wanted = request.form.get("favorite")
     email = session["user_email"]
-    res = users_table.get_item(Key={"email": email})
-    user = res.get("Item")
 
-    if not user:
+    try:
+        if wanted in ("1", "0"):
+            favorites = update_favorites(email, movie_id, add=wanted == "1")
+        else:
+            favorites = flip_favorite(email, movie_id)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
         return jsonify({"success": False, "message": "User not found"}), 404
 
-    favorites = user.get("favorites", [])
-
-    if movie_id in favorites:
-        favorites.remove(movie_id)
-        is_favorite = False
-    else:
-        favorites.append(movie_id)
-        is_favorite = True
-
-    users_table.update_item(
-        Key={"email": email},
-        UpdateExpression="SET favorites = :f",
-        ExpressionAttributeValues={":f": favorites}
-    )
+    data_version.bump()
 
     return jsonify({
         "success": True,
-        "is_favorite": is_favorite,
+        "is_favorite": movie_id in favorites,
         "total_favorites": len(favorites)
     })
 
@@ -293,71 +1010,48 @@ def user_dashboard():
         return redirect(url_for("login"))
 
     email = session["user_email"]
+
+    # Nothing changed since the browser's copy: skip every table read
+    now = time.time()
+    etag = http_cache.etag("user_dashboard", email, request.full_path, trend_hour(now))
+    not_modified = http_cache.not_modified(etag)
+    if not_modified:
+        return not_modified
+
     user = users_table.get_item(Key={"email": email}).get("Item")
 
     if not user:
         return redirect(url_for("logout"))
 
-    favorites = user.get("favorites", [])
-
-    # Fetch all movies
-    movies_res = movies_table.scan()
-    movies = movies_res.get("Items", [])
-
-    # Fetch all feedbacks
-    feedbacks_res = feedbacks_table.scan()
-    all_feedbacks = feedbacks_res.get("Items", [])
+    # Cached until this user writes or the catalog changes
+    summary = get_user_summary(email, user)
+    favorites = summary["favorite_ids"]
 
-    # User feedbacks
-    user_feedbacks = [f for f in all_feedbacks if f["user_email"] == email]
+    # One page of movie cards from the catalog cache, rendered from the
+    # fragment cache; reviews are loaded lazily by the dashboard JS
+    movies, page = movies_page()
 
-    movies_payload = []
+    # Analytics for the visible movies only
+    analytics_dict = get_analytics_for_movies([m["id"] for m in movies], now)
 
-    for movie in movies:
-        movie_id = movie["id"]
-
-        movie_feedbacks = sorted(
-            [f for f in all_feedbacks if f["movie_id"] == movie_id],
-            key=lambda fb: fb["timestamp"],
-            reverse=True
+    cards = [
+        movie_card(
+            movie,
+            analytics_dict.get(movie["id"], default_analytics_payload(movie["id"])),
+            movie["id"] in favorites
         )
+        for movie in movies
+    ]
 
-        avg_rating = movie.get("rating", 0.0)
-        if movie_feedbacks:
-            avg_rating = round(sum(fb["rating"] for fb in movie_feedbacks) / len(movie_feedbacks), 1)
-
-        analytics_res = analytics_table.get_item(Key={"movie_id": movie_id})
-        analytics = analytics_res.get("Item", default_analytics_payload(movie_id))
-
-        movies_payload.append({
-            **movie,
-            "avg_rating": avg_rating,
-            "feedbacks": movie_feedbacks,
-            "analytics": analytics,
-            "is_favorite": movie_id in favorites
-        })
-
-    favorite_movies = [m for m in movies_payload if m["is_favorite"]]
-
-    feedback_history = []
-    for fb in sorted(user_feedbacks, key=lambda item: item["timestamp"], reverse=True):
-        movie_name = next((m["name"] for m in movies_payload if m["id"] == fb["movie_id"]), "Unknown")
-        feedback_history.append({**fb, "movie_name": movie_name})
-
-    stats = {
-        "total_movies": len(movies_payload),
-        "total_reviews": len(user_feedbacks),
-        "total_favorites": len(favorites)
-    }
-
-    return render_template(
+    return http_cache.finish(render_template(
         "user_dashboard.html",
         user=user,
-        movies=movies_payload,
-        favorites=favorite_movies,
-        feedback_history=feedback_history,
-        stats=stats
-    )
+        cards=cards,
+        favorites=summary["favorites"],
+        feedback_history=summary["history"],
+        stats=summary["stats"],
+        page=page
+    ), etag)
 
 
 # ================= ADD FEEDBACK =================
@@ -371,30 +1065,30 @@ def add_feedback():
     comment = request.form["comment"]
 
     # Find movie by name
-    movies_res = movies_table.scan()
-    movies = movies_res.get("Items", [])
-
-    movie = next((m for m in movies if m["name"].lower() == movie_name.lower()), None)
+    movie = movie_catalog.by_name(movie_name)
     if not movie:
         return redirect(url_for("user_dashboard"))
 
     sentiment = simple_sentiment_analysis(comment)
 
-    feedback_id = str(uuid.uuid4())
-
-    feedbacks_table.put_item(Item={
-        "id": feedback_id,
+    feedback = {
+        "id": str(uuid.uuid4()),
         "user_email": session["user_email"],
         "movie_id": movie["id"],
         "rating": rating,
         "comment": comment,
         "sentiment": sentiment,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
-    })
+    }
+
+    feedbacks_table.put_item(Item=feedback)
 
     # Update analytics + rating
-    update_movie_analytics(movie["id"])
-    update_movie_rating(movie["id"])
+    record_feedback(feedback)
+    comment_index.add(feedback)
+    touch_user_dashboard(session["user_email"])
+    movie_cards.invalidate(movie["id"])
+    data_version.bump()
 
     send_notification(
         "New Feedback Added",
@@ -409,6 +1103,114 @@ Comment: {comment}
 
     return redirect(url_for("user_dashboard"))
 
+# ================= FEEDBACK API =================
+@app.route("/api/movies/<movie_id>/feedbacks")
+def movie_feedbacks(movie_id):
+    if not is_logged_in() and not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    etag = http_cache.etag("movie_feedbacks", request.full_path)
+    not_modified = http_cache.not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    # The cursor is the GSI's LastEvaluatedKey from the previous page
+    try:
+        start_key, limit = page_args(request.args, FEEDBACK_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+    if start_key and (set(start_key) != FEEDBACK_CURSOR_FIELDS or start_key["movie_id"] != movie_id):
+        return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+    try:
+        items, last_key = query_page(
+            feedbacks_table, FEEDBACK_MOVIE_INDEX, Key("movie_id").eq(movie_id),
+            limit, start_key
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ValidationException":
+            raise
+        return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+    return http_cache.finish(jsonify({
+        "success": True,
+        "feedbacks": [feedback_json(f) for f in items],
+        "next_cursor": encode_cursor(last_key)
+    }), etag)
+
+# ================= LEADERBOARD API =================
+@app.route("/api/leaderboard")
+def leaderboard_api():
+    if not is_logged_in() and not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    by = request.args.get("by", "score")
+    if by not in LEADERBOARD_METRICS:
+        return jsonify({"success": False, "message": f"by must be one of {', '.join(LEADERBOARD_METRICS)}"}), 400
+
+    try:
+        limit = min(max(int(request.args.get("limit", LEADERBOARD_LIMIT)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit"}), 400
+
+    return jsonify({
+        "success": True,
+        "by": by,
+        "movies": current_leaderboard().top(
+            by, request.args.get("genre"), request.args.get("language"), limit
+        )
+    })
+
+# ================= SEARCH API =================
+@app.route("/api/movies/search")
+def search_movies():
+    if not is_logged_in() and not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    try:
+        limit = min(max(int(request.args.get("limit", SEARCH_LIMIT)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit"}), 400
+
+    result = current_movie_search().search(
+        request.args.get("q", ""),
+        request.args.get("genre"),
+        request.args.get("language"),
+        limit
+    )
+    result["movies"] = [movie_json(movie) for movie in result["movies"]]
+    return jsonify({"success": True, **result})
+
+# ================= TREND API =================
+@app.route("/api/movies/<movie_id>/trend")
+def movie_trend(movie_id):
+    if not is_logged_in() and not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    try:
+        hours = min(max(int(request.args.get("hours", TREND_RECENT_HOURS)), 1), TREND_BUCKETS)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid hours"}), 400
+
+    analytics = analytics_table.get_item(Key={"movie_id": movie_id}).get("Item")
+    if not analytics:
+        return jsonify({"success": False, "message": "Movie not found"}), 404
+
+    # Everything below reads the hourly ring: O(buckets), not O(reviews)
+    now = time.time()
+    buckets = analytics.get("trend_buckets", {})
+    window = window_aggregate(buckets, now, hours)
+
+    return jsonify({
+        "success": True,
+        "movie_id": movie_id,
+        "hours": hours,
+        "trend": window_trend(aggregate_from_item(analytics), buckets, now),
+        "window": {**window, "score": sentiment_score(window), "rating": average_rating(window)},
+        "series": hourly_series(buckets, now, hours)
+    })
+
 # ================= ADMIN AUTH =================
 @app.route("/admin/login", methods=["GET", "POST"])
 def admin_login():
@@ -436,18 +1238,26 @@ def admin_dashboard():
     if not session.get("admin_logged_in"):
         return redirect(url_for("admin_login"))
 
-    # Fetch all movies
-    movies_res = movies_table.scan()
-    movies = movies_res.get("Items", [])
+    now = time.time()
+    etag = http_cache.etag("admin_dashboard", request.full_path, trend_hour(now))
+    not_modified = http_cache.not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    # One page of movie cards from the catalog cache
+    movies, page = movies_page()
 
-    # Fetch all feedbacks
-    feedbacks_res = feedbacks_table.scan()
-    feedbacks = feedbacks_res.get("Items", [])
+    # Fetch analytics for the listed movies
+    analytics_dict = get_analytics_for_movies([m["id"] for m in movies], now)
 
-    # Fetch all analytics
-    analytics_res = analytics_table.scan()
-    analytics_items = analytics_res.get("Items", [])
-    analytics_dict = {a["movie_id"]: a for a in analytics_items}
+    # Totals and the genre chart cover the whole catalog: the leaderboard
+    # already holds every movie's review count and rating, kept current by
+    # record_feedback, so no table is scanned per render
+    total_feedbacks, genre_ratings = current_leaderboard().totals()
+    stats = {
+        "total_movies": len(movie_catalog.movies()),
+        "total_feedbacks": total_feedbacks
+    }
 
     movies_with_feedbacks = {}
 
@@ -455,17 +1265,23 @@ def admin_dashboard():
         movie_id = movie["id"]
         key = movie["name"].lower().replace(" ", "_")
 
+        analytics = analytics_dict.get(movie_id, {})
+
         movies_with_feedbacks[key] = {
             **movie,
-            "feedbacks": [f for f in feedbacks if f["movie_id"] == movie_id],
-            "analytics": analytics_dict.get(movie_id, {})
+            "rating": movie_rating(movie, analytics),
+            "review_count": int(analytics.get("review_count", 0)),
+            "analytics": analytics
         }
 
-    return render_template(
+    return http_cache.finish(render_template(
         "admin_dashboard.html",
         movies=movies_with_feedbacks,
-        analytics=analytics_dict
-    )
+        analytics=analytics_dict,
+        stats=stats,
+        genre_ratings=genre_ratings,
+        page=page
+    ), etag)
 
 
 # ================= ADMIN MOVIE CRUD =================
@@ -494,7 +1310,10 @@ def add_movie():
     movies_table.put_item(Item=new_movie)
 
     # Initialize analytics for new movie
-    analytics_table.put_item(Item=default_analytics_payload(movie_id))
+    analytics_table.put_item(Item={**default_analytics_payload(movie_id), "trend_buckets": {}})
+    movie_catalog.invalidate()
+    update_leaderboard(movie_id, 0, empty_aggregate(), (0, 0))
+    data_version.bump()
 
     send_notification(
         "New Movie Added",
@@ -516,16 +1335,13 @@ def update_movie():
     image = request.form["image"]
 
     # Find movie by old name
-    movies_res = movies_table.scan()
-    movies = movies_res.get("Items", [])
-
-    movie = next((m for m in movies if m["name"].lower() == old_name.lower()), None)
+    movie = movie_catalog.by_name(old_name)
 
     if movie:
         movies_table.update_item(
             Key={"id": movie["id"]},
-            UpdateExpression="SET #n = :n, genre = :g, language = :l, image = :i",
-            ExpressionAttributeNames={"#n": "name"},
+            UpdateExpression="SET #n = :n, genre = :g, #l = :l, image = :i",
+            ExpressionAttributeNames={"#n": "name", "#l": "language"},
             ExpressionAttributeValues={
                 ":n": name,
                 ":g": genre,
@@ -534,8 +1350,17 @@ def update_movie():
             }
         )
 
-        # Recalculate rating (based only on feedbacks)
-        update_movie_rating(movie["id"])
+        # Re-derive rating from the running aggregate
+        analytics = analytics_table.get_item(Key={"movie_id": movie["id"]}).get("Item", {})
+        aggregate = aggregate_from_item(analytics)
+        update_movie_rating(movie["id"], aggregate)
+        movie_catalog.invalidate()
+        movie_cards.invalidate(movie["id"])
+        update_leaderboard(
+            movie["id"], analytics.get("score", 0), aggregate,
+            (analytics.get("velocity", 0), analytics.get("velocity_at", 0))
+        )
+        data_version.bump()
 
     return redirect(url_for("admin_dashboard"))
 
@@ -548,32 +1373,39 @@ def delete_movie():
     name = request.form["name"]
 
     # Find movie by name
-    movies_res = movies_table.scan()
-    movies = movies_res.get("Items", [])
-    movie = next((m for m in movies if m["name"].lower() == name.lower()), None)
+    movie = movie_catalog.by_name(name)
 
     if movie:
-        movie_id = movie["id"]
+        # Large cascades can run as a background job the dashboard polls
+        if request.form.get("background"):
+            job_id = start_job(
+                "delete_movie", cascade_delete_movie, movie["id"], name,
+                movie_id=movie["id"], movie=name, deleted=0
+            )
+            return jsonify({
+                "success": True,
+                "job_id": job_id,
+                "status_url": url_for("job_status", job_id=job_id)
+            }), 202
 
-        # Delete movie
-        movies_table.delete_item(Key={"id": movie_id})
+        cascade_delete_movie(movie["id"], name)
 
-        # Delete related analytics
-        analytics_table.delete_item(Key={"movie_id": movie_id})
+    return redirect(url_for("admin_dashboard"))
 
-        # Delete related feedbacks
-        feedbacks_res = feedbacks_table.scan()
-        feedbacks = feedbacks_res.get("Items", [])
-        for f in feedbacks:
-            if f["movie_id"] == movie_id:
-                feedbacks_table.delete_item(Key={"id": f["id"]})
 
-        send_notification(
-            "Movie Deleted",
-            f"Admin deleted movie: {name}"
-        )
+@app.route("/admin/jobs/<job_id>")
+def job_status(job_id):
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
 
-    return redirect(url_for("admin_dashboard"))
+    with admin_jobs_lock:
+        job = admin_jobs.get(job_id)
+        job = dict(job) if job else None
+
+    if not job:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+
+    return jsonify({"success": True, **job})
 
 
 # ================= ADMIN FEEDBACK DELETE =================
@@ -589,14 +1421,293 @@ def delete_feedback():
     feedback = res.get("Item")
 
     if feedback:
-        movie_id = feedback["movie_id"]
-
         # Delete feedback
-        feedbacks_table.delete_item(Key={"id": feedback_id})
+        res = feedbacks_table.delete_item(Key={"id": feedback_id}, ReturnValues="ALL_OLD")
+
+        # Update analytics and rating (skip if a concurrent delete won);
+        # the deleted item, not the earlier read, carries the current label
+        if "Attributes" in res:
+            feedback = res["Attributes"]
+            record_feedback(feedback, sign=-1)
+            comment_index.remove(feedback)
+            movie_cards.invalidate(feedback["movie_id"])
+            data_version.bump()
+            try:
+                touch_user_dashboard(feedback["user_email"])
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+    return redirect(url_for("admin_dashboard"))
+
+
+# ================= ADMIN COMMENT SEARCH =================
+@app.route("/admin/feedback/search")
+def search_feedback_comments():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    try:
+        start_key, limit = page_args(request.args, COMMENT_SEARCH_LIMIT)
+        after = (start_key["timestamp"], start_key["id"]) if start_key else None
+    except (ValueError, KeyError):
+        return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+    result = current_comment_index().search(
+        request.args.get("q", ""), request.args.get("movie_id") or None, after, limit
+    )
+
+    # One BatchGetItem for the page; reviews another worker deleted drop out
+    found = {
+        f["id"]: f
+        for f in batch_get(dynamodb, feedbacks_table.name, [{"id": hit[1]} for hit in result["hits"]])
+    }
+    items = []
+    for _, feedback_id, _ in result["hits"]:
+        feedback = found.get(feedback_id)
+        if feedback:
+            items.append({
+                **feedback_json(feedback),
+                "highlight": str(highlight(feedback.get("comment"), result["terms"]))
+            })
+
+    next_key = result["next_key"]
+    return jsonify({
+        "success": True,
+        "total": result["total"],
+        "feedbacks": items,
+        "next_cursor": encode_cursor({"timestamp": next_key[0], "id": next_key[1]} if next_key else None)
+    })
+
+def reindex_comments(job_id=None):
+    try:
+        load_comment_index()
+        finish_job(job_id, **comment_index.stats())
+    except Exception as e:
+        print("Comment reindex error:", e)
+        update_job(job_id, status="failed", error=str(e))
+
+@app.route("/admin/feedback/reindex", methods=["POST"])
+def reindex_feedback_comments():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    job_id = start_job("reindex_comments", reindex_comments)
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for("job_status", job_id=job_id)
+    }), 202
+
+
+# ================= ADMIN SENTIMENT RESCORE =================
+def rescore_all_feedbacks(job_id=None):
+    try:
+        result = run_rescore(
+            dynamo_pages(feedbacks_table),
+            write_rescored_sentiments,
+            finish_rescore,
+            checkpoint_path=RESCORE_CHECKPOINT,
+            processes=RESCORE_PROCESSES,
+            progress=lambda stats: update_job(job_id, **stats)
+        )
+        # Every user's history may show new labels. The movie rows did not
+        # change, so force the generation that all dashboard summaries are
+        # versioned by to move (the stamp carries it to the other workers)
+        movie_catalog.invalidate(force=True)
+        data_version.bump()
+        finish_job(job_id, **result)
+    except Exception as e:
+        print("Rescore error:", e)
+        update_job(job_id, status="failed", error=str(e))
+
+@app.route("/admin/sentiment/rescore", methods=["POST"])
+def rescore_sentiment():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    job_id = start_job("rescore", rescore_all_feedbacks, scanned=0, changed=0)
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for("job_status", job_id=job_id)
+    }), 202
+
+
+# ================= ADMIN BULK IMPORT =================
+def write_imported_movies(entries):
+    with movies_table.batch_writer() as batch:
+        for _, movie in entries:
+            batch.put_item(Item={**movie, "rating": Decimal("0.0")})
+    with analytics_table.batch_writer() as batch:
+        for _, movie in entries:
+            batch.put_item(Item={**default_analytics_payload(movie["id"]), "trend_buckets": {}})
+
+def write_imported_feedbacks(items):
+    """Write the reviews not stored yet -> those; a re-run of an import
+    leaves the reviews it already wrote (and their counters) alone."""
+    stored = {
+        item["id"]
+        for item in batch_get(dynamodb, feedbacks_table.name, [{"id": item["id"]} for item in items], ["id"])
+    }
+    new_items = [item for item in items if item["id"] not in stored]
+    write_feedbacks(new_items)
+    return new_items
+
+def add_imported_counters(aggregates):
+    """Add the imported reviews' counters to each movie with one update,
+    then re-derive its analytics and rating. Imported reviews are history:
+    they do not go into the hourly trend buckets or the review velocity."""
+    for movie_id, aggregate in aggregates.items():
+        attributes = add_feedback_counters(movie_id, aggregate)
+        total = aggregate_from_item(attributes)
+        update_movie_analytics(movie_id, total, None, attributes.get("trend_buckets", {}))
+        update_movie_rating(movie_id, total)
+
+    # New movies, ratings and review histories: the catalog reload moves the
+    # generation search and dashboard summaries follow; the leaderboard and
+    # comment index are rebuilt here, on the import job's thread
+    movie_catalog.invalidate()
+    load_leaderboard()
+    load_comment_index()
+    data_version.bump()
+
+def run_bulk_import(movies_path=None, reviews_path=None, processes=IMPORT_PROCESSES,
+                    chunk_size=CHUNK_SIZE, progress=None):
+    result = run_import(
+        read_rows(movies_path) if movies_path else None,
+        read_rows(reviews_path) if reviews_path else None,
+        movie_catalog.movies(),
+        write_imported_movies,
+        write_imported_feedbacks,
+        add_imported_counters,
+        processes=processes,
+        chunk_size=chunk_size,
+        progress=progress
+    )
+    # One notification for the whole import instead of one per row
+    send_notification(
+        "Bulk Import Finished",
+        f"Imported {result['movies']} movies and {result['reviews']} reviews "
+        f"({result['rejected']} rows rejected) in {result['seconds']}s"
+    )
+    return result
+
+def bulk_import_job(movies_path, reviews_path, job_id=None):
+    try:
+        result = run_bulk_import(
+            movies_path, reviews_path, progress=lambda stats: update_job(job_id, **stats)
+        )
+        finish_job(job_id, **result)
+    except Exception as e:
+        print("Bulk import error:", e)
+        update_job(job_id, status="failed", error=str(e))
+    finally:
+        for path in (movies_path, reviews_path):
+            if path:
+                os.remove(path)
+
+@app.route("/admin/import", methods=["POST"])
+def bulk_import():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    uploads = {name: request.files.get(name) for name in ("movies", "reviews")}
+    if not any(uploads.values()):
+        return jsonify({"success": False, "message": "Upload a movies and/or reviews file"}), 400
+
+    paths = {}
+    try:
+        for name, upload in uploads.items():
+            if upload:
+                paths[name] = spool_upload(upload.stream, upload.filename)
+    except ValueError as e:
+        for path in paths.values():
+            os.remove(path)
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    job_id = start_job(
+        "import", bulk_import_job, paths.get("movies"), paths.get("reviews"),
+        movies=0, reviews=0, skipped=0, rejected=0
+    )
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for("job_status", job_id=job_id)
+    }), 202
+
+
+# ================= ADMIN EXPORT =================
+# dataset -> (table, attribute the "since" filter applies to)
+EXPORT_TABLES = {
+    "feedbacks": (feedbacks_table, "timestamp"),
+    "movies": (movies_table, None),
+    "analytics": (analytics_table, "last_updated"),
+}
+
+def export_rows(dataset, columns, since=None):
+    """Rows of one dataset for export.py: a paginated scan projected to
+    ``columns``, filtered on ``since`` by DynamoDB."""
+    table, since_field = EXPORT_TABLES[dataset]
+    kwargs = {"Limit": EXPORT_PAGE_SIZE}
+    if since:
+        kwargs["FilterExpression"] = Attr(since_field).gte(since)
+    for page in iter_scan_pages(table, columns, **kwargs):
+        yield from page
+
+@app.route("/admin/export/<dataset>")
+def export_data(dataset):
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    try:
+        dataset, fmt, columns, since = parse_export_args(
+            dataset, request.args.get("format"), request.args.get("columns"), request.args.get("since")
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    # Streamed page by page (chunked transfer), never built in memory
+    return app.response_class(
+        stream_export(export_rows(dataset, columns, since), dataset, fmt, columns),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(dataset, fmt, since)}"'}
+    )
+
+
+# ================= ADMIN NOTIFICATION METRICS =================
+@app.route("/admin/notifications/stats")
+def notification_stats():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    return jsonify({"success": True, "sns": sns_outbox.stats()})
+
+
+# ================= ADMIN CACHE METRICS =================
+@app.route("/admin/cache/stats")
+def cache_stats():
+    if not session.get("admin_logged_in"):
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    return jsonify({
+        "success": True,
+        "catalog": movie_catalog.stats(),
+        "user_summaries": user_summaries.stats(),
+        "movie_cards": movie_cards.stats(),
+        "comment_index": comment_index.stats()
+    })
+
+
+# ================= ADMIN ANALYTICS REPAIR =================
+@app.route("/admin/analytics/rebuild", methods=["POST"])
+def rebuild_analytics():
+    if not session.get("admin_logged_in"):
+        return redirect(url_for("admin_login"))
 
-        # Update analytics and rating
-        update_movie_analytics(movie_id)
-        update_movie_rating(movie_id)
+    for movie in scan_all(movies_table, ["id"]):
+        rebuild_movie_aggregate(movie["id"])
+    data_version.bump()
 
     return redirect(url_for("admin_dashboard"))
 
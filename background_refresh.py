@@ -0,0 +1,44 @@
+import threading
+
+
+# ================= BACKGROUND REFRESH =================
+class BackgroundRefresh:
+    """Keeps a derived in-memory index fresh off the request path.
+
+    ``load()`` rebuilds the index (typically from a table scan). The first
+    ``ensure()`` runs it on the calling thread, since there is nothing to
+    serve yet, and starts a daemon thread that calls it again every
+    ``interval`` seconds; later ``ensure()`` calls return at once. Requests
+    keep reading the previous index while a rebuild runs, and a failed
+    rebuild is logged and retried on the next tick.
+    """
+
+    def __init__(self, load, interval, name="refresh"):
+        self.load = load
+        self.interval = interval
+        self.name = name
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def ensure(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.load()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-refresh", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.load()
+            except Exception as e:
+                print(f"[REFRESH] {self.name} rebuild failed:", e)
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,56 @@
+"""Latency of per-movie GetItem loops vs batched BatchGetItem for analytics.
+
+    python benchmarks/bench_batch_get.py --movies 500 2000
+    python benchmarks/bench_batch_get.py --endpoint-url http://localhost:8000
+"""
+import argparse
+import uuid
+
+from common import local_dynamodb, create_table, timed
+from dynamo_utils import batch_get
+
+
+def seed_analytics(table, count):
+    movie_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with table.batch_writer() as batch:
+        for movie_id in movie_ids:
+            batch.put_item(Item={
+                "movie_id": movie_id,
+                "score": 50,
+                "breakdown": {"positive": 30, "neutral": 40, "negative": 30},
+                "trend": "Stable",
+                "last_updated": "2024-01-01 00:00"
+            })
+    return movie_ids
+
+
+def get_item_loop(table, movie_ids):
+    return [table.get_item(Key={"movie_id": m}).get("Item") for m in movie_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--endpoint-url")
+    args = parser.parse_args()
+
+    with local_dynamodb(args.endpoint_url) as dynamodb:
+        for count in args.movies:
+            table = create_table(dynamodb, f"bench-analytics-{uuid.uuid4().hex[:8]}", "movie_id")
+            movie_ids = seed_analytics(table, count)
+
+            loop_s, _ = timed(get_item_loop, table, movie_ids, repeat=1)
+            batch_s, items = timed(batch_get, dynamodb, table.name,
+                                   [{"movie_id": m} for m in movie_ids],
+                                   max_workers=args.workers)
+
+            print(f"movies={count:<6} get_item loop {loop_s * 1000:9.1f} ms   "
+                  f"batch_get {batch_s * 1000:9.1f} ms   rows={len(items)}   "
+                  f"speedup x{loop_s / batch_s:.1f}")
+
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Comment search: index size and query latency vs a linear scan of comments.
+
+    python benchmarks/bench_comments.py --feedbacks 200000 --movies 500
+
+Indexes synthetic reviews (Zipf-ish word frequencies) with CommentIndex
+and reports posting-list bytes next to what the same postings cost as
+Python sets of feedback id strings, then times searches for rare,
+medium and prefix terms, with and without a movie filter, against the
+``term in comment.lower()`` scan moderation would otherwise need.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+
+from common import ROOT  # noqa: F401  (puts the repo on sys.path)
+from comment_index import CommentIndex, entry_docs
+
+SYLLABLES = ["ka", "ra", "mo", "li", "ven", "dor", "sha", "tu", "ne", "pri", "gal", "os", "mar", "zi", "en", "bel"]
+
+
+def make_feedbacks(count, movies, vocabulary_size):
+    vocabulary = list({
+        "".join(random.choice(SYLLABLES) for _ in range(random.randint(2, 4)))
+        for _ in range(vocabulary_size)
+    })
+    # Low ranks are drawn far more often, like words in real text
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    movie_ids = [str(uuid.uuid4()) for _ in range(movies)]
+    feedbacks = []
+    for i in range(count):
+        words = random.choices(vocabulary, weights, k=random.randint(4, 20))
+        feedbacks.append({
+            "id": str(uuid.uuid4()),
+            "movie_id": random.choice(movie_ids),
+            "timestamp": f"2025-{1 + i * 12 // count:02d}-01 {i % 24:02d}:{i % 60:02d}",
+            "comment": " ".join(words)
+        })
+    return feedbacks, vocabulary, movie_ids
+
+
+def set_postings_bytes(index):
+    """Size of the same postings held as {term: {movie: set(feedback ids)}}."""
+    total = 0
+    for lists in index._postings.values():
+        for entry in lists.values():
+            ids = {index._docs[doc][1] for doc in entry_docs(entry)}
+            total += sys.getsizeof(ids)
+    # The id strings themselves are shared with the feedback store
+    return total
+
+
+def linear_search(feedbacks, term, movie_id):
+    return [
+        f for f in feedbacks
+        if term in f["comment"].lower() and (movie_id is None or f["movie_id"] == movie_id)
+    ]
+
+
+def measure(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(*query)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    pick = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1e6
+    return pick(0.5), pick(0.99), statistics.mean(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feedbacks", type=int, default=200000)
+    parser.add_argument("--movies", type=int, default=500)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    random.seed(11)
+    feedbacks, vocabulary, movie_ids = make_feedbacks(args.feedbacks, args.movies, args.vocabulary)
+
+    index = CommentIndex()
+    start = time.perf_counter()
+    index.rebuild(feedbacks)
+    print(f"indexed {len(index)} comments in {time.perf_counter() - start:.2f}s")
+
+    stats = index.stats()
+    postings = sum(len(entry_docs(entry)) for lists in index._postings.values() for entry in lists.values())
+    print(f"{stats['terms']} terms, {stats['posting_lists']} lists, {postings} postings")
+    # Both sides counted with their per-list container overhead
+    encoded = sum(
+        sys.getsizeof(entry) + (0 if isinstance(entry, int) else sys.getsizeof(entry[1]))
+        for lists in index._postings.values() for entry in lists.values()
+    )
+    print(f"delta-encoded: {encoded / 1e6:.1f} MB "
+          f"(payload {stats['posting_bytes'] / 1e6:.1f} MB, {stats['posting_bytes'] / postings:.2f} B/posting)")
+    print(f"sets of ids:   {set_postings_bytes(index) / 1e6:.1f} MB")
+
+    # vocabulary is in frequency-rank order
+    ranked = vocabulary
+    kinds = {
+        "rare": lambda: (random.choice(ranked[len(ranked) // 2:]), None),
+        "medium": lambda: (random.choice(ranked[50:500]), None),
+        "prefix": lambda: (random.choice(ranked[50:500])[:3], None),
+        "movie": lambda: (random.choice(ranked[:50]), random.choice(movie_ids)),
+    }
+
+    print(f"{'kind':<7} {'p50 us':>9} {'p99 us':>9} {'mean us':>9} {'scan p50 us':>12} {'avg hits':>9}")
+    for kind, make in kinds.items():
+        queries = [make() for _ in range(args.queries)]
+        p50, p99, mean = measure(lambda q, m: index.search(q, m), queries)
+        hits = statistics.mean(index.search(q, m)["total"] for q, m in queries[:100])
+        scan_p50, _, _ = measure(lambda q, m: linear_search(feedbacks, q, m), queries[:10])
+        print(f"{kind:<7} {p50:>9.1f} {p99:>9.1f} {mean:>9.1f} {scan_p50:>12.1f} {hits:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""p50/p99 render time of the user dashboard (app.py): legacy, cold, cached.
+
+    python benchmarks/bench_dashboard.py --movies 10000 --feedbacks 1000000
+
+Fills the in-memory app with synthetic movies, users and feedbacks, then
+times GET /user/dashboard through the Flask test client:
+
+  legacy  the old per-request view model (full catalog payload, history
+          names found with next(...) over it), rebuilt on every request
+  cold    the summary is dropped before every request (rebuild path)
+  cached  repeat loads that hit the per-user summary cache
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+import uuid
+
+from common import ROOT
+
+os.environ.setdefault("MAIL_SERVER", "localhost")
+os.environ.setdefault("MAIL_PORT", "1025")
+# Synthetic data only: no write-ahead log
+os.environ.setdefault("CINEMAPULSE_DATA_DIR", "")
+os.chdir(ROOT)
+
+import app as cinemapulse  # noqa: E402
+
+GENRES = ["Action", "Drama", "Comedy", "Thriller", "Sci-Fi", "Romance"]
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+
+
+def populate(movie_count, feedback_count, user_count):
+    movies = []
+    for i in range(movie_count):
+        movie = {
+            "id": str(uuid.uuid4()),
+            "name": f"Movie {i}",
+            "genre": random.choice(GENRES),
+            "language": "English",
+            "image": "",
+            "rating": 0.0
+        }
+        cinemapulse.movies[f"movie_{i}"] = movie
+        movies.append(movie)
+
+    emails = [f"user{i}@example.com" for i in range(user_count)]
+    for email in emails:
+        cinemapulse.users[email] = {
+            "name": email, "email": email, "password": "x",
+            "favorite_genre": "Drama", "age_group": "18-25",
+            "favorites": {m["id"] for m in random.sample(movies, 5)}
+        }
+
+    store = cinemapulse.feedbacks
+    for i in range(feedback_count):
+        store.add({
+            "id": f"fb{i}",
+            "user_email": random.choice(emails),
+            "movie_id": random.choice(movies)["id"],
+            "rating": random.randint(1, 5),
+            "comment": "great movie",
+            "sentiment": random.choice(SENTIMENTS),
+            "timestamp": f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d} 12:00"
+        })
+
+    cinemapulse.init_movie_analytics()
+    return emails
+
+
+def legacy_summary(email, user):
+    """The view model the dashboard used to rebuild on every request."""
+    favorites = user.get("favorites", [])
+    user_feedbacks = cinemapulse.get_feedbacks_for_user(email)
+    movies_payload = [
+        {**movie, "is_favorite": movie["id"] in favorites}
+        for movie in cinemapulse.movies.values()
+    ]
+    history = []
+    for fb in user_feedbacks:
+        name = next((m["name"] for m in movies_payload if m["id"] == fb["movie_id"]), "Unknown")
+        history.append({**fb, "movie_name": name})
+    return {
+        "favorite_ids": frozenset(favorites),
+        "favorites": [m for m in movies_payload if m["is_favorite"]],
+        "history": history,
+        "stats": {
+            "total_movies": len(movies_payload),
+            "total_reviews": len(user_feedbacks),
+            "total_favorites": len(favorites)
+        }
+    }
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1000
+    return pick(0.5), pick(0.99), statistics.mean(samples) * 1000
+
+
+def run(client, email, requests, cold):
+    samples = []
+    for _ in range(requests):
+        if cold:
+            cinemapulse.user_summaries.invalidate(email)
+        start = time.perf_counter()
+        res = client.get("/user/dashboard")
+        samples.append(time.perf_counter() - start)
+        assert res.status_code == 200, res.status_code
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--feedbacks", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(42)
+    start = time.perf_counter()
+    emails = populate(args.movies, args.feedbacks, args.users)
+    print(f"populated {len(cinemapulse.movies)} movies, {len(cinemapulse.feedbacks)} feedbacks "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    # The busiest reviewer makes the rebuild path as expensive as it gets
+    email = max(emails, key=cinemapulse.feedbacks.count_for_user)
+    client = cinemapulse.app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_email"] = email
+
+    run(client, email, 20, cold=False)  # warm up templates
+
+    print(f"{'mode':<8} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+
+    build_user_summary = cinemapulse.build_user_summary
+    cinemapulse.build_user_summary = legacy_summary
+    legacy = run(client, email, max(args.requests // 10, 10), cold=True)
+    cinemapulse.build_user_summary = build_user_summary
+    cinemapulse.user_summaries.invalidate()
+
+    for mode, samples in (
+        ("legacy", legacy),
+        ("cold", run(client, email, args.requests, cold=True)),
+        ("cached", run(client, email, args.requests, cold=False))
+    ):
+        p50, p99, mean = percentiles(samples)
+        print(f"{mode:<8} {p50:>8.2f} {p99:>8.2f} {mean:>8.2f}")
+
+    print(cinemapulse.user_summaries.stats())
+    cinemapulse.email_outbox.stop(timeout=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Streaming export (export.py): rows/sec and peak memory per format.
+
+    python benchmarks/bench_export.py --feedbacks 1000000
+
+Seeds app.py's storage backends with synthetic feedbacks and exports them
+all through the streaming pipeline, discarding the output:
+
+  memory   MemoryStorage (FeedbackStore.scan, movie by movie)
+  sqlite   SQLiteStorage (rowid pages of 1000)
+
+Peak memory is what tracemalloc sees allocated during the export, next
+to "list", which builds the whole JSONL body in memory first, the way a
+non-streaming endpoint would. Rows/sec is over the whole table, also
+for the --since run. Parquet is skipped without pyarrow.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from common import ROOT  # noqa: F401  (puts the repo on sys.path)
+from export import DATASETS, parse_export_args, stream_export
+from feedback_store import FeedbackStore
+from storage import MemoryStorage, SQLiteStorage
+
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+WORDS = ["great", "boring", "soundtrack", "visuals", "story", "acting", "slow", "fun", "classic", "twist"]
+
+
+def make_feedbacks(count, movie_count):
+    movie_ids = [str(uuid.uuid4()) for _ in range(movie_count)]
+    return [
+        {
+            "id": str(uuid.uuid4()), "user_email": f"user{random.randrange(count // 20 + 1)}@example.com",
+            "movie_id": random.choice(movie_ids), "rating": random.randint(1, 5),
+            "comment": " ".join(random.sample(WORDS, 5)), "sentiment": random.choice(SENTIMENTS),
+            "timestamp": f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d} {i % 24:02d}:{i % 60:02d}"
+        }
+        for i in range(count)
+    ]
+
+
+def measure(export):
+    tracemalloc.start()
+    start = time.perf_counter()
+    written = export()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, written, peak
+
+
+def streamed(store, fmt, since):
+    dataset, fmt, columns, since = parse_export_args("feedbacks", fmt, None, since)
+    return sum(len(chunk) for chunk in stream_export(store.iter_feedbacks(since), dataset, fmt, columns))
+
+
+def listed(store):
+    columns = list(DATASETS["feedbacks"]["columns"])
+    body = "".join(json.dumps({c: f[c] for c in columns}) + "\n" for f in list(store.feedbacks)).encode()
+    return len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feedbacks", type=int, default=1000000)
+    parser.add_argument("--movies", type=int, default=5000)
+    parser.add_argument("--since", default=None, help="also time an incremental export from this timestamp")
+    args = parser.parse_args()
+
+    random.seed(23)
+    feedbacks = make_feedbacks(args.feedbacks, args.movies)
+    formats = ["jsonl", "csv"]
+    try:
+        parse_export_args("feedbacks", "parquet")
+        formats.append("parquet")
+    except ValueError as e:
+        print(f"(parquet skipped: {e})")
+
+    root = tempfile.mkdtemp(prefix="cinemapulse-export-")
+    try:
+        stores = {
+            "memory": MemoryStorage({}, {}, FeedbackStore(feedbacks)),
+            "sqlite": SQLiteStorage(os.path.join(root, "export.db")).open({}, {}, feedbacks),
+        }
+        del feedbacks
+        print(f"{args.feedbacks} feedbacks")
+        print(f"{'backend':>8} {'format':>8} {'rows/sec':>10} {'MB out':>8} {'peak MB':>8}")
+        for name, store in stores.items():
+            runs = [(fmt, lambda fmt=fmt: streamed(store, fmt, None)) for fmt in formats]
+            runs.append(("list", lambda: listed(store)))
+            if args.since:
+                runs.append((f"jsonl>={args.since[:10]}", lambda: streamed(store, "jsonl", args.since)))
+            for label, export in runs:
+                elapsed, written, peak = measure(export)
+                print(f"{name:>8} {label:>8} {args.feedbacks / elapsed:>10.0f} "
+                      f"{written / 2 ** 20:>8.1f} {peak / 2 ** 20:>8.1f}")
+            store.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Concurrent favorite toggles against aws_app.py: final state and round trips.
+
+    python benchmarks/bench_favorites.py --movies 20 --clicks 5 --threads 16
+    python benchmarks/bench_favorites.py --endpoint-url http://localhost:8000
+
+Every movie is toggled ``--clicks`` times by parallel requests of the same
+user, in three modes:
+
+  legacy    the old GetItem + list edit + SET favorites (two round trips,
+            last writer wins)
+  flip      POST /movie/favorite/toggle/<id> without a desired state
+            (conditional ADD-if-absent / DELETE-if-present)
+  explicit  the same endpoint with favorite=1, as the dashboard sends it
+
+The expected final state is known (a movie flipped an odd number of times
+is a favorite), so lost updates are counted exactly, along with DynamoDB
+calls per toggle and dashboard_version bumps. The endpoint's correctness
+is checked by tests/test_favorites.py; this script only reports.
+"""
+import argparse
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from common import local_dynamodb
+
+EMAIL = "bench@example.com"
+
+
+class CallCounter:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+
+def legacy_toggle(users_table, email, movie_id):
+    user = users_table.get_item(Key={"email": email})["Item"]
+    favorites = list(user.get("favorites", []))
+    if movie_id in favorites:
+        favorites.remove(movie_id)
+    else:
+        favorites.append(movie_id)
+    users_table.update_item(
+        Key={"email": email},
+        UpdateExpression="SET favorites = :f ADD dashboard_version :one",
+        ExpressionAttributeValues={":f": favorites, ":one": 1}
+    )
+
+
+def reset_user(users_table, legacy):
+    item = {"email": EMAIL, "name": "bench", "password": "x", "dashboard_version": 0}
+    if legacy:
+        item["favorites"] = []
+    users_table.put_item(Item=item)
+
+
+def run(cinemapulse, counter, mode, movie_ids, clicks, threads):
+    users_table = cinemapulse.users_table
+    reset_user(users_table, legacy=mode == "legacy")
+
+    clients = threading.local()
+
+    def client():
+        if not hasattr(clients, "client"):
+            clients.client = cinemapulse.app.test_client()
+            with clients.client.session_transaction() as sess:
+                sess["user_email"] = EMAIL
+        return clients.client
+
+    def toggle(movie_id):
+        if mode == "legacy":
+            legacy_toggle(users_table, EMAIL, movie_id)
+            return
+        data = {"favorite": "1"} if mode == "explicit" else {}
+        res = client().post(f"/movie/favorite/toggle/{movie_id}", data=data)
+        assert res.status_code == 200 and res.json["success"], res.data
+
+    work = [movie_id for movie_id in movie_ids for _ in range(clicks)]
+    counter.calls = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(toggle, work))
+    elapsed = time.perf_counter() - start
+    calls = counter.calls
+
+    user = users_table.get_item(Key={"email": EMAIL})["Item"]
+    final = set(user.get("favorites", []))
+    expected = set(movie_ids) if mode == "explicit" or clicks % 2 else set()
+    return {
+        "toggles": len(work),
+        "calls_per_toggle": calls / len(work),
+        "wrong": len(final ^ expected),
+        "version_bumps": int(user.get("dashboard_version", 0)),
+        "ms": elapsed * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=20)
+    parser.add_argument("--clicks", type=int, default=5, help="toggles per movie")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--endpoint-url")
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        # aws_app.py builds its own boto3 resource; point it at DynamoDB Local
+        os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = args.endpoint_url
+
+    with local_dynamodb(args.endpoint_url) as dynamodb:
+        import create_tables
+        create_tables.create_tables(dynamodb)
+        import aws_app as cinemapulse
+
+        counter = CallCounter()
+        cinemapulse.dynamodb.meta.client.meta.events.register("before-call.dynamodb", counter)
+
+        movie_ids = [str(uuid.uuid4()) for _ in range(args.movies)]
+        print(f"{args.movies} movies x {args.clicks} clicks, {args.threads} threads")
+        print(f"{'mode':<9} {'toggles':>7} {'calls/toggle':>12} {'wrong':>6} {'bumps':>6} {'ms':>8}")
+        for mode in ("legacy", "flip", "explicit"):
+            r = run(cinemapulse, counter, mode, movie_ids, args.clicks, args.threads)
+            print(f"{mode:<9} {r['toggles']:>7} {r['calls_per_toggle']:>12.2f} "
+                  f"{r['wrong']:>6} {r['version_bumps']:>6} {r['ms']:>8.1f}")
+
+        cinemapulse.sns_outbox.stop(timeout=0)
+
+
+if __name__ == "__main__":
+    main()
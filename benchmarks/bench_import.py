@@ -0,0 +1,142 @@
+"""Bulk import throughput (bulk_import.py) against app.py's storage backends.
+
+    python benchmarks/bench_import.py --movies 20000 --reviews 1000000
+
+Writes a movies CSV and a reviews JSONL file (half the reviews without a
+sentiment, so they are scored) and imports both into a fresh store:
+
+  memory   MemoryStorage with its write-ahead log (fsync per chunk)
+  sqlite   SQLiteStorage, one transaction per chunk
+
+against a per-row baseline that scores and writes --baseline reviews one
+at a time, as add_feedback does (without its analytics and email).
+Reported: rows/sec of each phase, and the time of the one rebuild of the
+per-movie counters that follows an import.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from itertools import islice
+
+from common import ROOT  # noqa: F401  (puts the repo on sys.path)
+from analytics import aggregate_feedbacks
+from bulk_import import CHUNK_SIZE, feedback_from_row, read_rows, run_import
+from feedback_store import FeedbackStore
+from sentiment import sentiment_engine
+from storage import MemoryStorage, SQLiteStorage
+
+GENRES = ["Action", "Drama", "Comedy", "Thriller", "Sci-Fi", "Romance"]
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+WORDS = ["great", "boring", "soundtrack", "visuals", "story", "acting", "slow", "fun", "classic", "twist", "not"]
+
+
+def write_files(root, movie_count, review_count):
+    movies_path = os.path.join(root, "movies.csv")
+    with open(movies_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "genre", "language", "image"])
+        for i in range(movie_count):
+            writer.writerow([f"Movie {i}", random.choice(GENRES), "English", ""])
+
+    reviews_path = os.path.join(root, "reviews.jsonl")
+    with open(reviews_path, "w") as f:
+        for i in range(review_count):
+            row = {
+                "movie_name": f"Movie {random.randrange(movie_count)}",
+                "user_email": f"user{random.randrange(review_count // 20 + 1)}@example.com",
+                "rating": random.randint(1, 5),
+                "comment": " ".join(random.sample(WORDS, 5)),
+                "timestamp": f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d} {i % 24:02d}:{i % 60:02d}"
+            }
+            if i % 2:
+                row["sentiment"] = random.choice(SENTIMENTS)
+            f.write(json.dumps(row) + "\n")
+    return movies_path, reviews_path
+
+
+def import_into(store, movies_path, reviews_path, processes, chunk_size):
+    start = time.perf_counter()
+    result = run_import(
+        read_rows(movies_path), read_rows(reviews_path), [],
+        store.put_movies, store.add_feedbacks, lambda aggregates: None,
+        processes=processes, chunk_size=chunk_size
+    )
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with store.feedback_rows() as rows:
+        aggregate_feedbacks(rows)
+    return result, elapsed, time.perf_counter() - start
+
+
+def per_row(store, movies_path, reviews_path, count):
+    """add_feedback's path: validate, score and write a review at a time."""
+    catalog = {}
+    entries = []
+    for _, row in read_rows(movies_path):
+        movie_id = str(uuid.uuid4())
+        key = row["name"].lower().replace(" ", "_")
+        catalog[key] = movie_id
+        entries.append((key, {"id": movie_id, **row, "rating": 0.0}))
+    store.put_movies(entries)
+    movie_ids = set(catalog.values())
+
+    start = time.perf_counter()
+    for _, row in islice(read_rows(reviews_path), count):
+        feedback = feedback_from_row(row, catalog, movie_ids, "2025-01-01 00:00")
+        feedback["sentiment"] = sentiment_engine.score(feedback["comment"])
+        store.add_feedback(feedback)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--reviews", type=int, default=1000000)
+    parser.add_argument("--baseline", type=int, default=20000, help="reviews written one at a time")
+    parser.add_argument("--processes", type=int, default=1, help="sentiment scoring processes")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    random.seed(22)
+    root = tempfile.mkdtemp(prefix="cinemapulse-import-")
+    try:
+        movies_path, reviews_path = write_files(root, args.movies, args.reviews)
+        print(f"{args.movies} movies, {args.reviews} reviews, chunks of {args.chunk_size}, "
+              f"{args.processes} scoring process(es)")
+
+        backends = {
+            "memory": lambda: MemoryStorage({}, {}, FeedbackStore(), os.path.join(root, "wal")).open(),
+            "sqlite": lambda: SQLiteStorage(os.path.join(root, "import.db")).open(),
+        }
+        print(f"{'backend':>8} {'rows/sec':>10} {'import s':>9} {'rebuild s':>10} {'per-row rows/sec':>17}")
+        for name, make in backends.items():
+            store = make()
+            result, elapsed, rebuild = import_into(
+                store, movies_path, reviews_path, args.processes, args.chunk_size
+            )
+            store.close()
+            if name == "memory":
+                baseline = per_row(
+                    MemoryStorage({}, {}, FeedbackStore(), os.path.join(root, "wal-rows")).open(),
+                    movies_path, reviews_path, args.baseline
+                )
+            else:
+                baseline = per_row(
+                    SQLiteStorage(os.path.join(root, "rows.db")).open(),
+                    movies_path, reviews_path, args.baseline
+                )
+            rows = result["movies"] + result["reviews"] + result["skipped"] + result["rejected"]
+            print(f"{name:>8} {rows / elapsed:>10.0f} {elapsed:>9.1f} {rebuild:>10.2f} {baseline:>17.0f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""Load test of the CinemaPulse routes on app.py and aws_app.py, saved as JSON.
+
+    python benchmarks/bench_routes.py --scale small
+    python benchmarks/bench_routes.py --movies 10000 --reviews 1000000 --targets app,app-sqlite
+    python benchmarks/bench_routes.py --targets aws --endpoint-url http://localhost:8000
+    python benchmarks/bench_routes.py --compare benchmarks/results/routes-<commit>.json
+
+Generates a catalog and review corpus from --seed (presets: small 1k
+movies / 10k reviews, medium 10k / 1M, large 100k / 10M), loads it
+through each app's own bulk import, registers --users users through
+POST /register, then drives the real routes with the Flask test client
+from --concurrency threads:
+
+  dashboard        GET  /user/dashboard
+  add_feedback     POST /movie/feedback/add
+  favorite         POST /movie/favorite/toggle/<id>
+  admin_dashboard  GET  /admin/dashboard
+  delete_feedback  POST /admin/feedback/delete
+  delete_movie     POST /admin/movie/delete  (--deletes movies, with their reviews)
+
+Targets, each run in a process of its own:
+
+  app         app.py, in-memory storage without the write-ahead log
+  app-sqlite  app.py on CINEMAPULSE_STORAGE=sqlite:<temp file>
+  aws         aws_app.py on moto; DynamoDB Local instead with --endpoint-url
+              (SNS stays on moto)
+
+Reported per route: requests/sec, p50/p95/p99 latency and downstream
+calls (DynamoDB, SQLite) per request, as counted by the apps' own
+instrumentation (see /metrics). app.py's emails are dropped instead of
+sent. Results are written to --output as JSON along with the commit they
+ran on; --compare prints the change against an earlier results file and
+exits 1 when a route's requests/sec or p95 is more than --tolerance worse.
+Moto holds every table in this process, so run the medium and large
+scales against DynamoDB Local.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+
+from common import REGION, ROOT
+
+SCALES = {
+    "small": (1000, 10000),
+    "medium": (10000, 1000000),
+    "large": (100000, 10000000),
+}
+TARGETS = ("app", "app-sqlite", "aws")
+# Scenario -> Flask endpoint of its route (the instrumentation's route label)
+SCENARIOS = {
+    "dashboard": "user_dashboard",
+    "add_feedback": "add_feedback",
+    "favorite": "toggle_favorite",
+    "admin_dashboard": "admin_dashboard",
+    "delete_feedback": "delete_feedback",
+    "delete_movie": "delete_movie",
+}
+SERVICES = ("dynamodb", "sns", "sqlite", "smtp")
+
+GENRES = ["Action", "Drama", "Comedy", "Thriller", "Sci-Fi", "Romance"]
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+WORDS = ["great", "boring", "soundtrack", "visuals", "story", "acting", "slow", "fun", "classic", "twist"]
+
+# aws_app.SNS_TOPIC_ARN's account, so moto's topic has the same ARN
+SNS_ACCOUNT = "288761745613"
+
+
+# ================= CORPUS =================
+def user_email(i):
+    return f"user{i}@bench.example"
+
+
+def write_corpus(root, movie_count, review_count, user_count, seed):
+    rng = random.Random(seed)
+    movies_path = os.path.join(root, "movies.jsonl")
+    with open(movies_path, "w") as f:
+        for i in range(movie_count):
+            f.write(json.dumps({
+                "name": f"Movie {i}", "genre": rng.choice(GENRES), "language": "English", "image": ""
+            }) + "\n")
+
+    reviews_path = os.path.join(root, "reviews.jsonl")
+    with open(reviews_path, "w") as f:
+        for i in range(review_count):
+            f.write(json.dumps({
+                "movie_name": f"Movie {rng.randrange(movie_count)}",
+                "user_email": user_email(rng.randrange(user_count)),
+                "rating": rng.randint(1, 5),
+                "comment": " ".join(rng.sample(WORDS, 5)),
+                "sentiment": rng.choice(SENTIMENTS),
+                "timestamp": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {i % 24:02d}:{i % 60:02d}"
+            }) + "\n")
+    return movies_path, reviews_path
+
+
+# ================= TARGETS =================
+@contextmanager
+def aws_services(endpoint_url=None):
+    """Moto for SNS, and for DynamoDB unless ``endpoint_url`` is given
+    (moto lets requests to other hosts through)."""
+    import boto3
+    from moto import mock_aws
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+    os.environ.setdefault("MOTO_ACCOUNT_ID", SNS_ACCOUNT)
+    if endpoint_url:
+        # aws_app.py builds its own boto3 resource; point it at DynamoDB Local
+        os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = endpoint_url
+
+    with mock_aws():
+        boto3.client("sns", region_name=REGION).create_topic(Name="CinemaPulse-Topic")
+        yield boto3.resource("dynamodb", region_name=REGION, endpoint_url=endpoint_url)
+
+
+def open_target(target, root, endpoint_url, stack):
+    """Import the app of ``target`` -> the module."""
+    os.environ.setdefault("MAIL_SERVER", "localhost")
+    os.environ.setdefault("MAIL_PORT", "1025")
+    os.chdir(ROOT)
+
+    if target == "aws":
+        dynamodb = stack.enter_context(aws_services(endpoint_url))
+        import create_tables
+        create_tables.create_tables(dynamodb)
+        import aws_app as cinemapulse
+        stack.callback(cinemapulse.sns_outbox.stop, timeout=0)
+        return cinemapulse
+
+    # Synthetic data only: no write-ahead log
+    os.environ["CINEMAPULSE_DATA_DIR"] = ""
+    if target == "app-sqlite":
+        os.environ["CINEMAPULSE_STORAGE"] = "sqlite:" + os.path.join(root, "routes.db")
+    import app as cinemapulse
+
+    # No SMTP server here: drop the emails rather than time connect errors
+    def drop(batch):
+        for item in batch:
+            item["sent"] = True
+
+    cinemapulse.email_outbox.sender = drop
+    stack.callback(cinemapulse.email_outbox.stop, timeout=0)
+    return cinemapulse
+
+
+def movie_ids(cinemapulse, target):
+    movies = cinemapulse.movie_catalog.movies() if target == "aws" else cinemapulse.movies.values()
+    return {movie["name"]: movie["id"] for movie in movies}
+
+
+def feedback_ids(cinemapulse, target, count):
+    if target != "aws":
+        return [feedback["id"] for feedback in islice(cinemapulse.store.iter_feedbacks(), count)]
+
+    from dynamo_utils import iter_scan_pages
+    ids = []
+    for page in iter_scan_pages(cinemapulse.feedbacks_table, ["id"]):
+        ids.extend(item["id"] for item in page)
+        if len(ids) >= count:
+            break
+    return ids[:count]
+
+
+# ================= LOAD =================
+def build_work(scenario, rng, args, emails, names, ids, fids):
+    """-> [(email or None for the admin, method, path, form)]"""
+    if scenario == "dashboard":
+        return [(rng.choice(emails), "GET", "/user/dashboard", None) for _ in range(args.requests)]
+    if scenario == "add_feedback":
+        return [
+            (rng.choice(emails), "POST", "/movie/feedback/add", {
+                "movie_name": rng.choice(names), "rating": str(rng.randint(1, 5)),
+                "comment": " ".join(rng.sample(WORDS, 5))
+            })
+            for _ in range(args.requests)
+        ]
+    if scenario == "favorite":
+        return [
+            (rng.choice(emails), "POST", f"/movie/favorite/toggle/{ids[rng.choice(names)]}",
+             {"favorite": rng.choice(("1", "0"))})
+            for _ in range(args.requests)
+        ]
+    if scenario == "admin_dashboard":
+        return [(None, "GET", "/admin/dashboard", None) for _ in range(args.requests)]
+    if scenario == "delete_feedback":
+        return [(None, "POST", "/admin/feedback/delete", {"feedback_id": fid}) for fid in fids]
+    return [(None, "POST", "/admin/movie/delete", {"name": name}) for name in rng.sample(names, args.deletes)]
+
+
+def drive(cinemapulse, work, concurrency):
+    """Send ``work`` -> (latencies in seconds, errors, wall seconds)."""
+    local = threading.local()
+
+    def client(email):
+        clients = local.__dict__.setdefault("clients", {})
+        if email not in clients:
+            clients[email] = cinemapulse.app.test_client()
+            with clients[email].session_transaction() as sess:
+                if email:
+                    sess["user_email"] = email
+                else:
+                    sess["admin_logged_in"] = True
+        return clients[email]
+
+    def send(item):
+        email, method, path, form = item
+        start = time.perf_counter()
+        res = client(email).open(path, method=method, data=form)
+        return time.perf_counter() - start, res.status_code >= 400
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, work))
+    seconds = time.perf_counter() - start
+    return [latency for latency, _ in results], sum(failed for _, failed in results), seconds
+
+
+def summarize(latencies, errors, seconds, calls):
+    ordered = sorted(latencies)
+    pick = lambda q: round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 3)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "rps": round(count / seconds, 1),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "mean_ms": round(sum(ordered) / count * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "calls": calls,
+        "calls_per_request": {service: round(total / count, 2) for service, total in calls.items()},
+    }
+
+
+def run_target(target, args):
+    from instrumentation import request_calls
+
+    root = tempfile.mkdtemp(prefix="cinemapulse-routes-")
+    try:
+        with ExitStack() as stack:
+            cinemapulse = open_target(target, root, args.endpoint_url, stack)
+            emails = [user_email(i) for i in range(args.users)]
+            client = cinemapulse.app.test_client()
+            for email in emails:
+                client.post("/register", data={
+                    "name": email.split("@")[0], "email": email, "password": "bench",
+                    "favorite_genre": "Drama", "age_group": "18-25"
+                })
+
+            movies_path, reviews_path = write_corpus(root, args.movies, args.reviews, args.users, args.seed)
+            started = time.perf_counter()
+            imported = cinemapulse.run_bulk_import(movies_path, reviews_path, processes=1)
+            seed_seconds = time.perf_counter() - started
+
+            ids = movie_ids(cinemapulse, target)
+            names = sorted(name for name in ids if name.startswith("Movie "))
+            fids = feedback_ids(cinemapulse, target, args.requests)
+
+            scenarios = {}
+            for scenario, endpoint in SCENARIOS.items():
+                rng = random.Random(f"{args.seed}:{scenario}")
+                work = build_work(scenario, rng, args, emails, names, ids, fids)
+                if not work:
+                    continue
+                if scenario in ("dashboard", "admin_dashboard"):
+                    drive(cinemapulse, work[:args.warmup], args.concurrency)
+
+                before = {service: request_calls.totals(route=endpoint, service=service)[1] for service in SERVICES}
+                latencies, errors, seconds = drive(cinemapulse, work, args.concurrency)
+                calls = {}
+                for service in SERVICES:
+                    total = request_calls.totals(route=endpoint, service=service)[1] - before[service]
+                    if total or (service == "dynamodb" and target == "aws"):
+                        calls[service] = int(total)
+                scenarios[scenario] = summarize(latencies, errors, seconds, calls)
+
+            return {
+                "seed_seconds": round(seed_seconds, 2),
+                "seed_rows_per_sec": imported["rows_per_sec"],
+                "imported": {key: imported[key] for key in ("movies", "reviews", "rejected")},
+                "scenarios": scenarios,
+            }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+# ================= RESULTS =================
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, bool(dirty)
+
+
+def print_results(results):
+    print(f"{'target':<11} {'route':<16} {'reqs':>6} {'err':>4} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  calls/request")
+    for target, result in results["targets"].items():
+        for scenario, r in result["scenarios"].items():
+            calls = ", ".join(f"{service} {value}" for service, value in r["calls_per_request"].items())
+            print(f"{target:<11} {scenario:<16} {r['requests']:>6} {r['errors']:>4} {r['rps']:>8.1f} "
+                  f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}  {calls}")
+
+
+def compare(old, new, tolerance):
+    """Print the change of every route against ``old`` -> regressions."""
+    if old["scale"] != new["scale"]:
+        print(f"note: comparing different scales {old['scale']} -> {new['scale']}")
+    print(f"\nagainst {old['commit'][:10]} ({old['date']}):")
+    print(f"{'target':<11} {'route':<16} {'req/s':>8} {'p95':>8}")
+    regressions = []
+    for target, result in new["targets"].items():
+        before = old["targets"].get(target, {}).get("scenarios", {})
+        for scenario, now in result["scenarios"].items():
+            was = before.get(scenario)
+            if not was:
+                continue
+            rps = now["rps"] / was["rps"] - 1 if was["rps"] else 0.0
+            p95 = now["p95_ms"] / was["p95_ms"] - 1 if was["p95_ms"] else 0.0
+            worse = rps < -tolerance or p95 > tolerance
+            if worse:
+                regressions.append(f"{target} {scenario}")
+            print(f"{target:<11} {scenario:<16} {rps:>+8.1%} {p95:>+8.1%}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--movies", type=int, help="overrides --scale")
+    parser.add_argument("--reviews", type=int, help="overrides --scale")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=300, help="per route")
+    parser.add_argument("--deletes", type=int, default=20, help="movies deleted")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests before the dashboards")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=25)
+    parser.add_argument("--targets", default="app,app-sqlite,aws")
+    parser.add_argument("--endpoint-url", help="DynamoDB Local for the aws target")
+    parser.add_argument("--output", help="results file (default benchmarks/results/routes-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    default_movies, default_reviews = SCALES[args.scale]
+    args.movies = args.movies or default_movies
+    args.reviews = args.reviews or default_reviews
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"unknown targets {', '.join(unknown)} (use {', '.join(TARGETS)})")
+    args.deletes = min(args.deletes, args.movies)
+
+    if args.child:
+        random.seed(args.seed)
+        result = run_target(targets[0], args)
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+        return
+
+    commit, dirty = git_commit()
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": {"movies": args.movies, "reviews": args.reviews, "users": args.users},
+        "settings": {
+            "requests": args.requests, "deletes": args.deletes, "warmup": args.warmup,
+            "concurrency": args.concurrency, "seed": args.seed,
+            "dynamodb": args.endpoint_url or "moto"
+        },
+        "targets": {},
+    }
+    print(f"{args.movies} movies, {args.reviews} reviews, {args.users} users, "
+          f"{args.requests} requests per route, concurrency {args.concurrency}")
+
+    # One process per target: each app is imported fresh, with its own metrics
+    for target in targets:
+        fd, path = tempfile.mkstemp(prefix=f"cinemapulse-routes-{target}-", suffix=".json")
+        os.close(fd)
+        try:
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:],
+                 "--targets", target, "--output", path, "--child"],
+                check=True, stdout=subprocess.DEVNULL
+            )
+            with open(path) as f:
+                results["targets"][target] = json.load(f)
+        finally:
+            os.remove(path)
+        seeded = results["targets"][target]
+        print(f"{target}: seeded in {seeded['seed_seconds']}s ({seeded['seed_rows_per_sec']} rows/sec)")
+
+    print()
+    print_results(results)
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"routes-{commit[:10]}{'-dirty' if dirty else ''}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nsaved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Wall-clock scaling of paginated vs parallel-segment scans.
+
+    python benchmarks/bench_scan.py --items 20000 --segments 1 2 4 8
+    python benchmarks/bench_scan.py --endpoint-url http://localhost:8000
+"""
+import argparse
+import uuid
+
+from common import local_dynamodb, create_table, timed
+from dynamo_utils import scan_all, parallel_scan
+
+
+def seed_feedbacks(table, count, movies=50):
+    movie_ids = [str(uuid.uuid4()) for _ in range(movies)]
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                "id": str(uuid.uuid4()),
+                "user_email": f"user{i % 500}@example.com",
+                "movie_id": movie_ids[i % movies],
+                "rating": i % 5 + 1,
+                "comment": "Benchmark review " + "x" * 200,
+                "sentiment": "Neutral",
+                "timestamp": "2024-01-01 00:00"
+            })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--endpoint-url")
+    args = parser.parse_args()
+
+    with local_dynamodb(args.endpoint_url) as dynamodb:
+        table = create_table(dynamodb, f"bench-feedbacks-{uuid.uuid4().hex[:8]}", "id")
+        seed_feedbacks(table, args.items)
+
+        first_page = len(table.scan().get("Items", []))
+        print(f"items={args.items} single-page scan returned {first_page}")
+
+        elapsed, items = timed(scan_all, table)
+        print(f"{'scan_all':<22} {elapsed:8.3f}s  rows={len(items)}")
+
+        elapsed, items = timed(scan_all, table, ["id", "movie_id"])
+        print(f"{'scan_all (projected)':<22} {elapsed:8.3f}s  rows={len(items)}")
+
+        for segments in args.segments:
+            elapsed, items = timed(parallel_scan, table, segments)
+            print(f"{f'parallel_scan x{segments}':<22} {elapsed:8.3f}s  rows={len(items)}")
+
+        if args.endpoint_url:
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Movie search latency: inverted index vs a linear scan of the catalog.
+
+    python benchmarks/bench_search.py --movies 100000 --queries 2000
+
+Builds a MovieSearchIndex over synthetic titles (1-4 words from a
+pseudo-word vocabulary plus a few very common words) and times searches
+of each kind, next to the linear ``substring in name`` scan the apps
+would otherwise need:
+
+  exact    one title word
+  prefix   the first 3 letters of a word
+  typo     a word with one letter changed
+  words    two words of the same title
+  common   a word used by a large share of titles
+  facet    no text, genre + language filters only
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from common import ROOT  # noqa: F401  (puts the repo on sys.path)
+from search_index import MovieSearchIndex
+
+GENRES = ["Action", "Drama", "Comedy", "Thriller", "Sci-Fi", "Romance", "Horror", "Animation"]
+LANGUAGES = ["English", "Hindi", "Tamil", "French", "Spanish", "Korean", "Japanese"]
+COMMON = ["the", "of", "love", "night", "last"]
+SYLLABLES = ["ka", "ra", "mo", "li", "ven", "dor", "sha", "tu", "ne", "pri", "gal", "os", "mar", "zi", "en", "bel"]
+
+
+def make_catalog(count, vocabulary_size):
+    vocabulary = list({
+        "".join(random.choice(SYLLABLES) for _ in range(random.randint(2, 4)))
+        for _ in range(vocabulary_size)
+    })
+    movies = []
+    for i in range(count):
+        words = random.sample(vocabulary, random.randint(1, 3))
+        if random.random() < 0.3:
+            words.insert(0, random.choice(COMMON))
+        movies.append({
+            "id": f"m{i}",
+            "name": " ".join(words).title(),
+            "genre": random.choice(GENRES),
+            "language": random.choice(LANGUAGES),
+            "image": "",
+            "rating": 0.0
+        })
+    return movies
+
+
+def typo(word):
+    i = random.randrange(len(word))
+    return word[:i] + random.choice(string.ascii_lowercase.replace(word[i], "")) + word[i + 1:]
+
+
+def make_queries(movies, kind, count):
+    queries = []
+    for _ in range(count):
+        words = random.choice(movies)["name"].lower().split()
+        word = max(words, key=len)
+        if kind == "exact":
+            queries.append((word, None, None))
+        elif kind == "prefix":
+            queries.append((word[:3], None, None))
+        elif kind == "typo":
+            queries.append((typo(word), None, None))
+        elif kind == "words":
+            queries.append((" ".join(words[-2:]), None, None))
+        elif kind == "common":
+            queries.append((random.choice(COMMON), None, None))
+        else:
+            queries.append(("", random.choice(GENRES), random.choice(LANGUAGES)))
+    return queries
+
+
+def linear_search(movies, query, genre, language, limit=20):
+    """What finding a movie costs without an index: look at every title."""
+    query = query.lower()
+    hits = [
+        m for m in movies
+        if query in m["name"].lower()
+        and (not genre or m["genre"] == genre)
+        and (not language or m["language"] == language)
+    ]
+    return hits[:limit]
+
+
+def measure(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(*query)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    pick = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1e6
+    return pick(0.5), pick(0.99), statistics.mean(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(7)
+    movies = make_catalog(args.movies, args.vocabulary)
+
+    start = time.perf_counter()
+    index = MovieSearchIndex(movies)
+    print(f"indexed {len(index)} titles in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'kind':<8} {'p50 us':>9} {'p99 us':>9} {'mean us':>9} {'scan p50 us':>12} {'avg hits':>9}")
+    for kind in ("exact", "prefix", "typo", "words", "common", "facet"):
+        queries = make_queries(movies, kind, args.queries)
+        p50, p99, mean = measure(index.search, queries)
+        hits = statistics.mean(index.search(*q)["total"] for q in queries[:200])
+        scan_p50, _, _ = measure(lambda *q: linear_search(movies, *q), queries[:20])
+        print(f"{kind:<8} {p50:>9.1f} {p99:>9.1f} {mean:>9.1f} {scan_p50:>12.1f} {hits:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Throughput (comments/sec) of the keyword loop vs SentimentEngine.
+
+    python benchmarks/bench_sentiment.py --comments 100000
+
+Runs two corpora (plain reviews, and reviews full of negations and
+intensifiers) against the default lexicon and a large lexicon, since the
+keyword loop costs one substring search per lexicon word per comment.
+"""
+import argparse
+import random
+import time
+
+from common import ROOT  # noqa: F401  (puts the repo on sys.path)
+from sentiment import DEFAULT_LEXICON, SentimentEngine
+
+PLAIN_WORDS = (
+    "the movie was story acting plot visuals music soundtrack amazing great "
+    "good bad boring predictable masterpiece waste poor love fun director "
+    "scenes ending characters goodbye somewhat slow long and with a of it"
+).split()
+MODIFIER_WORDS = PLAIN_WORDS + "not very really too never didn't".split()
+
+
+def legacy_sentiment_analysis(comment, positive_words, negative_words):
+    """The original keyword loop, kept here as the baseline."""
+    text = comment.lower()
+    score = 0
+
+    for w in positive_words:
+        if w in text:
+            score += 1
+    for w in negative_words:
+        if w in text:
+            score -= 1
+
+    if score > 0:
+        return "Positive"
+    elif score < 0:
+        return "Negative"
+    return "Neutral"
+
+
+def make_comments(count, vocabulary, seed=7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 40))) for _ in range(count)]
+
+
+def large_lexicon(size):
+    rng = random.Random(11)
+    lexicon = dict(DEFAULT_LEXICON)
+    for key in ("positive", "negative"):
+        lexicon[key] = lexicon[key] + ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(7))
+                         for _ in range(size // 2)]
+    return lexicon
+
+
+def measure(fn, comments):
+    start = time.perf_counter()
+    fn(comments)
+    return len(comments) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--comments", type=int, default=100000)
+    parser.add_argument("--large-lexicon", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpora = {
+        "plain": make_comments(args.comments, PLAIN_WORDS),
+        "modifiers": make_comments(args.comments, MODIFIER_WORDS),
+    }
+    lexicons = {
+        "default": DEFAULT_LEXICON,
+        f"{args.large_lexicon} words": large_lexicon(args.large_lexicon),
+    }
+
+    print(f"{'lexicon':<12} {'corpus':<10} {'legacy':>12} {'score':>12} {'score_batch':>12}  (comments/sec)")
+    for lexicon_name, lexicon in lexicons.items():
+        engine = SentimentEngine(lexicon)
+        positive, negative = lexicon["positive"], lexicon["negative"]
+
+        for corpus_name, comments in corpora.items():
+            legacy = measure(lambda cs: [legacy_sentiment_analysis(c, positive, negative) for c in cs], comments)
+            single = measure(lambda cs: [engine.score(c) for c in cs], comments)
+            batch = measure(engine.score_batch, comments)
+            print(f"{lexicon_name:<12} {corpus_name:<10} {legacy:>12,.0f} {single:>12,.0f} {batch:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
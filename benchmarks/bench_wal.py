@@ -0,0 +1,191 @@
+"""app.py durability: write-ahead log throughput, snapshot size, recovery time.
+
+    python benchmarks/bench_wal.py --feedbacks 1000000 --tail 50000
+
+Write throughput appends feedback records the way add_feedback does:
+
+  fsync    one writer, every commit waits for its own fsync
+  group    --threads writers, commits share fsyncs (CINEMAPULSE_WAL_FSYNC_MS=0)
+  interval --threads writers, background fsync every 10 ms
+  bulk     one writer appending --feedbacks records (interval mode); this
+           log is then recovered on its own
+
+Recovery imports app.py in a fresh process pointed at a data directory
+(CINEMAPULSE_DATA_DIR) and reports the recovery line app.py prints plus
+the whole import, which also rebuilds analytics, the leaderboard and the
+search index from the recovered tables:
+
+  log       replay of the bulk log only (no snapshot)
+  snapshot  snapshot of --feedbacks feedbacks plus a --tail record log
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from common import ROOT
+from durability import WriteAheadLog
+
+GENRES = ["Action", "Drama", "Comedy", "Thriller", "Sci-Fi", "Romance"]
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+FEEDBACK_FIELDS = ("id", "user_email", "movie_id", "rating", "comment", "sentiment", "timestamp")
+
+STARTUP = """
+import sys, time
+sys.path.insert(0, {root!r})
+import flask, flask_mail  # framework import time is not recovery time
+start = time.perf_counter()
+import app
+print("STARTUP %.2f" % (time.perf_counter() - start))
+"""
+
+
+def make_catalog(movie_count, user_count):
+    movies = {
+        f"movie_{i}": {
+            "id": str(uuid.uuid4()), "name": f"Movie {i}", "genre": random.choice(GENRES),
+            "language": "English", "image": "", "rating": 0.0
+        }
+        for i in range(movie_count)
+    }
+    users = {
+        f"user{i}@example.com": {
+            "id": str(uuid.uuid4()), "name": f"User {i}", "password": "x",
+            "favorite_genre": "Drama", "age_group": "18-25", "favorites": set()
+        }
+        for i in range(user_count)
+    }
+    return movies, users
+
+
+def make_feedback(movie_ids, emails, i):
+    return {
+        "id": str(uuid.uuid4()),
+        "user_email": random.choice(emails),
+        "movie_id": random.choice(movie_ids),
+        "rating": random.randint(1, 5),
+        "comment": "great movie, loved the soundtrack",
+        "sentiment": random.choice(SENTIMENTS),
+        "timestamp": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}"
+    }
+
+
+def write_catalog(wal, movies, users):
+    for key, movie in movies.items():
+        wal.append("movie_put", key, key, movie)
+    for email, user in users.items():
+        wal.append("user_put", email, user)
+    wal.sync(wal.append("user_put", "bench@example.com", {"name": "bench", "password": "x", "favorites": set()}))
+
+
+def throughput(directory, movies, users, writes, threads, fsync_interval):
+    wal = WriteAheadLog(directory, fsync_interval=fsync_interval, snapshot_every=10 ** 12)
+    write_catalog(wal, movies, users)
+    movie_ids = [m["id"] for m in movies.values()]
+    emails = list(users)
+    per_thread = writes // threads
+
+    def writer(t):
+        for i in range(per_thread):
+            wal.commit("feedback_put", make_feedback(movie_ids, emails, t * per_thread + i))
+
+    before = wal.stats()
+    start = time.perf_counter()
+    workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wal.close(snapshot=False)
+    elapsed = time.perf_counter() - start
+    after = wal.stats()
+    records = after["records"] - before["records"]
+    return {
+        "records": records,
+        "per_sec": records / elapsed,
+        "fsyncs": after["fsyncs"] - before["fsyncs"],
+        "bytes_per_record": (after["bytes"] - before["bytes"]) / records
+    }
+
+
+def write_snapshot(directory, movies, users, feedback_count, tail):
+    movie_ids = [m["id"] for m in movies.values()]
+    emails = list(users)
+    rows = [
+        tuple(make_feedback(movie_ids, emails, i)[field] for field in FEEDBACK_FIELDS)
+        for i in range(feedback_count)
+    ]
+    state = {"users": users, "movies": movies, "feedback_fields": FEEDBACK_FIELDS, "feedbacks": rows}
+
+    wal = WriteAheadLog(directory, capture=lambda: state)
+    # Put the log position past the catalog so the tail follows the snapshot
+    write_catalog(wal, movies, users)
+    start = time.perf_counter()
+    wal.snapshot()
+    elapsed = time.perf_counter() - start
+    del rows, state
+
+    for i in range(tail):
+        wal.append("feedback_put", make_feedback(movie_ids, emails, feedback_count + i))
+    wal.close(snapshot=False)
+    size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory) if f.startswith("snapshot"))
+    return elapsed, size
+
+
+def recover(directory):
+    env = {
+        **os.environ, "CINEMAPULSE_DATA_DIR": directory,
+        "MAIL_SERVER": "localhost", "MAIL_PORT": "1025"
+    }
+    out = subprocess.run(
+        [sys.executable, "-c", STARTUP.format(root=ROOT)],
+        capture_output=True, text=True, env=env, cwd=ROOT, check=True
+    ).stdout.splitlines()
+    recovered = next(line for line in out if line.startswith("Recovered"))
+    startup = next(line for line in out if line.startswith("STARTUP")).split()[1]
+    return recovered, startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feedbacks", type=int, default=1000000)
+    parser.add_argument("--movies", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--writes", type=int, default=5000, help="commits per fsync/group/interval run")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--tail", type=int, default=50000)
+    args = parser.parse_args()
+
+    random.seed(5)
+    movies, users = make_catalog(args.movies, args.users)
+    root = tempfile.mkdtemp(prefix="cinemapulse-wal-")
+    try:
+        runs = [
+            ("fsync", args.writes, 1, 0.0),
+            ("group", args.writes, args.threads, 0.0),
+            ("interval", args.writes, args.threads, 0.01),
+            ("bulk", args.feedbacks, 1, 0.01),
+        ]
+        print(f"{'mode':<9} {'records':>9} {'records/s':>10} {'fsyncs':>7} {'B/record':>9}")
+        for name, writes, threads, interval in runs:
+            r = throughput(os.path.join(root, name), movies, users, writes, threads, interval)
+            print(f"{name:<9} {r['records']:>9} {r['per_sec']:>10.0f} {r['fsyncs']:>7} {r['bytes_per_record']:>9.1f}")
+
+        elapsed, size = write_snapshot(os.path.join(root, "snapshot"), movies, users, args.feedbacks, args.tail)
+        print(f"snapshot of {args.feedbacks} feedbacks: {elapsed:.2f}s, {size / 1e6:.1f} MB")
+
+        for name, directory in (("log", "bulk"), ("snapshot", "snapshot")):
+            recovered, startup = recover(os.path.join(root, directory))
+            print(f"{name:<9} {recovered}; app import {startup}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
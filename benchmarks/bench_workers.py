@@ -0,0 +1,290 @@
+"""Load test of app.py on the shared SQLite storage: requests/sec by worker count.
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --seconds 15 --clients 16
+
+Seeds a SQLite database (CINEMAPULSE_STORAGE=sqlite:<path>) with synthetic
+movies, users and feedbacks, then for every worker count starts
+``gunicorn -w N app:app`` on it and drives it with --clients client
+processes, each logged in as its own user on a keep-alive connection,
+sending a mix of:
+
+  page       GET  /api/movies/<id>/feedbacks (first page)
+  dashboard  GET  /user/dashboard
+  leaders    GET  /api/leaderboard
+  search     GET  /api/movies/search?q=<prefix>
+  review     POST /movie/feedback/add        (--write-ratio, shared)
+  favorite   POST /movie/favorite/toggle/<id>  (with review)
+
+After each run a review is posted and the movie's feedback page is read
+back over fresh connections (landing on any worker) to check every worker
+serves it straight away. Throughput only grows with the worker count up
+to the number of CPU cores (``os.cpu_count()`` is printed), and the
+clients run on the same host.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from urllib.parse import urlencode
+
+from common import ROOT
+from storage import SQLiteStorage
+
+GENRES = ["Action", "Drama", "Comedy", "Thriller", "Sci-Fi", "Romance"]
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+WORDS = ["great", "boring", "soundtrack", "visuals", "story", "acting", "slow", "fun", "classic", "twist"]
+
+
+def seed(path, movie_count, user_count, feedback_count):
+    movies = {
+        f"movie_{i}": {
+            "id": str(uuid.uuid4()), "name": f"Movie {i}", "genre": random.choice(GENRES),
+            "language": "English", "image": "", "rating": 0.0
+        }
+        for i in range(movie_count)
+    }
+    users = {
+        f"user{i}@example.com": {
+            "id": str(uuid.uuid4()), "name": f"User {i}", "password": "x",
+            "favorite_genre": "Drama", "age_group": "18-25", "favorites": set()
+        }
+        for i in range(user_count)
+    }
+    movie_ids = [m["id"] for m in movies.values()]
+    emails = list(users)
+    feedbacks = [
+        {
+            "id": str(uuid.uuid4()), "user_email": random.choice(emails), "movie_id": random.choice(movie_ids),
+            "rating": random.randint(1, 5), "comment": " ".join(random.sample(WORDS, 4)),
+            "sentiment": random.choice(SENTIMENTS),
+            "timestamp": f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d} {i % 24:02d}:{i % 60:02d}"
+        }
+        for i in range(feedback_count)
+    ]
+    storage = SQLiteStorage(path).open(users, movies, feedbacks)
+    storage.close()
+    return [m["name"] for m in movies.values()], movie_ids, emails
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Each worker appends its pid once the app is imported (and its analytics
+# rebuilt), so runs start only when every worker serves
+READY_HOOK = """
+def post_worker_init(worker):
+    with open({path!r}, "a") as f:
+        f.write(f"{{worker.pid}}\\n")
+"""
+
+
+def start_server(workers, threads, db_path, port, log):
+    ready = db_path + ".ready"
+    config = db_path + ".gunicorn.py"
+    with open(config, "w") as f:
+        f.write(READY_HOOK.format(path=ready))
+    env = {
+        **os.environ,
+        "CINEMAPULSE_STORAGE": f"sqlite:{db_path}",
+        "MAIL_SERVER": "localhost", "MAIL_PORT": "1025",
+        "PYTHONPATH": ROOT,
+    }
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", config, "-w", str(workers), "--threads", str(threads),
+         "-b", f"127.0.0.1:{port}", "--timeout", "300", "app:app"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.time() + 600
+    while time.time() < deadline:
+        if server.poll() is not None:
+            break
+        if os.path.exists(ready):
+            with open(ready) as f:
+                if len(f.read().split()) >= workers:
+                    return server, time.perf_counter() - started
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("gunicorn did not start; see the log")
+
+
+class Client:
+    def __init__(self, port):
+        self.port = port
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        self.cookie = None
+
+    def request(self, method, path, form=None):
+        headers = {"Cookie": self.cookie} if self.cookie else {}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        try:
+            self.conn.request(method, path, body, headers)
+            response = self.conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # Sync workers close idle keep-alive connections; reconnect once
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            self.conn.request(method, path, body, headers)
+            response = self.conn.getresponse()
+        data = response.read()
+        cookie = response.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        return response.status, data
+
+    def login(self, email):
+        self.request("POST", "/login", {"email": email, "password": "x"})
+
+
+def client_loop(port, email, names, movie_ids, seconds, write_ratio, seed_value, results):
+    random.seed(seed_value)
+    client = Client(port)
+    client.login(email)
+    reads = [
+        ("page", 0.45, lambda: ("GET", f"/api/movies/{random.choice(movie_ids)}/feedbacks", None)),
+        ("dashboard", 0.2, lambda: ("GET", "/user/dashboard", None)),
+        ("leaders", 0.15, lambda: ("GET", "/api/leaderboard?by=velocity", None)),
+        ("search", 0.2, lambda: ("GET", f"/api/movies/search?{urlencode({'q': random.choice(names)[:8]})}", None)),
+    ]
+    writes = [
+        ("review", 0.8, lambda: ("POST", "/movie/feedback/add", {
+            "movie_name": random.choice(names), "rating": random.randint(1, 5),
+            "comment": " ".join(random.sample(WORDS, 4))
+        })),
+        ("favorite", 0.2, lambda: ("POST", f"/movie/favorite/toggle/{random.choice(movie_ids)}", None)),
+    ]
+
+    samples = {}
+    errors = 0
+    end = time.perf_counter() + seconds
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        mix = writes if random.random() < write_ratio else reads
+        kind, _, make = random.choices(mix, weights=[weight for _, weight, _ in mix])[0]
+        method, path, form = make()
+        status, _ = client.request(method, path, form)
+        samples.setdefault(kind, []).append(time.perf_counter() - now)
+        # Writes answer with a redirect to the dashboard
+        if status >= 400:
+            errors += 1
+    results.put((samples, errors))
+
+
+def check_consistency(port, email, movie_id, name, reads):
+    """Post a review through one connection, then read the movie's first
+    page over ``reads`` new connections: every one should include it."""
+    writer = Client(port)
+    writer.login(email)
+    marker = uuid.uuid4().hex
+    writer.request("POST", "/movie/feedback/add", {"movie_name": name, "rating": 5, "comment": marker})
+    seen = 0
+    for _ in range(reads):
+        reader = Client(port)
+        reader.login(email)
+        _, data = reader.request("GET", f"/api/movies/{movie_id}/feedbacks")
+        seen += marker.encode() in data
+        reader.conn.close()
+    return seen
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] * 1000
+
+
+def run(args, db_path, names, movie_ids, emails, workers, log):
+    port = free_port()
+    server, startup = start_server(workers, args.threads, db_path, port, log)
+    try:
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=client_loop,
+                args=(port, emails[i], names, movie_ids, args.seconds, args.write_ratio, i, results)
+            )
+            for i in range(args.clients)
+        ]
+        for c in clients:
+            c.start()
+        gathered = [results.get(timeout=args.seconds + 120) for _ in clients]
+        for c in clients:
+            c.join()
+
+        samples, errors = {}, 0
+        for client_samples, client_errors in gathered:
+            errors += client_errors
+            for kind, values in client_samples.items():
+                samples.setdefault(kind, []).extend(values)
+        everything = [v for values in samples.values() for v in values]
+        seen = check_consistency(port, emails[0], movie_ids[0], names[0], args.consistency_reads)
+        return {
+            "requests": len(everything),
+            "per_sec": len(everything) / args.seconds,
+            "p50": percentile(everything, 0.5),
+            "p99": percentile(everything, 0.99),
+            "errors": errors,
+            "by_kind": {kind: (len(values), statistics.median(values) * 1000) for kind, values in samples.items()},
+            "consistent": f"{seen}/{args.consistency_reads}",
+            "startup": startup
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated gunicorn worker counts")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn --threads per worker")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--movies", type=int, default=500)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--feedbacks", type=int, default=200000)
+    parser.add_argument("--consistency-reads", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(21)
+    root = tempfile.mkdtemp(prefix="cinemapulse-workers-")
+    try:
+        db_path = os.path.join(root, "cinemapulse.db")
+        start = time.perf_counter()
+        names, movie_ids, emails = seed(db_path, args.movies, args.users, args.feedbacks)
+        print(f"seeded {args.feedbacks} feedbacks in {time.perf_counter() - start:.1f}s; "
+              f"{os.cpu_count()} CPU(s), {args.clients} clients, {args.write_ratio:.0%} writes")
+
+        print(f"{'workers':>7} {'startup':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} "
+              f"{'consistent':>11}  per-kind p50 ms")
+        with open(os.path.join(root, "gunicorn.log"), "w") as log:
+            for workers in (int(w) for w in args.workers.split(",")):
+                # A fresh copy per run, so every run starts from the same data
+                run_path = os.path.join(root, f"run-{workers}.db")
+                shutil.copy(db_path, run_path)
+                r = run(args, run_path, names, movie_ids, emails, workers, log)
+                kinds = " ".join(f"{kind}={ms:.1f}" for kind, (_, ms) in sorted(r["by_kind"].items()))
+                print(f"{workers:>7} {r['startup']:>7.1f}s {r['per_sec']:>8.0f} {r['p50']:>8.1f} {r['p99']:>8.1f} "
+                      f"{r['errors']:>7} {r['consistent']:>11}  {kinds}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Shared helpers for the CinemaPulse benchmarks.
+
+Benchmarks run against moto's in-process DynamoDB by default, or against a
+DynamoDB Local instance when ``--endpoint-url`` is given.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+REGION = "us-east-1"
+
+
+@contextmanager
+def local_dynamodb(endpoint_url=None):
+    """Yield a boto3 DynamoDB resource backed by moto or DynamoDB Local."""
+    import boto3
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+
+    if endpoint_url:
+        yield boto3.resource("dynamodb", region_name=REGION, endpoint_url=endpoint_url)
+        return
+
+    from moto import mock_aws
+
+    with mock_aws():
+        yield boto3.resource("dynamodb", region_name=REGION)
+
+
+def create_table(dynamodb, name, key):
+    table = dynamodb.create_table(
+        TableName=name,
+        KeySchema=[{"AttributeName": key, "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": key, "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    table.wait_until_exists()
+    return table
+
+
+def timed(fn, *args, repeat=3, **kwargs):
+    """Return (best wall-clock seconds, last result) over ``repeat`` runs."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
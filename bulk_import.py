@@ -0,0 +1,313 @@
+"""Bulk import of movies and reviews from CSV or JSONL files.
+
+Files are read from disk a chunk of rows at a time. Each row is
+validated and given an id, reviews without a valid ``sentiment`` are
+scored a chunk at a time (in a process pool with ``processes`` > 1) and
+every chunk is written with one bulk call. The per-row work of the web
+forms is skipped: no analytics recompute and no notification per row.
+Per-movie counters of the imported reviews are accumulated instead and
+handed to ``finish`` once at the end, also when the import fails half
+way. A review's id is derived from its content (or taken from an ``id``
+column), so re-running an interrupted import rewrites the same reviews
+instead of adding them twice.
+
+    python bulk_import.py --movies movies.csv --reviews reviews.jsonl --processes 4
+
+Movie rows: ``name`` (required), ``genre``, ``language``, ``image`` and
+optionally ``id``; a name already in the catalog is skipped. Review rows:
+``movie_id`` or ``movie_name``, ``user_email``, ``rating`` (1-5),
+``comment``, and optionally ``id``, ``sentiment`` and ``timestamp``
+(``YYYY-MM-DD HH:MM``, default now). Movies are imported before reviews,
+so a review can refer to a movie from the same run.
+
+The CLI writes to the DynamoDB tables used by aws_app.py; with ``--app``
+it writes to app.py's SQLite storage (CINEMAPULSE_STORAGE=sqlite:<path>)
+instead, which running servers pick up from the change log. In-memory
+storage belongs to the server process, so import into it through POST
+/admin/import, which both apps serve with the same pipeline.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from analytics import AGGREGATE_FIELDS, apply_feedback, empty_aggregate
+from rescore import score_page
+
+# Rows validated, scored and written together
+CHUNK_SIZE = 5000
+
+# Rejected rows reported back with their line number
+ERROR_LIMIT = 20
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+SENTIMENTS = ("Positive", "Neutral", "Negative")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+
+# Namespace of the content-derived review ids
+REVIEW_ID_NAMESPACE = uuid.UUID("5c0e7f3e-8a4b-4f0e-9a57-3b1f2c6d9e10")
+
+
+def movie_key(name):
+    return name.lower().replace(" ", "_")
+
+
+# ================= SOURCES =================
+def file_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if not fmt:
+        raise ValueError(f"Unsupported file type: {os.path.basename(path)} (use .csv or .jsonl)")
+    return fmt
+
+
+def read_rows(path):
+    """Yield ``(line number, row)`` from a CSV (with a header) or JSONL
+    file, one line at a time; a JSONL line that does not parse to an
+    object yields None as its row."""
+    fmt = file_format(path)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+
+
+def spool_upload(stream, filename):
+    """Copy an uploaded file to a temporary file (same extension) so a
+    background job can read it after the request is gone; -> its path."""
+    file_format(filename or "")
+    suffix = os.path.splitext(filename)[1].lower()
+    fd, path = tempfile.mkstemp(prefix="cinemapulse-import-", suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(stream, f, 1024 * 1024)
+    return path
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ================= VALIDATION =================
+def _text(row, field, required=False):
+    value = row.get(field)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"missing {field}")
+    return value
+
+
+def movie_from_row(row):
+    """-> (key, movie) for a movie row; ValueError when it is invalid."""
+    if row is None:
+        raise ValueError("not a JSON object")
+    name = _text(row, "name", required=True)
+    movie = {
+        "id": _text(row, "id") or str(uuid.uuid4()),
+        "name": name,
+        "genre": _text(row, "genre"),
+        "language": _text(row, "language"),
+        "image": _text(row, "image"),
+        "rating": 0.0
+    }
+    return movie_key(name), movie
+
+
+def feedback_from_row(row, catalog, movie_ids, now):
+    """-> feedback for a review row, with ``sentiment`` None when it still
+    has to be scored; ValueError when the row is invalid."""
+    if row is None:
+        raise ValueError("not a JSON object")
+
+    movie_id = _text(row, "movie_id")
+    if not movie_id:
+        movie_id = catalog.get(movie_key(_text(row, "movie_name", required=True)))
+    if movie_id not in movie_ids:
+        raise ValueError("unknown movie")
+
+    user_email = _text(row, "user_email", required=True)
+    if "@" not in user_email:
+        raise ValueError("invalid user_email")
+
+    try:
+        rating = int(_text(row, "rating", required=True))
+    except ValueError:
+        raise ValueError("rating must be a whole number") from None
+    if not 1 <= rating <= 5:
+        raise ValueError("rating must be 1-5")
+
+    timestamp = _text(row, "timestamp")
+    if timestamp:
+        try:
+            timestamp = datetime.strptime(timestamp[:16].replace("T", " "), TIMESTAMP_FORMAT)
+        except ValueError:
+            raise ValueError("timestamp must be YYYY-MM-DD HH:MM") from None
+        timestamp = timestamp.strftime(TIMESTAMP_FORMAT)
+
+    comment = _text(row, "comment")
+    sentiment = _text(row, "sentiment").capitalize()
+    # Same row, same id: a re-run overwrites instead of duplicating
+    review_id = _text(row, "id") or str(uuid.uuid5(
+        REVIEW_ID_NAMESPACE, "\x1f".join((movie_id, user_email, str(rating), timestamp or "", comment))
+    ))
+    return {
+        "id": review_id,
+        "user_email": user_email,
+        "movie_id": movie_id,
+        "rating": rating,
+        "comment": comment,
+        "sentiment": sentiment if sentiment in SENTIMENTS else None,
+        "timestamp": timestamp or now
+    }
+
+
+# ================= PIPELINE =================
+def run_import(movie_rows, review_rows, existing_movies, write_movies, write_feedbacks, finish,
+               processes=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Validate, score and write movies, then reviews, in chunks.
+
+    ``movie_rows`` / ``review_rows`` yield ``(line number, row)`` (either
+    may be None). ``existing_movies`` is the current catalog, to resolve
+    reviews and skip movies already there. ``write_movies(entries)``
+    stores a chunk of ``(key, movie)`` pairs, ``write_feedbacks(items)``
+    a chunk of reviews and may return the ones that were not stored yet
+    (None: all of them). ``finish(aggregates)`` gets the counters of those
+    new reviews per movie id; it is called once, when the last chunk is
+    written or when the import fails, so the counters always cover what
+    was written. ``progress(stats)`` is called after each chunk.
+    """
+    catalog = {movie_key(movie["name"]): movie["id"] for movie in existing_movies}
+    movie_ids = set(catalog.values())
+    now = datetime.now().strftime(TIMESTAMP_FORMAT)
+    stats = {"movies": 0, "reviews": 0, "skipped": 0, "rejected": 0, "errors": [], "rows_per_sec": 0.0}
+    aggregates = {}
+    started = time.time()
+
+    def reject(kind, line, error):
+        stats["rejected"] += 1
+        if len(stats["errors"]) < ERROR_LIMIT:
+            stats["errors"].append(f"{kind} line {line}: {error}")
+
+    def report():
+        read = stats["movies"] + stats["reviews"] + stats["skipped"] + stats["rejected"]
+        stats["rows_per_sec"] = round(read / max(time.time() - started, 1e-9), 1)
+        print(f"[IMPORT] {stats['movies']} movies, {stats['reviews']} reviews, "
+              f"{stats['skipped']} skipped, {stats['rejected']} rejected, {stats['rows_per_sec']} rows/sec")
+        if progress:
+            progress({key: value for key, value in stats.items() if key != "errors"})
+
+    for chunk in chunked(movie_rows or (), chunk_size):
+        entries = []
+        for line, row in chunk:
+            try:
+                key, movie = movie_from_row(row)
+            except ValueError as e:
+                reject("movies", line, e)
+                continue
+            if key in catalog:
+                stats["skipped"] += 1
+            elif movie["id"] in movie_ids:
+                reject("movies", line, "id already in use")
+            else:
+                catalog[key] = movie["id"]
+                movie_ids.add(movie["id"])
+                entries.append((key, movie))
+        if entries:
+            write_movies(entries)
+        stats["movies"] += len(entries)
+        report()
+
+    pool = None
+    if processes and processes > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    try:
+        for chunk in chunked(review_rows or (), chunk_size):
+            items = {}
+            for line, row in chunk:
+                try:
+                    item = feedback_from_row(row, catalog, movie_ids, now)
+                except ValueError as e:
+                    reject("reviews", line, e)
+                    continue
+                if item["id"] in items:
+                    stats["skipped"] += 1
+                items[item["id"]] = item
+            items = list(items.values())
+
+            unscored = [item for item in items if item["sentiment"] is None]
+            if unscored:
+                for item, label in zip(unscored, score_page(unscored, pool)):
+                    item["sentiment"] = label
+
+            if items:
+                written = write_feedbacks(items)
+                for item in items if written is None else written:
+                    apply_feedback(aggregates.setdefault(item["movie_id"], empty_aggregate()), item)
+            stats["reviews"] += len(items)
+            report()
+    finally:
+        if pool:
+            pool.shutdown()
+        finish({
+            movie_id: {field: int(aggregate.get(field, 0)) for field in AGGREGATE_FIELDS}
+            for movie_id, aggregate in aggregates.items()
+        })
+
+    stats["seconds"] = round(time.time() - started, 2)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import movies and reviews from CSV or JSONL")
+    parser.add_argument("--movies", help="CSV or JSONL file of movies")
+    parser.add_argument("--reviews", help="CSV or JSONL file of reviews")
+    parser.add_argument("--app", action="store_true",
+                        help="import into app.py's SQLite storage instead of the DynamoDB tables")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    if not args.movies and not args.reviews:
+        parser.error("give --movies and/or --reviews")
+
+    if args.app:
+        if not os.getenv("CINEMAPULSE_STORAGE", "").startswith("sqlite:"):
+            parser.error("--app needs CINEMAPULSE_STORAGE=sqlite:<path>; in-memory storage belongs "
+                         "to the server, upload the files to its POST /admin/import instead")
+        import app as target
+    else:
+        import aws_app as target
+
+    result = target.run_bulk_import(
+        args.movies, args.reviews, processes=args.processes, chunk_size=args.chunk_size
+    )
+    print(f"[IMPORT DONE] {result['movies']} movies, {result['reviews']} reviews, "
+          f"{result['skipped']} skipped, {result['rejected']} rejected in {result['seconds']}s "
+          f"({result['rows_per_sec']} rows/sec)")
+    for error in result["errors"]:
+        print("  ", error)
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+import uuid
+
+from pagination import key_positions
+
+
+# ================= VERSION STAMPS =================
+# A version stamp is a tiny piece of shared state that changes whenever the
+# catalog is edited. Every worker process polls it (cheaply) and drops its
+# local copy when it changes, so admin edits made through one gunicorn
+# worker are picked up by the others within ``check_interval`` seconds.
+class FileVersionStamp:
+    """Version stamp kept in a file shared by the workers of one host."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def bump(self):
+        # A random token instead of a counter: concurrent bumps can't be lost
+        # to a read-modify-write race, any change is enough to invalidate
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self.path)
+
+
+class RedisVersionStamp:
+    """Version stamp kept in Redis, for workers spread over several hosts."""
+
+    def __init__(self, url, key="cinemapulse:catalog:version"):
+        import redis  # optional dependency, only needed for redis:// stamps
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def read(self):
+        value = self.client.get(self.key)
+        return value.decode() if value is not None else None
+
+    def bump(self):
+        self.client.incr(self.key)
+
+
+def make_version_stamp(spec, key="cinemapulse:catalog:version"):
+    """``redis://...`` -> RedisVersionStamp, any other value -> file path."""
+    if not spec:
+        return None
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisVersionStamp(spec, key)
+    return FileVersionStamp(spec)
+
+
+# ================= CATALOG CACHE =================
+class CatalogCache:
+    """Process-local read-through cache of the movie catalog.
+
+    ``loader()`` returns the full list of movies and is only called when the
+    cached copy is missing, older than ``ttl`` seconds, invalidated locally
+    or invalidated by another process through the shared version ``stamp``.
+    Lookups by id and by (case-insensitive) name are dict hits.
+
+    Cached movie dicts are shared between requests; callers copy them
+    (``{**movie, ...}``) before adding per-request fields. ``generation``
+    changes when a reload brings a new stamp or a catalog that differs from
+    the previous one (not on every TTL expiry), so views derived from the
+    catalog can use it as part of their version.
+    """
+
+    def __init__(self, loader, ttl=300.0, stamp=None, check_interval=1.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.stamp = stamp
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._movies = None
+        self._by_id = {}
+        self._by_name = {}
+        self._positions = {}
+        self._loaded_at = 0.0
+        self._version = None
+        self._checked_at = 0.0
+        self._previous = None
+        self._generation = 0
+
+        self._counters = {
+            "hits": 0, "misses": 0, "loads": 0, "expired": 0,
+            "invalidations": 0, "remote_invalidations": 0
+        }
+        self._load_seconds = 0.0
+
+    # ----- reads -----
+    def movies(self):
+        return self._snapshot()[0]
+
+    def movies_with_positions(self):
+        """-> (movies, id -> index in movies), from the same load."""
+        snapshot = self._snapshot()
+        return snapshot[0], snapshot[3]
+
+    def get(self, movie_id):
+        return self._snapshot()[1].get(movie_id)
+
+    def by_name(self, name):
+        return self._snapshot()[2].get(name.lower())
+
+    @property
+    def generation(self):
+        self._snapshot()
+        return self._generation
+
+    def _snapshot(self):
+        now = time.time()
+        with self._lock:
+            if self._is_fresh(now):
+                self._counters["hits"] += 1
+                return self._movies, self._by_id, self._by_name, self._positions
+
+            # Single flight: other threads wait on the lock and then hit
+            self._counters["misses"] += 1
+            self._load(now)
+            return self._movies, self._by_id, self._by_name, self._positions
+
+    def _is_fresh(self, now):
+        if self._movies is None:
+            return False
+
+        if now - self._loaded_at >= self.ttl:
+            self._counters["expired"] += 1
+            return False
+
+        if self.stamp and now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            if self._read_stamp() != self._version:
+                self._counters["remote_invalidations"] += 1
+                return False
+
+        return True
+
+    def _load(self, now):
+        # Read the stamp first: an edit landing mid-load bumps it again and
+        # the next check reloads
+        version = self._read_stamp()
+        started = time.perf_counter()
+        movies = list(self.loader())
+        self._load_seconds += time.perf_counter() - started
+
+        by_name = {}
+        for movie in movies:
+            by_name.setdefault(movie["name"].lower(), movie)
+
+        if version != self._version or movies != self._previous:
+            self._generation += 1
+        self._previous = movies
+
+        self._movies = movies
+        self._by_id = {movie["id"]: movie for movie in movies}
+        self._by_name = by_name
+        self._positions = key_positions(movies)
+        self._loaded_at = now
+        self._checked_at = now
+        self._version = version
+        self._counters["loads"] += 1
+
+    def _read_stamp(self):
+        if not self.stamp:
+            return None
+        try:
+            return self.stamp.read()
+        except Exception as e:
+            # A broken shared backend must not take the site down; fall
+            # back to TTL-only expiry
+            print("[CATALOG CACHE] version stamp read failed:", e)
+            return self._version
+
+    # ----- writes -----
+    def invalidate(self, force=False):
+        """Drop the local copy and tell the other workers to drop theirs.
+
+        ``force`` moves ``generation`` even if the movie rows come back
+        unchanged, for views that also show other data (e.g. review
+        sentiments after a rescore).
+        """
+        with self._lock:
+            self._movies = None
+            self._counters["invalidations"] += 1
+            if force:
+                self._generation += 1
+        if self.stamp:
+            try:
+                self.stamp.bump()
+            except Exception as e:
+                print("[CATALOG CACHE] version stamp bump failed:", e)
+
+    # ----- metrics -----
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+            stats["load_avg_ms"] = (
+                round(self._load_seconds / stats["loads"] * 1000, 1) if stats["loads"] else 0.0
+            )
+            stats["size"] = len(self._movies) if self._movies is not None else 0
+            stats["age_seconds"] = (
+                round(time.time() - self._loaded_at, 1) if self._movies is not None else None
+            )
+        stats["ttl_seconds"] = self.ttl
+        stats["shared_stamp"] = type(self.stamp).__name__ if self.stamp else None
+        return stats
@@ -0,0 +1,292 @@
+import bisect
+import re
+import threading
+
+from markupsafe import Markup, escape
+
+from search_index import PREFIX_EXPANSIONS, PREFIX_MIN_LENGTH, tokenize
+
+COMMENT_SEARCH_LIMIT = 20
+
+_WORD = re.compile(r"\w+")
+
+
+# ================= POSTING ENCODING =================
+def encode_delta(out, delta):
+    """Append ``delta`` to ``out`` as a varint (7 bits per byte)."""
+    while delta >= 0x80:
+        out.append(delta & 0x7F | 0x80)
+        delta >>= 7
+    out.append(delta)
+
+
+def decode_postings(data):
+    """Delta-encoded varints -> ascending doc numbers."""
+    docs = []
+    doc = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            doc += value
+            docs.append(doc)
+            value = shift = 0
+    return docs
+
+
+def encode_postings(docs):
+    out = bytearray()
+    previous = 0
+    for doc in docs:
+        encode_delta(out, doc - previous)
+        previous = doc
+    return out
+
+
+def entry_docs(entry):
+    """Doc numbers of a posting list: a bare doc number or [last, deltas]."""
+    if isinstance(entry, int):
+        return [entry]
+    return decode_postings(entry[1])
+
+
+def highlight(text, terms):
+    """HTML-escaped ``text`` with words whose tokens are in ``terms`` wrapped
+    in <mark>."""
+    parts = []
+    end = 0
+    for match in _WORD.finditer(text or ""):
+        if any(token in terms for token in tokenize(match.group())):
+            parts.append(escape(text[end:match.start()]))
+            parts.append(Markup("<mark>%s</mark>") % match.group())
+            end = match.end()
+    parts.append(escape((text or "")[end:]))
+    return Markup("").join(parts)
+
+
+# ================= COMMENT INDEX =================
+class CommentIndex:
+    """Inverted index over review comments, for moderation search.
+
+    Feedback ids are mapped to small integers ("doc numbers"), handed out
+    in (timestamp, id) order by ``rebuild()`` and in arrival order after
+    that, so they follow review time. Every term keeps one posting list
+    per movie: the doc numbers of that movie's reviews using the term,
+    stored as varint deltas in a bytearray (typically 1-2 bytes a
+    posting) next to the last doc number. Most lists hold a single
+    review, so those are stored as the bare doc number instead. New
+    reviews append to the end of their lists; deletes rewrite the few
+    lists the comment's terms touch and leave an empty doc slot, which
+    the next ``rebuild()`` compacts away.
+
+    Query tokens match terms exactly or by prefix and are ANDed, so a
+    search reads only the lists of its terms, and only one movie's lists
+    when filtered by movie.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._doc_numbers = {}
+        self._docs = []
+        self._postings = {}
+        self._vocabulary = []
+        self._pending = None
+
+    # ----- writes -----
+    def add(self, feedback):
+        with self._lock:
+            self._remove(feedback["id"], feedback.get("comment"))
+            self._add(feedback)
+            if self._pending is not None:
+                self._pending.append((True, feedback))
+
+    def remove(self, feedback):
+        with self._lock:
+            self._remove(feedback["id"], feedback.get("comment"))
+            if self._pending is not None:
+                self._pending.append((False, feedback))
+
+    def remove_movie(self, movie_id):
+        with self._lock:
+            docs = set()
+            for term in list(self._postings):
+                lists = self._postings[term]
+                entry = lists.pop(movie_id, None)
+                if entry is None:
+                    continue
+                docs.update(entry_docs(entry))
+                if not lists:
+                    self._drop_term(term)
+            for doc in docs:
+                self._doc_numbers.pop(self._docs[doc][1], None)
+                self._docs[doc] = None
+
+    def rebuild(self, feedbacks):
+        """Re-index from a full read of the store, swapping the new index in
+        at once. Writes made while ``feedbacks`` is being read are replayed
+        on top, so none are lost."""
+        with self._lock:
+            self._pending = []
+        try:
+            index = CommentIndex()
+            for feedback in sorted(feedbacks, key=lambda f: (f["timestamp"], f["id"])):
+                index._add(feedback)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for added, feedback in self._pending:
+                index._remove(feedback["id"], feedback.get("comment"))
+                if added:
+                    index._add(feedback)
+            index._compact()
+            self._doc_numbers = index._doc_numbers
+            self._docs = index._docs
+            self._postings = index._postings
+            self._vocabulary = index._vocabulary
+            self._pending = None
+
+    def _add(self, feedback):
+        doc = len(self._docs)
+        movie_id = feedback["movie_id"]
+        self._docs.append((feedback["timestamp"], feedback["id"], movie_id))
+        self._doc_numbers[feedback["id"]] = doc
+
+        for term in set(tokenize(feedback.get("comment"))):
+            lists = self._postings.get(term)
+            if lists is None:
+                lists = self._postings[term] = {}
+                bisect.insort(self._vocabulary, term)
+            entry = lists.get(movie_id)
+            if entry is None:
+                lists[movie_id] = doc
+            elif isinstance(entry, int):
+                lists[movie_id] = [doc, encode_postings([entry, doc])]
+            else:
+                # Doc numbers only grow: append the gap to the last one
+                encode_delta(entry[1], doc - entry[0])
+                entry[0] = doc
+
+    def _remove(self, feedback_id, comment):
+        doc = self._doc_numbers.pop(feedback_id, None)
+        if doc is None:
+            return
+        movie_id = self._docs[doc][2]
+        self._docs[doc] = None
+
+        for term in set(tokenize(comment)):
+            lists = self._postings.get(term)
+            entry = lists.get(movie_id) if lists else None
+            if entry is None:
+                continue
+            docs = [d for d in entry_docs(entry) if d != doc]
+            if len(docs) > 1:
+                lists[movie_id] = [docs[-1], encode_postings(docs)]
+                continue
+            if docs:
+                lists[movie_id] = docs[0]
+                continue
+            del lists[movie_id]
+            if not lists:
+                self._drop_term(term)
+
+    def _compact(self):
+        """Renumber the docs densely, dropping the slots deleted reviews
+        left behind (None) and rewriting the posting lists to match."""
+        if len(self._doc_numbers) == len(self._docs):
+            return
+        renumber = {}
+        docs = []
+        for old, doc in enumerate(self._docs):
+            if doc is not None:
+                renumber[old] = len(docs)
+                docs.append(doc)
+        for lists in self._postings.values():
+            for movie_id, entry in lists.items():
+                numbers = [renumber[d] for d in entry_docs(entry)]
+                lists[movie_id] = numbers[0] if len(numbers) == 1 else [numbers[-1], encode_postings(numbers)]
+        self._docs = docs
+        self._doc_numbers = {doc[1]: number for number, doc in enumerate(docs)}
+
+    def _drop_term(self, term):
+        del self._postings[term]
+        del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+    # ----- reads -----
+    def search(self, query, movie_id=None, after=None, limit=COMMENT_SEARCH_LIMIT):
+        """Newest-first page of the reviews matching every token of ``query``.
+
+        ``after`` is the ``(timestamp, id)`` key of the last hit of the
+        previous page. Returns ``{"total", "hits", "next_key", "terms"}``
+        where hits are ``(timestamp, feedback_id, movie_id)`` and terms are
+        the indexed words the query matched (for highlighting).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {"total": 0, "hits": [], "next_key": None, "terms": set()}
+
+        with self._lock:
+            terms = set()
+            docs = None
+            matches = []
+            for token in tokens:
+                token_terms = self._expand(token)
+                terms.update(token_terms)
+                matches.append(self._docs_for(token_terms, movie_id))
+            # Smallest set first keeps the intersection cheap
+            for token_docs in sorted(matches, key=len):
+                docs = token_docs if docs is None else docs & token_docs
+                if not docs:
+                    break
+            hits = sorted((self._docs[doc] for doc in docs), reverse=True)
+
+        total = len(hits)
+        if after is not None:
+            after = tuple(after)
+            hits = [hit for hit in hits if hit[:2] < after]
+        page = hits[:limit]
+        next_key = page[-1][:2] if len(hits) > limit else None
+        return {"total": total, "hits": page, "next_key": next_key, "terms": terms}
+
+    def _expand(self, token):
+        terms = [token] if token in self._postings else []
+        if len(token) >= PREFIX_MIN_LENGTH:
+            i = bisect.bisect_right(self._vocabulary, token)
+            for term in self._vocabulary[i:i + PREFIX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                terms.append(term)
+        return terms
+
+    def _docs_for(self, terms, movie_id):
+        docs = set()
+        for term in terms:
+            lists = self._postings[term]
+            if movie_id is not None:
+                entry = lists.get(movie_id)
+                if entry is not None:
+                    docs.update(entry_docs(entry))
+            else:
+                for entry in lists.values():
+                    docs.update(entry_docs(entry))
+        return docs
+
+    def stats(self):
+        with self._lock:
+            return {
+                "feedbacks": len(self._doc_numbers),
+                "deleted_slots": len(self._docs) - len(self._doc_numbers),
+                "terms": len(self._postings),
+                "posting_lists": sum(len(lists) for lists in self._postings.values()),
+                "posting_bytes": sum(
+                    len(entry[1])
+                    for lists in self._postings.values() for entry in lists.values()
+                    if not isinstance(entry, int)
+                )
+            }
+
+    def __len__(self):
+        return len(self._doc_numbers)
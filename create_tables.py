@@ -0,0 +1,129 @@
+"""Create the CinemaPulse DynamoDB tables and secondary indexes.
+
+Run once per environment before starting aws_app.py:
+
+    python create_tables.py
+    python create_tables.py --endpoint-url http://localhost:8000
+
+Existing tables are left alone, but missing feedback GSIs are added, one
+at a time, and the script returns once they have finished backfilling.
+"""
+import argparse
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+REGION = "us-east-1"
+
+# Feedback GSIs: (index name, partition key); both sorted by timestamp
+FEEDBACK_INDEXES = [
+    ("movie_id-timestamp", "movie_id"),
+    ("user_email-timestamp", "user_email"),
+]
+
+TABLES = {
+    "CinemaPulse-Users": "email",
+    "CinemaPulse-Movies": "id",
+    "CinemaPulse-Feedbacks": "id",
+    "CinemaPulse-Analytics": "movie_id",
+}
+
+
+def feedback_index_spec(index_name, partition_key):
+    return {
+        "IndexName": index_name,
+        "KeySchema": [
+            {"AttributeName": partition_key, "KeyType": "HASH"},
+            {"AttributeName": "timestamp", "KeyType": "RANGE"}
+        ],
+        "Projection": {"ProjectionType": "ALL"}
+    }
+
+
+def feedback_attribute_definitions():
+    names = ["id", "timestamp"] + [key for _, key in FEEDBACK_INDEXES]
+    return [{"AttributeName": name, "AttributeType": "S"} for name in names]
+
+
+def create_table(dynamodb, name, key):
+    params = {
+        "TableName": name,
+        "KeySchema": [{"AttributeName": key, "KeyType": "HASH"}],
+        "AttributeDefinitions": [{"AttributeName": key, "AttributeType": "S"}],
+        "BillingMode": "PAY_PER_REQUEST"
+    }
+
+    if name == "CinemaPulse-Feedbacks":
+        params["AttributeDefinitions"] = feedback_attribute_definitions()
+        params["GlobalSecondaryIndexes"] = [
+            feedback_index_spec(index_name, partition_key)
+            for index_name, partition_key in FEEDBACK_INDEXES
+        ]
+
+    table = dynamodb.create_table(**params)
+    table.wait_until_exists()
+    print(f"[CREATED] {name}")
+    return table
+
+
+def wait_for_indexes(table, poll_interval=5.0):
+    """Block until the table is ACTIVE and no GSI is still being built."""
+    client = table.meta.client
+    while True:
+        description = client.describe_table(TableName=table.name)["Table"]
+        statuses = [i.get("IndexStatus") for i in description.get("GlobalSecondaryIndexes", [])]
+        if description["TableStatus"] == "ACTIVE" and all(s == "ACTIVE" for s in statuses):
+            return description
+        time.sleep(poll_interval)
+
+
+def ensure_feedback_indexes(table):
+    existing = {
+        i["IndexName"] for i in wait_for_indexes(table).get("GlobalSecondaryIndexes", [])
+    }
+
+    # DynamoDB only accepts one GSI creation per UpdateTable call, and
+    # rejects it while another index is still backfilling
+    created = False
+    for index_name, partition_key in FEEDBACK_INDEXES:
+        if index_name in existing:
+            continue
+        wait_for_indexes(table)
+        table.meta.client.update_table(
+            TableName=table.name,
+            AttributeDefinitions=feedback_attribute_definitions(),
+            GlobalSecondaryIndexUpdates=[
+                {"Create": feedback_index_spec(index_name, partition_key)}
+            ]
+        )
+        print(f"[INDEX REQUESTED] {table.name}.{index_name}")
+        created = True
+
+    if created:
+        wait_for_indexes(table)
+        print(f"[INDEXES ACTIVE] {table.name}")
+
+
+def create_tables(dynamodb):
+    tables = {}
+    for name, key in TABLES.items():
+        try:
+            tables[name] = create_table(dynamodb, name, key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ResourceInUseException":
+                raise
+            tables[name] = dynamodb.Table(name)
+            print(f"[EXISTS] {name}")
+
+    ensure_feedback_indexes(tables["CinemaPulse-Feedbacks"])
+    return tables
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create CinemaPulse DynamoDB tables")
+    parser.add_argument("--region", default=REGION)
+    parser.add_argument("--endpoint-url")
+    args = parser.parse_args()
+
+    create_tables(boto3.resource("dynamodb", region_name=args.region, endpoint_url=args.endpoint_url))
@@ -0,0 +1,325 @@
+import os
+import pickle
+import re
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single process assumed
+    fcntl = None
+
+# Record header: sequence number, payload length, CRC32 of the payload
+RECORD_HEADER = struct.Struct("<QII")
+SNAPSHOT_MAGIC = b"CPSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sQ")
+
+_SEGMENT = re.compile(r"^wal-(\d{20})\.log$")
+_SNAPSHOT = re.compile(r"^snapshot-(\d{20})\.bin$")
+
+# Held (flock) by the process that owns the directory
+LOCK_NAME = "LOCK"
+
+
+def _fsync_dir(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ================= WRITE-AHEAD LOG =================
+class WriteAheadLog:
+    """Append-only log of table mutations plus periodic snapshots.
+
+    Every mutation is appended as ``(op, args)`` (pickled, framed with its
+    sequence number and a CRC) to the current segment file. ``sync()`` is
+    a group commit: the first waiting thread fsyncs everything written so
+    far and the threads that queued behind it share that fsync. With
+    ``fsync_interval`` set, a background thread fsyncs on that period
+    instead and writers do not wait (a crash loses at most that window).
+
+    Every ``snapshot_every`` records, ``capture()`` is snapshotted in a
+    background thread: the log rotates to a new segment, the state is
+    written to ``snapshot-<seq>.bin`` (temp file, fsync, rename), and the
+    segments and snapshots it covers are deleted. ``recover()`` loads the
+    newest snapshot and yields the records after it; a torn record at the
+    end of the log (a crash mid-write) is cut off.
+
+    Records must be idempotent (the written values, not "flip" or "add 1"),
+    because a snapshot taken while writers run may already include some of
+    the records replayed after it.
+
+    One process owns a directory: opening the log takes an exclusive lock
+    on its LOCK file and fails when another process holds it, and a forked
+    child may not append to its parent's log.
+
+    ``directory=None`` disables the log: every call is a no-op.
+    """
+
+    def __init__(self, directory, capture=None, fsync_interval=0.0, snapshot_every=100000):
+        self.directory = directory
+        self.capture = capture
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+
+        self._lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._snapshot_lock = threading.Lock()
+        self._file = None
+        self._seq = 0
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+        self._snapshot_seq = 0
+        self._snapshot_due = False
+        self._stats = {"records": 0, "bytes": 0, "fsyncs": 0, "snapshots": 0, "snapshot_ms": 0.0}
+        self._pid = os.getpid()
+        self._lock_file = None
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._acquire_directory()
+            if fsync_interval:
+                threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def _acquire_directory(self):
+        self._lock_file = open(os.path.join(self.directory, LOCK_NAME), "a+")
+        if fcntl is None:
+            return
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(
+                f"Data directory {self.directory} is in use by another process; "
+                "run one process per directory (CINEMAPULSE_STORAGE=sqlite:<path> for several workers)"
+            ) from None
+
+    def _release_directory(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # ----- recovery -----
+    def recover(self):
+        """-> (snapshot state or None, iterator of (op, args) after it).
+
+        The iterator must be consumed before the first ``append()``.
+        """
+        if not self.enabled:
+            return None, iter(())
+
+        state = None
+        for seq, path in reversed(self._files(_SNAPSHOT)):
+            try:
+                state = self._read_snapshot(path, seq)
+                self._seq = self._written = self._synced = self._snapshot_seq = seq
+                break
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+                print(f"Skipping unreadable snapshot {path}: {e}")
+        return state, self._replay()
+
+    def _replay(self):
+        segments = self._files(_SEGMENT)
+        for i, (_, path) in enumerate(segments):
+            with open(path, "rb") as f:
+                offset = 0
+                while True:
+                    header = f.read(RECORD_HEADER.size)
+                    if not header:
+                        break
+                    data = b""
+                    if len(header) == RECORD_HEADER.size:
+                        seq, length, crc = RECORD_HEADER.unpack(header)
+                        data = f.read(length)
+                    if len(header) < RECORD_HEADER.size or len(data) < length or zlib.crc32(data) != crc:
+                        # Torn write from a crash: drop it so new segments follow good data
+                        print(f"Truncating torn WAL record in {path} at byte {offset}")
+                        os.truncate(path, offset)
+                        for _, later in segments[i + 1:]:
+                            os.remove(later)
+                        return
+                    offset += RECORD_HEADER.size + length
+                    if seq <= self._seq:
+                        continue
+                    self._seq = self._written = self._synced = seq
+                    yield pickle.loads(data)
+
+    # ----- writes -----
+    def append(self, op, *args):
+        """Write one record (buffered) and return its sequence number."""
+        if not self.enabled:
+            return 0
+        if os.getpid() != self._pid:
+            raise RuntimeError(
+                f"Data directory {self.directory} belongs to process {self._pid}; "
+                "a forked worker cannot write to it (use CINEMAPULSE_STORAGE=sqlite:<path>)"
+            )
+        data = pickle.dumps((op, args), pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._seq += 1
+            if self._file is None:
+                self._open_segment(self._seq)
+            self._file.write(RECORD_HEADER.pack(self._seq, len(data), zlib.crc32(data)))
+            self._file.write(data)
+            self._written = seq = self._seq
+            self._stats["records"] += 1
+            self._stats["bytes"] += RECORD_HEADER.size + len(data)
+            due = (self.capture is not None and not self._snapshot_due
+                   and seq - self._snapshot_seq >= self.snapshot_every)
+            if due:
+                self._snapshot_due = True
+        if due:
+            threading.Thread(target=self._background_snapshot, daemon=True).start()
+        return seq
+
+    def sync(self, seq):
+        """Block until record ``seq`` is on disk (no wait with fsync_interval)."""
+        if not self.enabled or self.fsync_interval:
+            return
+        with self._sync_cond:
+            while self._synced < seq and self._syncing:
+                self._sync_cond.wait()
+            if self._synced >= seq:
+                return
+            self._syncing = True
+        self._sync_now(leader=True)
+
+    def commit(self, op, *args):
+        self.sync(self.append(op, *args))
+
+    def _sync_now(self, leader=False, close=False):
+        """fsync what has been written; returns the last sequence number
+        covered. ``close`` also ends the segment, so the next record starts
+        a new file."""
+        if not leader:
+            with self._sync_cond:
+                while self._syncing:
+                    self._sync_cond.wait()
+                self._syncing = True
+        target = 0
+        try:
+            with self._lock:
+                target = self._written
+                f = self._file
+                if f is not None:
+                    f.flush()
+                    if close:
+                        self._file = None
+            if f is not None:
+                # Appends keep going into the buffer while this fsync runs
+                os.fsync(f.fileno())
+                self._stats["fsyncs"] += 1
+                if close:
+                    f.close()
+        finally:
+            with self._sync_cond:
+                self._synced = max(self._synced, target)
+                self._syncing = False
+                self._sync_cond.notify_all()
+        return target
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.fsync_interval)
+            if self._synced < self._written:
+                self._sync_now()
+
+    def _open_segment(self, first_seq):
+        path = os.path.join(self.directory, f"wal-{first_seq:020d}.log")
+        self._file = open(path, "ab", buffering=1024 * 1024)
+        _fsync_dir(self.directory)
+
+    # ----- snapshots -----
+    def snapshot(self, capture=None):
+        """Write a snapshot of ``capture()`` and drop the log it replaces."""
+        capture = capture or self.capture
+        if not self.enabled or capture is None:
+            return
+        with self._snapshot_lock:
+            start = time.perf_counter()
+            # Records up to seq go to disk and the next one opens a new
+            # segment; capturing after this point includes all of them
+            seq = self._sync_now(close=True)
+            state = capture()
+
+            path = os.path.join(self.directory, f"snapshot-{seq:020d}.bin")
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, seq))
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            _fsync_dir(self.directory)
+
+            self._snapshot_seq = seq
+            self._prune(seq)
+            self._stats["snapshots"] += 1
+            self._stats["snapshot_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _background_snapshot(self):
+        try:
+            self.snapshot()
+        except Exception as e:
+            print("Snapshot error:", e)
+        finally:
+            self._snapshot_due = False
+
+    def _read_snapshot(self, path, seq):
+        with open(path, "rb") as f:
+            magic, stored_seq = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+            if magic != SNAPSHOT_MAGIC or stored_seq != seq:
+                raise ValueError("bad snapshot header")
+            return pickle.load(f)
+
+    def _prune(self, seq):
+        for snapshot_seq, path in self._files(_SNAPSHOT):
+            if snapshot_seq < seq:
+                os.remove(path)
+        # Segments are closed at seq, so any starting at or before it holds
+        # only records the snapshot covers
+        for first_seq, path in self._files(_SEGMENT):
+            if first_seq <= seq:
+                os.remove(path)
+
+    def _files(self, pattern):
+        found = []
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    # ----- shutdown / metrics -----
+    def close(self, snapshot=True):
+        """Flush the log, snapshotting first if this process wrote records
+        since the last snapshot (a process that only recovered leaves the
+        directory alone)."""
+        if not self.enabled or os.getpid() != self._pid:
+            return
+        try:
+            if snapshot and self.capture and self._stats["records"] and self._seq > self._snapshot_seq:
+                self.snapshot()
+            else:
+                self._sync_now(close=True)
+        finally:
+            self._release_directory()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "seq": self._seq,
+                "unsynced": self._written - self._synced,
+                "since_snapshot": self._seq - self._snapshot_seq
+            }
@@ -0,0 +1,254 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import phase, submit
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_LIMIT = 100
+# BatchWriteItem accepts at most 25 requests
+BATCH_WRITE_LIMIT = 25
+
+
+# ================= PROJECTIONS =================
+def projection_kwargs(attributes, kwargs=None):
+    """Build ProjectionExpression kwargs for a list of attribute names.
+
+    Every attribute is aliased (``#p0``, ``#p1`` ...) so reserved words such
+    as ``name``, ``comment`` or ``timestamp`` can be projected safely.
+    """
+    kwargs = dict(kwargs or {})
+    if not attributes:
+        return kwargs
+
+    names = dict(kwargs.get("ExpressionAttributeNames", {}))
+    aliases = []
+    for i, attribute in enumerate(attributes):
+        alias = f"#p{i}"
+        names[alias] = attribute
+        aliases.append(alias)
+
+    kwargs["ProjectionExpression"] = ", ".join(aliases)
+    kwargs["ExpressionAttributeNames"] = names
+    return kwargs
+
+
+# ================= PAGINATED SCANS =================
+def iter_scan_pages(table, attributes=None, **kwargs):
+    """Yield every page of a scan, following LastEvaluatedKey."""
+    kwargs = projection_kwargs(attributes, kwargs)
+
+    while True:
+        res = table.scan(**kwargs)
+        yield res.get("Items", [])
+
+        last_key = res.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def scan_all(table, attributes=None, **kwargs):
+    items = []
+    for page in iter_scan_pages(table, attributes, **kwargs):
+        items.extend(page)
+    return items
+
+
+def _scan_segment(client, table_name, attributes, **kwargs):
+    """Scan one segment through the table's client -> all of its items."""
+    kwargs = projection_kwargs(attributes, kwargs)
+    items = []
+    while True:
+        res = client.scan(TableName=table_name, **kwargs)
+        items.extend(res.get("Items", []))
+
+        last_key = res.get("LastEvaluatedKey")
+        if not last_key:
+            return items
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def parallel_scan(table, segments=4, attributes=None, **kwargs):
+    """Scan ``TotalSegments`` segments concurrently and merge the results.
+
+    boto3 resources are not thread-safe, so the segments share the table's
+    client instead (clients are). The resource registered its item
+    (de)serialization on that client, so items still come back as plain
+    Python values.
+    """
+    if segments <= 1:
+        return scan_all(table, attributes, **kwargs)
+
+    # The request waits on the segments: that wall time is its fetch time
+    with phase("fetch"), ThreadPoolExecutor(max_workers=segments) as pool:
+        futures = [
+            submit(pool, _scan_segment, table.meta.client, table.name, attributes,
+                   Segment=segment, TotalSegments=segments, **kwargs)
+            for segment in range(segments)
+        ]
+        items = []
+        for future in futures:
+            items.extend(future.result())
+    return items
+
+
+# ================= INDEX QUERIES =================
+def query_index(table, index_name, key_condition, limit=None, newest_first=True,
+                page_size=None, attributes=None, **kwargs):
+    """Query a GSI page by page, stopping once ``limit`` items are collected.
+
+    Items come back in sort-key order; with ``newest_first`` the index is
+    read backwards (``ScanIndexForward=False``). Unbounded reads get the
+    full 1 MB pages DynamoDB returns without a ``Limit``.
+    """
+    items = []
+    for page in iter_query_pages(table, index_name, key_condition, newest_first,
+                                 page_size, attributes, limit=limit, **kwargs):
+        items.extend(page)
+    return items
+
+
+def iter_query_pages(table, index_name, key_condition, newest_first=True,
+                     page_size=None, attributes=None, limit=None, **kwargs):
+    """Yield GSI query pages, following LastEvaluatedKey.
+
+    ``Limit`` is only sent to stop at ``limit`` items, or to cap pages at
+    ``page_size`` for a caller that works page by page.
+    """
+    kwargs = projection_kwargs(attributes, kwargs)
+    kwargs.update(
+        IndexName=index_name,
+        KeyConditionExpression=key_condition,
+        ScanIndexForward=not newest_first
+    )
+
+    fetched = 0
+    while limit is None or fetched < limit:
+        caps = [n for n in (page_size, None if limit is None else limit - fetched) if n is not None]
+        if caps:
+            kwargs["Limit"] = min(caps)
+        res = table.query(**kwargs)
+        page = res.get("Items", [])
+        fetched += len(page)
+        yield page
+
+        last_key = res.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def query_page(table, index_name, key_condition, limit, start_key=None,
+               newest_first=True, attributes=None, **kwargs):
+    """Fetch a single GSI page -> (items, last_evaluated_key or None)."""
+    kwargs = projection_kwargs(attributes, kwargs)
+    kwargs.update(
+        IndexName=index_name,
+        KeyConditionExpression=key_condition,
+        ScanIndexForward=not newest_first,
+        Limit=limit
+    )
+    if start_key:
+        kwargs["ExclusiveStartKey"] = start_key
+
+    res = table.query(**kwargs)
+    return res.get("Items", []), res.get("LastEvaluatedKey")
+
+
+def count_index(table, index_name, key_condition, **kwargs):
+    """Count the items matching a GSI key condition (``Select=COUNT``)."""
+    kwargs.update(IndexName=index_name, KeyConditionExpression=key_condition, Select="COUNT")
+    count = 0
+    while True:
+        res = table.query(**kwargs)
+        count += res.get("Count", 0)
+
+        last_key = res.get("LastEvaluatedKey")
+        if not last_key:
+            return count
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+# ================= BATCH READS =================
+def _batch_get_chunk(client, table_name, keys, attributes, max_retries, base_delay):
+    request = {table_name: projection_kwargs(attributes, {"Keys": keys})}
+    items = []
+
+    for attempt in range(max_retries + 1):
+        res = client.batch_get_item(RequestItems=request)
+        items.extend(res.get("Responses", {}).get(table_name, []))
+
+        request = res.get("UnprocessedKeys") or {}
+        if not request:
+            return items
+
+        # Exponential backoff with jitter before retrying throttled keys
+        time.sleep(base_delay * (2 ** attempt) * (1 + random.random()))
+
+    # Still throttled: read the rest one GetItem at a time, which raises
+    # rather than dropping keys once its own retries run out
+    keys = request[table_name]["Keys"]
+    print(f"[BATCH GET] {len(keys)} keys from {table_name} left unprocessed, reading them one by one")
+    for key in keys:
+        item = client.get_item(TableName=table_name, Key=key, **projection_kwargs(attributes)).get("Item")
+        if item is not None:
+            items.append(item)
+    return items
+
+
+def batch_get(dynamodb, table_name, keys, attributes=None, max_workers=4,
+              max_retries=5, base_delay=0.05):
+    """Fetch many items by key with BatchGetItem.
+
+    Keys are de-duplicated and split into chunks of 100 which are issued
+    concurrently; ``UnprocessedKeys`` are retried with backoff, and keys
+    still unprocessed after ``max_retries`` are read with GetItem, so
+    every stored item comes back (or an error is raised). Like
+    ``parallel_scan``, the chunks go through the resource's client, which
+    is thread-safe and still (de)serializes items.
+    """
+    unique = list({tuple(sorted(k.items())): k for k in keys}.values())
+    chunks = [unique[i:i + BATCH_GET_LIMIT] for i in range(0, len(unique), BATCH_GET_LIMIT)]
+    if not chunks:
+        return []
+
+    client = dynamodb.meta.client
+
+    def fetch(chunk):
+        return _batch_get_chunk(client, table_name, chunk, attributes, max_retries, base_delay)
+
+    if len(chunks) == 1:
+        return fetch(chunks[0])
+
+    items = []
+    with phase("fetch"), ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        futures = [submit(pool, fetch, chunk) for chunk in chunks]
+        for future in futures:
+            items.extend(future.result())
+    return items
+
+
+# ================= BATCH WRITES =================
+def batch_delete(client, table_name, keys, max_retries=5, base_delay=0.05):
+    """Delete keys with BatchWriteItem (25 per request); returns len(keys).
+
+    Takes the resource's client rather than a Table so it can run in pool
+    threads. ``UnprocessedItems`` are retried with backoff, and keys still
+    unprocessed after ``max_retries`` are deleted with DeleteItem, which
+    raises rather than leaving them behind.
+    """
+    for i in range(0, len(keys), BATCH_WRITE_LIMIT):
+        request = {table_name: [{"DeleteRequest": {"Key": key}} for key in keys[i:i + BATCH_WRITE_LIMIT]]}
+
+        for attempt in range(max_retries + 1):
+            request = client.batch_write_item(RequestItems=request).get("UnprocessedItems") or {}
+            if not request:
+                break
+            time.sleep(base_delay * (2 ** attempt) * (1 + random.random()))
+        else:
+            left = request[table_name]
+            print(f"[BATCH DELETE] {len(left)} keys from {table_name} left unprocessed, deleting them one by one")
+            for entry in left:
+                client.delete_item(TableName=table_name, Key=entry["DeleteRequest"]["Key"])
+    return len(keys)
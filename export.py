@@ -0,0 +1,264 @@
+"""Streaming export of feedbacks, movies and analytics as JSONL, CSV or Parquet.
+
+Rows come from a generator over the tables (paginated DynamoDB scans, or
+the storage's iterators in app.py), are projected to the requested
+columns and encoded a chunk at a time, so memory stays bounded by one
+chunk whatever the table size. The same generator backs the admin
+endpoint (a chunked HTTP response) and the CLI (a file):
+
+    python export.py feedbacks --format csv --columns id,movie_id,rating --since "2025-01-01" -o feedbacks.csv
+
+``--since`` (``YYYY-MM-DD[ HH:MM]``) keeps feedbacks written, or analytics
+updated, at or after that time, for incremental exports. The CLI reads
+the DynamoDB tables used by aws_app.py; with ``--app`` it reads app.py's
+storage instead. Both apps serve GET /admin/export/<dataset>.
+
+Parquet needs the optional ``pyarrow`` package.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+from analytics import AGGREGATE_FIELDS
+
+# Column -> Parquet type, in default export order; "since" is the
+# timestamp column --since filters on (None: not supported)
+DATASETS = {
+    "feedbacks": {
+        "columns": {
+            "id": "string", "user_email": "string", "movie_id": "string", "rating": "int64",
+            "comment": "string", "sentiment": "string", "timestamp": "string"
+        },
+        "since": "timestamp"
+    },
+    "movies": {
+        "columns": {
+            "id": "string", "name": "string", "genre": "string", "language": "string",
+            "image": "string", "rating": "float64"
+        },
+        "since": None
+    },
+    "analytics": {
+        "columns": {
+            "movie_id": "string", "score": "float64", "trend": "string", "last_updated": "string",
+            **{field: "int64" for field in AGGREGATE_FIELDS}
+        },
+        "since": "last_updated"
+    },
+}
+
+FORMATS = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Encoded bytes gathered before a chunk is handed on (JSONL / CSV)
+CHUNK_BYTES = 64 * 1024
+# Rows per Parquet row group (each one is a chunk)
+PARQUET_ROW_GROUP = 10000
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+
+
+# ================= REQUEST =================
+def parse_export_args(dataset, fmt="jsonl", columns=None, since=None):
+    """Validate an export request -> (dataset, format, columns, since);
+    ValueError with a message for the client otherwise."""
+    spec = DATASETS.get(dataset)
+    if spec is None:
+        raise ValueError(f"Unknown dataset {dataset!r} (use {', '.join(DATASETS)})")
+
+    fmt = (fmt or "jsonl").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (use {', '.join(FORMATS)})")
+    if fmt == "parquet":
+        _pyarrow()
+
+    if columns:
+        columns = [column.strip() for column in columns.split(",") if column.strip()]
+        unknown = [column for column in columns if column not in spec["columns"]]
+        if unknown:
+            raise ValueError(f"Unknown columns for {dataset}: {', '.join(unknown)}")
+    else:
+        columns = list(spec["columns"])
+
+    if since:
+        if not spec["since"]:
+            raise ValueError(f"since is not supported for {dataset}")
+        since = since.strip().replace("T", " ")
+        for pattern in (TIMESTAMP_FORMAT, "%Y-%m-%d"):
+            try:
+                since = datetime.strptime(since[:16], pattern).strftime(TIMESTAMP_FORMAT)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("since must be YYYY-MM-DD or YYYY-MM-DD HH:MM")
+
+    return dataset, fmt, columns, since or None
+
+
+def export_filename(dataset, fmt, since=None):
+    suffix = f"-since-{since[:10]}" if since else ""
+    return f"cinemapulse-{dataset}{suffix}.{fmt}"
+
+
+# ================= ROWS =================
+def _plain(value):
+    """DynamoDB numbers come back as Decimal."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def project(rows, columns):
+    for row in rows:
+        yield {column: _plain(row.get(column)) for column in columns}
+
+
+def since_filter(rows, field, since):
+    """Rows whose ``field`` (a sortable timestamp string) is >= ``since``;
+    for sources that cannot filter on their own."""
+    if not since:
+        return rows
+    return (row for row in rows if (row.get(field) or "") >= since)
+
+
+# ================= ENCODERS =================
+def _jsonl_chunks(rows):
+    buffer, size = [], 0
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def _csv_chunks(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(["" if row[column] is None else row[column] for column in columns])
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _pyarrow():
+    try:
+        import pyarrow  # optional dependency, only needed for Parquet
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet export needs the pyarrow package (pip install pyarrow)") from None
+    return pyarrow, pyarrow.parquet
+
+
+class _ByteSink:
+    """Write-only file object for ParquetWriter; ``drain()`` hands over
+    what was written since the last call."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _parquet_chunks(rows, columns, types):
+    pa, pq = _pyarrow()
+    schema = pa.schema([(column, getattr(pa, types[column])()) for column in columns])
+    sink = _ByteSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def write_group(group):
+        writer.write_table(pa.Table.from_pylist(group, schema=schema))
+
+    group = []
+    for row in rows:
+        group.append(row)
+        if len(group) >= PARQUET_ROW_GROUP:
+            write_group(group)
+            group = []
+            yield sink.drain()
+    if group:
+        write_group(group)
+    writer.close()
+    yield sink.drain()
+
+
+def encode(rows, dataset, fmt, columns):
+    """Projected ``rows`` -> a generator of encoded byte chunks."""
+    if fmt == "csv":
+        return _csv_chunks(rows, columns)
+    if fmt == "parquet":
+        return _parquet_chunks(rows, columns, DATASETS[dataset]["columns"])
+    return _jsonl_chunks(rows)
+
+
+def stream_export(rows, dataset, fmt, columns):
+    """Source rows -> encoded chunks of the requested columns."""
+    return encode(project(rows, columns), dataset, fmt, columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export feedbacks, movies or analytics")
+    parser.add_argument("dataset", choices=list(DATASETS))
+    parser.add_argument("--format", default="jsonl", choices=list(FORMATS))
+    parser.add_argument("--columns", help="comma-separated columns (default: all)")
+    parser.add_argument("--since", help="only rows written/updated at or after YYYY-MM-DD[ HH:MM]")
+    parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    parser.add_argument("--app", action="store_true",
+                        help="export app.py's storage instead of the DynamoDB tables")
+    args = parser.parse_args()
+
+    try:
+        dataset, fmt, columns, since = parse_export_args(args.dataset, args.format, args.columns, args.since)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.app:
+        import app as source
+    else:
+        import aws_app as source
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        for chunk in stream_export(source.export_rows(dataset, columns, since), dataset, fmt, columns):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    print(f"[EXPORT DONE] {dataset}: {written} bytes", file=sys.stderr)
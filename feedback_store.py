@@ -0,0 +1,153 @@
+from bisect import bisect_left, insort
+
+
+# ================= FEEDBACK STORE =================
+class FeedbackStore:
+    """In-memory feedback table with secondary indexes.
+
+    Feedbacks live in a primary dict keyed by feedback id. Two secondary
+    indexes (by ``movie_id`` and by ``user_email``) hold ``(timestamp, id)``
+    pairs kept sorted with ``bisect``, so per-movie / per-user reads cost
+    O(k) and single deletes cost O(log n) to locate the entry.
+    """
+
+    def __init__(self, items=None):
+        self._by_id = {}
+        self._by_movie = {}
+        self._by_user = {}
+        self.load(items or [])
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, feedback_id):
+        return feedback_id in self._by_id
+
+    @staticmethod
+    def _sort_key(feedback):
+        return (feedback["timestamp"], feedback["id"])
+
+    @staticmethod
+    def _index_remove(index, key, sort_key):
+        entries = index.get(key)
+        if not entries:
+            return
+        pos = bisect_left(entries, sort_key)
+        if pos < len(entries) and entries[pos] == sort_key:
+            del entries[pos]
+        if not entries:
+            del index[key]
+
+    def _resolve(self, entries, newest_first, limit):
+        ordered = reversed(entries) if newest_first else iter(entries)
+        result = []
+        for _, feedback_id in ordered:
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(self._by_id[feedback_id])
+        return result
+
+    def add(self, feedback):
+        if feedback["id"] in self._by_id:
+            self.remove(feedback["id"])
+
+        sort_key = self._sort_key(feedback)
+        self._by_id[feedback["id"]] = feedback
+        insort(self._by_movie.setdefault(feedback["movie_id"], []), sort_key)
+        insort(self._by_user.setdefault(feedback["user_email"], []), sort_key)
+        return feedback
+
+    def load(self, items):
+        """Bulk insert. Index lists this call creates are appended to and
+        sorted once (O(n log n) instead of an insort per item); lists that
+        already exist take an insort per item, so loading a chunk into a
+        large store does not re-sort everything."""
+        items = {item["id"]: item for item in items}
+        for feedback_id in items.keys() & self._by_id.keys():
+            self.remove(feedback_id)
+        new_keys = (set(), set())
+        for item in items.values():
+            self._by_id[item["id"]] = item
+            sort_key = self._sort_key(item)
+            for index, key, created in (
+                (self._by_movie, item["movie_id"], new_keys[0]),
+                (self._by_user, item["user_email"], new_keys[1])
+            ):
+                if key in created:
+                    index[key].append(sort_key)
+                elif key in index:
+                    insort(index[key], sort_key)
+                else:
+                    created.add(key)
+                    index[key] = [sort_key]
+        for index, created in zip((self._by_movie, self._by_user), new_keys):
+            for key in created:
+                index[key].sort()
+
+    def clear(self):
+        self._by_id.clear()
+        self._by_movie.clear()
+        self._by_user.clear()
+
+    def get(self, feedback_id):
+        return self._by_id.get(feedback_id)
+
+    def remove(self, feedback_id):
+        feedback = self._by_id.pop(feedback_id, None)
+        if feedback is None:
+            return None
+
+        sort_key = self._sort_key(feedback)
+        self._index_remove(self._by_movie, feedback["movie_id"], sort_key)
+        self._index_remove(self._by_user, feedback["user_email"], sort_key)
+        return feedback
+
+    def remove_movie(self, movie_id):
+        entries = self._by_movie.pop(movie_id, [])
+        removed = []
+        for sort_key in entries:
+            feedback = self._by_id.pop(sort_key[1])
+            self._index_remove(self._by_user, feedback["user_email"], sort_key)
+            removed.append(feedback)
+        return removed
+
+    def for_movie(self, movie_id, newest_first=True, limit=None):
+        return self._resolve(self._by_movie.get(movie_id, []), newest_first, limit)
+
+    def for_user(self, user_email, newest_first=True, limit=None):
+        return self._resolve(self._by_user.get(user_email, []), newest_first, limit)
+
+    def page_for_movie(self, movie_id, after=None, limit=10):
+        """Newest-first page of a movie's feedbacks.
+
+        ``after`` is the ``(timestamp, id)`` key of the last item of the
+        previous page; returns ``(items, last_key)`` with ``last_key`` None
+        on the final page. Bisecting on the key keeps paging stable when
+        items are added or removed between requests.
+        """
+        entries = self._by_movie.get(movie_id, [])
+        end = len(entries) if after is None else bisect_left(entries, tuple(after))
+        start = max(end - limit, 0)
+        page = [self._by_id[feedback_id] for _, feedback_id in reversed(entries[start:end])]
+        return page, (entries[start] if page and start > 0 else None)
+
+    def scan(self, since=None):
+        """Yield every feedback (with ``timestamp`` >= ``since``) movie by
+        movie, oldest first. Only one movie's index is copied at a time, so
+        writers can carry on and memory stays bounded for large tables."""
+        for movie_id in list(self._by_movie):
+            entries = self._by_movie.get(movie_id, [])
+            start = bisect_left(entries, (since,)) if since else 0
+            for _, feedback_id in entries[start:]:
+                feedback = self._by_id.get(feedback_id)
+                if feedback is not None:
+                    yield feedback
+
+    def count_for_movie(self, movie_id):
+        return len(self._by_movie.get(movie_id, []))
+
+    def count_for_user(self, user_email):
+        return len(self._by_user.get(user_email, []))
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+import uuid
+
+from flask import make_response, request
+
+# Fingerprinted static URLs (?v=<hash>) never change content, so browsers
+# and the CDN may keep them for a year without revalidating
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+
+# ================= DATA VERSION =================
+class DataVersion:
+    """Global version of everything the dashboards and JSON APIs show.
+
+    Every feedback, favorite and movie write calls ``bump()``. By default
+    the version is a process-local counter prefixed with a random token
+    drawn at startup, so a restarted process (or another worker) never
+    reuses an ETag issued for different data; those workers just never
+    match each other's ETags. Pass a shared ``stamp`` (see
+    catalog_cache.make_version_stamp) so a write made through one worker
+    changes the version every worker reports.
+    """
+
+    def __init__(self, stamp=None):
+        self.stamp = stamp
+        self._boot = uuid.uuid4().hex
+        self._local = 0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Current version token, or None when it cannot be determined."""
+        if not self.stamp:
+            return f"{self._boot}.{self._local}"
+        try:
+            return self.stamp.read() or "0"
+        except Exception as e:
+            print("[HTTP CACHE] data version read failed:", e)
+            return None
+
+    def bump(self):
+        with self._lock:
+            self._local += 1
+        if self.stamp:
+            try:
+                self.stamp.bump()
+            except Exception as e:
+                print("[HTTP CACHE] data version bump failed:", e)
+
+
+# ================= CONDITIONAL GET =================
+class HttpCache:
+    """ETag / 304 handling for views, plus fingerprinted static files.
+
+    Routes build an ETag from the data version and whatever else the
+    response depends on (user, query string) *before* fetching any data;
+    a matching ``If-None-Match`` returns 304 straight away.
+    """
+
+    def __init__(self, app, data_version):
+        self.app = app
+        self.data_version = data_version
+        self._static_hashes = {}
+        self._static_lock = threading.Lock()
+
+        # Templates and static assets are part of every ETag, so a deploy
+        # never revalidates a page rendered by the old code
+        self.build_id = self._tree_hash(
+            os.path.join(app.root_path, app.template_folder or "templates"),
+            app.static_folder
+        )
+
+        app.url_defaults(self._fingerprint_static)
+        app.after_request(self._static_cache_headers)
+
+    # ----- ETags -----
+    def etag(self, *parts):
+        version = self.data_version.current()
+        if version is None:
+            return None
+        key = "|".join(str(part) for part in (self.build_id, version) + parts)
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def not_modified(self, etag):
+        """304 response if the client already holds ``etag``, else None."""
+        if etag is None or not request.if_none_match.contains(etag):
+            return None
+        return self.finish(make_response("", 304), etag)
+
+    def finish(self, response, etag):
+        response = make_response(response)
+        if etag is not None:
+            response.set_etag(etag)
+        # Private (per-user pages), and always revalidated: stale data is
+        # never shown, but an unchanged page costs a 304
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    # ----- static files -----
+    def _fingerprint_static(self, endpoint, values):
+        if endpoint != "static" or "v" in values:
+            return
+        digest = self._static_hash(values.get("filename", ""))
+        if digest:
+            values["v"] = digest
+
+    def _static_hash(self, filename):
+        digest = self._static_hashes.get(filename)
+        if digest is None:
+            path = os.path.join(self.app.static_folder, filename)
+            try:
+                with open(path, "rb") as f:
+                    digest = hashlib.md5(f.read()).hexdigest()[:12]
+            except OSError:
+                digest = ""
+            with self._static_lock:
+                self._static_hashes[filename] = digest
+        return digest
+
+    def _static_cache_headers(self, response):
+        if request.endpoint == "static" and response.status_code == 200:
+            filename = (request.view_args or {}).get("filename", "")
+            if request.args.get("v") and request.args["v"] == self._static_hash(filename):
+                response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        return response
+
+    @staticmethod
+    def _tree_hash(*folders):
+        digest = hashlib.sha1()
+        for folder in folders:
+            if not folder or not os.path.isdir(folder):
+                continue
+            for root, dirs, files in os.walk(folder):
+                dirs.sort()
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, folder).encode())
+                    with open(path, "rb") as f:
+                        digest.update(f.read())
+        return digest.hexdigest()[:12]
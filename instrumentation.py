@@ -0,0 +1,513 @@
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, before_render_template, request, template_rendered
+
+# Histogram bucket bounds: seconds, and downstream calls per request
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CALL_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+# Where a request's time goes; "compute" is whatever the other two leave
+PHASES = ("fetch", "compute", "render")
+
+# Distinct stacks kept per profiled request (further ones are dropped)
+PROFILE_MAX_STACKS = 5000
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ================= METRICS =================
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, *extra):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(pair for pair in extra if pair)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CounterMetric:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, constant=""):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels, constant)} {_number(value)}")
+        return lines
+
+
+class HistogramMetric:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (+Inf last), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def totals(self, **labels):
+        """(count, sum) over the label sets matching ``labels``."""
+        wanted = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        count, total = 0, 0.0
+        with self._lock:
+            for values, entry in self._values.items():
+                if all(values[i] == value for i, value in wanted):
+                    count += entry[2]
+                    total += entry[1]
+        return count, total
+
+    def render(self, constant=""):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = sorted((labels, [list(entry[0]), entry[1], entry[2]]) for labels, entry in self._values.items())
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket
+                le = f'le="{bound if bound == "+Inf" else _number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, constant, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels, constant)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels, constant)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """The process's metrics, rendered in the Prometheus text format.
+
+    Every series carries a ``worker`` label (the process id): each
+    gunicorn worker counts only its own requests, so series from several
+    workers must stay apart to be summed (``sum without (worker)``).
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = CounterMetric(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = HistogramMetric(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        worker = f'worker="{os.getpid()}"'
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(worker))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+request_duration = registry.histogram(
+    "cinemapulse_request_duration_seconds", "Time to handle a request, by route",
+    ("route", "method", "status")
+)
+request_phase = registry.histogram(
+    "cinemapulse_request_phase_seconds", "Request time spent fetching data, computing and rendering templates",
+    ("route", "phase")
+)
+request_calls = registry.histogram(
+    "cinemapulse_request_downstream_calls", "Downstream calls made while handling one request",
+    ("route", "service"), CALL_BUCKETS
+)
+downstream_duration = registry.histogram(
+    "cinemapulse_downstream_call_duration_seconds", "Time of one DynamoDB / SNS / SMTP / SQLite call",
+    ("service", "operation", "resource")
+)
+downstream_errors = registry.counter(
+    "cinemapulse_downstream_errors_total", "Downstream calls that failed",
+    ("service", "operation", "resource")
+)
+profiled_requests = registry.counter(
+    "cinemapulse_profiled_requests_total", "Slow requests whose sampled stacks were written",
+    ("route",)
+)
+
+
+# ================= REQUEST STATS =================
+class RequestStats:
+    """What one request spent its time on. Calls made from other threads
+    (see ``submit``) are counted against it too, but only calls made on the
+    request's own thread, outside any ``phase``, add to its fetch time."""
+
+    def __init__(self, route):
+        self.route = route
+        self.thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self.status = None
+        self.method = None
+        self.streamed = False
+        self.calls = Counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.samples = Counter()
+        self._phase = None
+        self._phase_depth = 0
+        self._phase_started = 0.0
+        self._lock = threading.Lock()
+
+    def add_call(self, service, seconds):
+        on_thread = threading.get_ident() == self.thread
+        with self._lock:
+            self.calls[service] += 1
+            if on_thread and not self._phase_depth:
+                self.phases["fetch"] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.phases), dict(self.calls)
+
+    def enter_phase(self, name):
+        if threading.get_ident() != self.thread:
+            return
+        self._phase_depth += 1
+        if self._phase_depth == 1:
+            self._phase = name
+            self._phase_started = time.perf_counter()
+
+    def exit_phase(self):
+        if threading.get_ident() != self.thread or not self._phase_depth:
+            return
+        self._phase_depth -= 1
+        if not self._phase_depth:
+            with self._lock:
+                self.phases[self._phase] += time.perf_counter() - self._phase_started
+
+
+_current = contextvars.ContextVar("cinemapulse_request_stats", default=None)
+
+# Services every request reports a call count for (zero included)
+_services = set()
+
+
+def declare_service(service):
+    _services.add(service)
+
+
+def record_call(service, operation, resource, seconds, failed=False):
+    downstream_duration.observe(seconds, service, operation, resource)
+    if failed:
+        downstream_errors.inc(service, operation, resource)
+    stats = _current.get()
+    if stats is not None:
+        stats.add_call(service, seconds)
+
+
+@contextmanager
+def downstream(service, operation, resource=""):
+    """Time a call to an outside service (SMTP, SQLite ...)."""
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        record_call(service, operation, resource, time.perf_counter() - started, failed)
+
+
+@contextmanager
+def phase(name):
+    """Attribute the wall time of the block to ``name`` (fetch, render),
+    e.g. around a thread pool of downstream calls the request waits on."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    stats.enter_phase(name)
+    try:
+        yield
+    finally:
+        stats.exit_phase()
+
+
+def submit(pool, fn, *args, **kwargs):
+    """``pool.submit`` that counts the task's downstream calls against the
+    request submitting it."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# ================= BOTO3 =================
+def _boto_resource(params):
+    if "TableName" in params:
+        return params["TableName"]
+    if "RequestItems" in params:
+        return ",".join(sorted(params["RequestItems"]))
+    if "TransactItems" in params:
+        tables = {action.get("TableName") for item in params["TransactItems"] for action in item.values()}
+        return ",".join(sorted(table for table in tables if table))
+    if "TopicArn" in params:
+        return params["TopicArn"].rsplit(":", 1)[-1]
+    return ""
+
+
+def instrument_boto3(client, service):
+    """Time every API call of a boto3 client (for a resource, pass
+    ``resource.meta.client``)."""
+    declare_service(service)
+
+    def started(params, model, context, **kwargs):
+        context["cinemapulse_call"] = (time.perf_counter(), model.name, _boto_resource(params))
+
+    def finished(context, failed):
+        call = context.pop("cinemapulse_call", None)
+        if call:
+            started_at, operation, resource = call
+            record_call(service, operation, resource, time.perf_counter() - started_at, failed)
+
+    def succeeded(http_response, context, **kwargs):
+        finished(context, http_response.status_code >= 300)
+
+    def errored(context, **kwargs):
+        finished(context, True)
+
+    events = client.meta.events
+    events.register("before-parameter-build", started, unique_id=f"cinemapulse-{service}-started")
+    events.register("after-call", succeeded, unique_id=f"cinemapulse-{service}-succeeded")
+    events.register("after-call-error", errored, unique_id=f"cinemapulse-{service}-errored")
+    return client
+
+
+# ================= SAMPLING PROFILER =================
+class SamplingProfiler:
+    """Samples the stacks of in-flight requests every ``interval`` seconds.
+
+    A request that takes ``threshold`` seconds or longer has its samples
+    written to ``directory`` as folded stacks (``frame;frame;... count``,
+    one line per distinct stack), ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, threshold, interval=0.005, directory="profiles"):
+        self.threshold = threshold
+        self.interval = interval
+        self.directory = directory
+        self._active = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_started(self):
+        # A forked gunicorn worker does not inherit the sampler thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name="profiler", daemon=True).start()
+
+    def begin(self, stats):
+        self._ensure_started()
+        with self._lock:
+            self._active[stats.thread] = stats
+
+    def end(self, stats, seconds):
+        with self._lock:
+            self._active.pop(stats.thread, None)
+        if seconds < self.threshold or not stats.samples:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9_.-]", "_", stats.route)
+        path = os.path.join(
+            self.directory,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{route}-{int(seconds * 1000)}ms-{os.getpid()}.folded"
+        )
+        with open(path, "w") as f:
+            for stack, count in stats.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        profiled_requests.inc(stats.route)
+        print(f"[PROFILE] {stats.route} took {seconds * 1000:.0f}ms, "
+              f"{sum(stats.samples.values())} samples -> {path}")
+        return path
+
+    @staticmethod
+    def _fold(route, frame):
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        frames.append(route)
+        return ";".join(reversed(frames))
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread, stats in active:
+                frame = frames.get(thread)
+                if frame is None:
+                    continue
+                stack = self._fold(stats.route, frame)
+                with self._lock:
+                    if self._active.get(thread) is stats and (
+                        stack in stats.samples or len(stats.samples) < PROFILE_MAX_STACKS
+                    ):
+                        stats.samples[stack] += 1
+            del frames
+
+
+# ================= FLASK =================
+class StreamedBody:
+    """Response body wrapper for streamed responses: the generator runs
+    with the request's stats current, so its downstream calls are counted,
+    and the request is recorded (``finish(stats)``) once the server closes
+    the body, so its duration covers the whole transfer."""
+
+    def __init__(self, body, stats, finish):
+        self._body = body
+        self._chunks = iter(body)
+        self._stats = stats
+        self._finish = finish
+        stats.streamed = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = _current.set(self._stats)
+        try:
+            return next(self._chunks)
+        finally:
+            _current.reset(token)
+
+    def close(self):
+        try:
+            close = getattr(self._body, "close", None)
+            if close:
+                close()
+        finally:
+            if self._finish:
+                finish, self._finish = self._finish, None
+                finish(self._stats)
+
+
+class Instrumentation:
+    """Per-route latency, downstream calls per request and the fetch /
+    compute / render split for every request of ``app``, served in the
+    Prometheus text format at ``endpoint``.
+
+    Fetch is the time of downstream calls (``downstream``,
+    ``instrument_boto3``) plus explicit ``phase("fetch")`` blocks, render
+    the time in ``render_template``, and compute the rest. With
+    ``profile_threshold`` > 0 (seconds) a ``SamplingProfiler`` dumps the
+    stacks of requests at least that slow. With ``token``, the endpoint
+    wants it as a Bearer token. Streamed responses are recorded when their
+    body is closed (see ``StreamedBody``).
+    """
+
+    def __init__(self, app, services=(), endpoint="/metrics", token=None,
+                 profile_threshold=0.0, profile_interval=0.005, profile_dir="profiles"):
+        self.app = app
+        self.token = token
+        self.profiler = None
+        if profile_threshold > 0:
+            self.profiler = SamplingProfiler(profile_threshold, profile_interval, profile_dir)
+        for service in services:
+            declare_service(service)
+
+        # First before_request, so the others (store.poll) are measured too
+        app.before_request_funcs.setdefault(None, []).insert(0, self._start)
+        app.after_request(self._status)
+        app.teardown_request(self._finish)
+        before_render_template.connect(self._render_started, app, weak=False)
+        template_rendered.connect(self._render_finished, app, weak=False)
+        app.add_url_rule(endpoint, "metrics", self.metrics)
+
+    def _start(self):
+        stats = RequestStats(request.endpoint or "unmatched")
+        _current.set(stats)
+        if self.profiler:
+            self.profiler.begin(stats)
+
+    def _status(self, response):
+        stats = _current.get()
+        if stats is not None:
+            stats.status = response.status_code
+            if response.is_streamed and not response.direct_passthrough:
+                # The body is generated after teardown: finish when it closes
+                response.response = StreamedBody(response.response, stats, self._record)
+        return response
+
+    def _finish(self, exc):
+        stats = _current.get()
+        if stats is None:
+            return
+        _current.set(None)
+        stats.method = request.method
+        if not stats.streamed:
+            self._record(stats, exc)
+
+    def _record(self, stats, exc=None):
+        seconds = time.perf_counter() - stats.started
+        status = stats.status or (500 if exc else 200)
+
+        request_duration.observe(seconds, stats.route, stats.method, str(status))
+        phases, calls = stats.snapshot()
+        phases["compute"] = max(seconds - phases["fetch"] - phases["render"], 0.0)
+        for name, value in phases.items():
+            request_phase.observe(value, stats.route, name)
+        for service in _services | set(calls):
+            request_calls.observe(calls.get(service, 0), stats.route, service)
+
+        if self.profiler:
+            self.profiler.end(stats, seconds)
+
+    def _render_started(self, sender, **kwargs):
+        stats = _current.get()
+        if stats is not None:
+            stats.enter_phase("render")
+
+    def _render_finished(self, sender, **kwargs):
+        stats = _current.get()
+        if stats is not None:
+            stats.exit_phase()
+
+    def metrics(self):
+        if self.token and request.headers.get("Authorization") != f"Bearer {self.token}":
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,167 @@
+import bisect
+import math
+import threading
+import time
+
+# Orderings /api/leaderboard can be asked for
+LEADERBOARD_METRICS = ("score", "rating", "velocity")
+
+LEADERBOARD_LIMIT = 10
+
+
+# ================= LEADERBOARD =================
+class Leaderboard:
+    """Top-N index of movies by score, average rating and review velocity.
+
+    For every metric the board keeps sorted lists for the whole catalog,
+    per genre, per language and per (genre, language). ``update()`` moves
+    one movie in each of them (O(log n) search + list insert), and ``top()``
+    only slices the list it needs, so a query costs O(limit) no matter how
+    large the catalog is.
+
+    Velocity is a decayed review count (see analytics.bump_velocity). It is
+    ranked by ``log(velocity) + velocity_at * ln2 / half_life``: every
+    movie decays at the same rate, so that key never has to be refreshed
+    as time passes, and the current value is recovered when reading.
+
+    Catalog-wide totals (reviews, and rating sums per genre for the admin
+    genre chart) are kept alongside, moved by the same updates.
+    """
+
+    def __init__(self, half_life):
+        self.half_life = half_life
+        self._decay = math.log(2) / half_life
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._indexes = {}
+        self._review_total = 0
+        self._genre_totals = {}
+
+    # ----- writes -----
+    def update(self, movie, score, rating, review_count, velocity=0.0, velocity_at=0.0):
+        entry = self._entry(movie, score, rating, review_count, velocity, velocity_at)
+        with self._lock:
+            self._remove(movie["id"])
+            self._insert(entry)
+
+    def _entry(self, movie, score, rating, review_count, velocity=0.0, velocity_at=0.0):
+        return {
+            "movie_id": movie["id"],
+            "name": movie["name"],
+            "genre": movie.get("genre") or "",
+            "language": movie.get("language") or "",
+            "score": int(score),
+            "rating": float(rating),
+            "review_count": int(review_count),
+            "velocity_key": (
+                math.log(float(velocity)) + float(velocity_at) * self._decay
+                if velocity and float(velocity) > 0 else -math.inf
+            )
+        }
+
+    def remove(self, movie_id):
+        with self._lock:
+            self._remove(movie_id)
+
+    def replace(self, entries):
+        """Rebuild from ``(movie, score, rating, review_count, velocity,
+        velocity_at)`` tuples, swapping the new index in at once."""
+        by_id, indexes = {}, {}
+        for args in entries:
+            entry = self._entry(*args)
+            by_id[entry["movie_id"]] = entry
+        for entry in by_id.values():
+            for metric in LEADERBOARD_METRICS:
+                item = self._sort_key(entry, metric)
+                for bucket in self._buckets(entry):
+                    indexes.setdefault((metric,) + bucket, []).append(item)
+        # One sort per list instead of an insort per movie
+        for index in indexes.values():
+            index.sort()
+
+        review_total, genre_totals = 0, {}
+        for entry in by_id.values():
+            review_total += entry["review_count"]
+            total = genre_totals.setdefault(entry["genre"] or "Other", [0.0, 0])
+            total[0] += entry["rating"]
+            total[1] += 1
+
+        with self._lock:
+            self._entries = by_id
+            self._indexes = indexes
+            self._review_total = review_total
+            self._genre_totals = genre_totals
+
+    def _insert(self, entry):
+        self._entries[entry["movie_id"]] = entry
+        self._count(entry, 1)
+        for metric in LEADERBOARD_METRICS:
+            item = self._sort_key(entry, metric)
+            for bucket in self._buckets(entry):
+                bisect.insort(self._indexes.setdefault((metric,) + bucket, []), item)
+
+    def _remove(self, movie_id):
+        entry = self._entries.pop(movie_id, None)
+        if entry is None:
+            return
+        self._count(entry, -1)
+        for metric in LEADERBOARD_METRICS:
+            item = self._sort_key(entry, metric)
+            for bucket in self._buckets(entry):
+                index = self._indexes[(metric,) + bucket]
+                i = bisect.bisect_left(index, item)
+                if i < len(index) and index[i] == item:
+                    del index[i]
+                if not index:
+                    del self._indexes[(metric,) + bucket]
+
+    def _count(self, entry, sign):
+        self._review_total += sign * entry["review_count"]
+        genre = entry["genre"] or "Other"
+        total = self._genre_totals.setdefault(genre, [0.0, 0])
+        total[0] += sign * entry["rating"]
+        total[1] += sign
+        if not total[1]:
+            del self._genre_totals[genre]
+
+    @staticmethod
+    def _buckets(entry):
+        genre = entry["genre"].lower()
+        language = entry["language"].lower()
+        return ((None, None), (genre, None), (None, language), (genre, language))
+
+    @staticmethod
+    def _sort_key(entry, metric):
+        value = entry["velocity_key"] if metric == "velocity" else entry[metric]
+        # Highest first; ties broken by review count, then id
+        return (-value, -entry["review_count"], entry["movie_id"])
+
+    # ----- reads -----
+    def top(self, by="score", genre=None, language=None, limit=LEADERBOARD_LIMIT):
+        if by not in LEADERBOARD_METRICS:
+            raise ValueError(f"Unknown leaderboard metric: {by}")
+
+        bucket = (by, genre.lower() if genre else None, language.lower() if language else None)
+        now = time.time()
+        with self._lock:
+            items = self._indexes.get(bucket, [])[:limit]
+            entries = [self._entries[movie_id] for _, _, movie_id in items]
+
+        return [self._public(entry, now) for entry in entries]
+
+    def totals(self):
+        """``(review_count, {genre: average rating})`` over every movie, the
+        same figures analytics.average_by_genre gives for the catalog."""
+        with self._lock:
+            return self._review_total, {
+                genre: round(s / n, 1) for genre, (s, n) in self._genre_totals.items()
+            }
+
+    def _public(self, entry, now):
+        result = {k: v for k, v in entry.items() if k != "velocity_key"}
+        key = entry["velocity_key"]
+        result["velocity"] = round(math.exp(key - now * self._decay), 2) if key > -math.inf else 0.0
+        return result
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,222 @@
+import queue
+import threading
+import time
+
+
+# ================= NOTIFICATION OUTBOX =================
+class NotificationOutbox:
+    """Bounded in-process queue drained by background sender threads.
+
+    Request handlers call ``submit`` and return immediately; worker threads
+    group queued messages into batches and hand them to ``sender(batch)``.
+    Subjects listed in ``digest_subjects`` (e.g. logins) are coalesced into
+    one digest message per ``digest_window`` seconds. Failed batches are
+    retried with exponential backoff. When the queue is full, ``submit``
+    waits up to ``block_timeout`` seconds (backpressure) and then drops the
+    message.
+    """
+
+    def __init__(self, sender, name="outbox", maxsize=1000, workers=2,
+                 batch_size=20, batch_wait=0.5, digest_subjects=(),
+                 digest_window=60.0, max_retries=3, base_delay=0.5,
+                 block_timeout=0.0):
+        self.sender = sender
+        self.name = name
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.digest_subjects = set(digest_subjects)
+        self.digest_window = digest_window
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.block_timeout = block_timeout
+        self.worker_count = workers
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._digests = {}
+        self._digest_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        self._counters = {
+            "enqueued": 0, "sent": 0, "failed": 0, "dropped": 0,
+            "coalesced": 0, "retries": 0, "batches": 0
+        }
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_last = 0.0
+
+    # ----- lifecycle -----
+    def start(self):
+        if self._threads:
+            return self
+        for i in range(self.worker_count):
+            t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._run_digests, name=f"{self.name}-digest", daemon=True)
+        t.start()
+        self._threads.append(t)
+        return self
+
+    def stop(self, timeout=5.0):
+        """Flush pending digests, drain the queue and stop the workers."""
+        self.flush_digests(force=True)
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        for t in self._threads:
+            t.join(max(deadline - time.time(), 0))
+        self._threads = []
+
+    # ----- producers -----
+    def submit(self, subject, message, to=None):
+        """Queue a notification; returns False if it had to be dropped."""
+        item = {
+            "subject": subject,
+            "message": message,
+            "to": list(to) if to else None,
+            "queued_at": time.time()
+        }
+
+        if subject in self.digest_subjects:
+            self._add_to_digest(item)
+            return True
+
+        return self._enqueue(item)
+
+    def _enqueue(self, item):
+        try:
+            if self.block_timeout:
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            self._count("dropped")
+            print(f"[{self.name.upper()} DROPPED] {item['subject']}")
+            return False
+
+        self._count("enqueued")
+        return True
+
+    # ----- digests -----
+    def _add_to_digest(self, item):
+        key = (item["subject"], tuple(item["to"] or ()))
+        with self._digest_lock:
+            digest = self._digests.get(key)
+            if digest is None:
+                self._digests[key] = {**item, "lines": [item["message"]]}
+            else:
+                digest["lines"].append(item["message"])
+                self._count("coalesced")
+
+    def flush_digests(self, force=False):
+        now = time.time()
+        ready = []
+        with self._digest_lock:
+            for key, digest in list(self._digests.items()):
+                if force or now - digest["queued_at"] >= self.digest_window:
+                    ready.append(self._digests.pop(key))
+
+        for digest in ready:
+            lines = digest.pop("lines")
+            if len(lines) > 1:
+                digest["subject"] = f"{digest['subject']} ({len(lines)} events)"
+                digest["message"] = "\n".join(f"- {line}" for line in lines)
+            self._enqueue(digest)
+
+    def _run_digests(self):
+        interval = min(self.digest_window, 1.0)
+        while not self._stopping.wait(interval):
+            self.flush_digests()
+
+    # ----- consumers -----
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _deliver(self, batch):
+        """Send a batch, retrying only the items the sender did not flag as sent.
+
+        Senders may set ``item["sent"] = True`` per message so a failure
+        half-way through a batch does not re-send the earlier messages.
+        """
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.sender(pending)
+                error = None
+            except Exception as e:
+                error = e
+
+            delivered = pending if error is None else [i for i in pending if i.get("sent")]
+            self._record_sent(delivered)
+
+            if error is None:
+                return
+
+            pending = [i for i in pending if not i.get("sent")]
+            if attempt == self.max_retries:
+                print(f"[{self.name.upper()} FAILED] {len(pending)} message(s):", error)
+                self._count("failed", len(pending))
+                return
+
+            self._count("retries")
+            time.sleep(self.base_delay * (2 ** attempt))
+
+    def _record_sent(self, items):
+        if not items:
+            return
+        now = time.time()
+        with self._stats_lock:
+            self._counters["sent"] += len(items)
+            self._counters["batches"] += 1
+            for item in items:
+                latency = now - item["queued_at"]
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                self._latency_last = latency
+
+    # ----- metrics -----
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._counters[key] += amount
+
+    def stats(self):
+        with self._stats_lock:
+            sent = self._counters["sent"]
+            stats = dict(self._counters)
+            stats["latency_avg_ms"] = round(self._latency_total / sent * 1000, 1) if sent else 0.0
+            stats["latency_max_ms"] = round(self._latency_max * 1000, 1)
+            stats["latency_last_ms"] = round(self._latency_last * 1000, 1)
+        with self._digest_lock:
+            stats["pending_digests"] = sum(len(d["lines"]) for d in self._digests.values())
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        return stats
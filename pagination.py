@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+
+
+# ================= PAGE SIZES =================
+# Movie cards per dashboard page
+MOVIES_PAGE_SIZE = 12
+# Reviews per lazy-loaded feedback page, and the most a client may ask for
+FEEDBACK_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+
+
+# ================= CURSORS =================
+# A cursor is the key of the last item on the previous page (the same shape
+# as DynamoDB's LastEvaluatedKey / ExclusiveStartKey), serialized as
+# URL-safe base64 JSON so it can travel in a query string.
+def encode_cursor(key):
+    if not key:
+        return None
+    raw = json.dumps(key, separators=(",", ":"), sort_keys=True, default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of ``encode_cursor``; raises ValueError for a malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(key, dict) or not all(isinstance(v, (str, int)) for v in key.values()):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def page_args(args, default_limit, max_limit=MAX_PAGE_SIZE):
+    """Read ``cursor`` and ``limit`` from request args -> (start_key, limit)."""
+    try:
+        limit = int(args.get("limit", default_limit))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid limit")
+    return decode_cursor(args.get("cursor")), max(1, min(limit, max_limit))
+
+
+# ================= LIST PAGING =================
+def key_positions(items, key_field="id"):
+    """Key -> index of each item, for repeated ``page_after`` calls on the
+    same list."""
+    return {item[key_field]: i for i, item in enumerate(items)}
+
+
+def page_after(items, start_key, limit, key_field="id", positions=None):
+    """Page over an in-memory list the way a DynamoDB scan pages a table.
+
+    Returns the ``limit`` items after the one matching ``start_key`` and the
+    key of the last returned item (None on the final page). A cursor whose
+    item no longer exists (e.g. a deleted movie) restarts from the top.
+    ``positions`` (see ``key_positions``) finds the cursor item with one
+    dict lookup instead of a scan of the list.
+    """
+    start = 0
+    if start_key:
+        after = start_key.get(key_field)
+        if positions is not None:
+            start = positions.get(after, -1) + 1
+        else:
+            start = next((i + 1 for i, item in enumerate(items) if item[key_field] == after), 0)
+
+    page = items[start:start + limit]
+    has_more = start + limit < len(items)
+    last_key = {key_field: page[-1][key_field]} if page and has_more else None
+    return page, last_key
@@ -0,0 +1,186 @@
+"""Bulk sentiment re-scoring for stored feedback.
+
+Re-runs the current lexicon over every stored feedback and writes back only
+the rows whose label changed. aws_app.py's writer moves each movie's
+sentiment counters as it goes; app.py rebuilds them once at the end.
+Progress is checkpointed after each page so an interrupted run resumes
+where it stopped.
+
+    python rescore.py --checkpoint rescore.ckpt --processes 4
+
+The CLI runs against the DynamoDB tables used by aws_app.py; the in-memory
+app triggers the same pipeline from POST /admin/sentiment/rescore.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analytics import AGGREGATE_FIELDS, apply_feedback, empty_aggregate
+
+# Comments handed to one worker process at a time
+CHUNK_SIZE = 1000
+
+
+# ================= SCORING =================
+def score_chunk(comments):
+    # Imported here so spawned workers load the lexicon once each
+    from sentiment import sentiment_engine
+    return sentiment_engine.score_batch(comments)
+
+
+def score_page(items, pool, chunk_size=CHUNK_SIZE):
+    comments = [str(item.get("comment", "")) for item in items]
+    if pool is None:
+        return score_chunk(comments)
+
+    chunks = [comments[i:i + chunk_size] for i in range(0, len(comments), chunk_size)]
+    labels = []
+    for chunk_labels in pool.map(score_chunk, chunks):
+        labels.extend(chunk_labels)
+    return labels
+
+
+# ================= CHECKPOINTS =================
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, default=str)
+    os.replace(tmp_path, path)
+
+
+# ================= PIPELINE =================
+def run_rescore(pages, write_changed, finish, checkpoint_path=None, processes=None,
+                chunk_size=CHUNK_SIZE, progress=None):
+    """Stream, re-score and write back feedback in pages.
+
+    ``pages(cursor)`` yields ``(items, next_cursor)`` starting after
+    ``cursor`` (None means from the beginning). ``write_changed(items)``
+    persists items whose ``sentiment`` was updated. ``finish(aggregates)``
+    receives the per-movie counters accumulated over every row and is
+    called once at the end. ``progress(stats)`` is called after each page.
+    """
+    state = load_checkpoint(checkpoint_path) or {
+        "cursor": None, "scanned": 0, "changed": 0, "aggregates": {}
+    }
+    if state["scanned"]:
+        print(f"[RESCORE] resuming after {state['scanned']} rows")
+
+    started = time.time()
+    resumed_from = state["scanned"]
+
+    pool = None
+    if processes and processes > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    try:
+        for items, next_cursor in pages(state["cursor"]):
+            labels = score_page(items, pool, chunk_size)
+
+            changed = []
+            for item, label in zip(items, labels):
+                if item.get("sentiment") != label:
+                    item["sentiment"] = label
+                    changed.append(item)
+                apply_feedback(
+                    state["aggregates"].setdefault(item["movie_id"], empty_aggregate()),
+                    item
+                )
+
+            if changed:
+                write_changed(changed)
+
+            state["cursor"] = next_cursor
+            state["scanned"] += len(items)
+            state["changed"] += len(changed)
+            save_checkpoint(checkpoint_path, state)
+
+            elapsed = max(time.time() - started, 1e-9)
+            stats = {
+                "scanned": state["scanned"],
+                "changed": state["changed"],
+                "rows_per_sec": round((state["scanned"] - resumed_from) / elapsed, 1)
+            }
+            print(f"[RESCORE] {stats['scanned']} rows, {stats['changed']} changed, "
+                  f"{stats['rows_per_sec']} rows/sec")
+            if progress:
+                progress(stats)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    aggregates = {
+        movie_id: {field: int(agg.get(field, 0)) for field in AGGREGATE_FIELDS}
+        for movie_id, agg in state["aggregates"].items()
+    }
+    finish(aggregates)
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return {"scanned": state["scanned"], "changed": state["changed"]}
+
+
+# ================= SOURCES =================
+def list_pages(items, page_size=1000):
+    """Page over an in-memory sequence; the cursor is the row offset.
+
+    Pages hold copies, so the source rows only change through
+    ``write_changed``.
+    """
+    def pages(cursor):
+        offset = cursor or 0
+        while offset < len(items):
+            page = [dict(item) for item in items[offset:offset + page_size]]
+            offset += len(page)
+            yield page, offset
+    return pages
+
+
+def dynamo_pages(table, page_size=1000):
+    """Page over a DynamoDB scan; the cursor is the LastEvaluatedKey."""
+    def pages(cursor):
+        kwargs = {"Limit": page_size}
+        if cursor:
+            kwargs["ExclusiveStartKey"] = cursor
+        while True:
+            res = table.scan(**kwargs)
+            last_key = res.get("LastEvaluatedKey")
+            yield res.get("Items", []), last_key
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+    return pages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score stored feedback sentiment")
+    parser.add_argument("--checkpoint", default="rescore.ckpt")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    import aws_app
+
+    result = run_rescore(
+        dynamo_pages(aws_app.feedbacks_table, args.page_size),
+        aws_app.write_rescored_sentiments,
+        aws_app.finish_rescore,
+        checkpoint_path=args.checkpoint,
+        processes=args.processes
+    )
+    print(f"[RESCORE DONE] {result['scanned']} rows scanned, {result['changed']} changed")
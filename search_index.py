@@ -0,0 +1,300 @@
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+
+# Query tokens shorter than this only match exactly or as a prefix
+FUZZY_MIN_LENGTH = 4
+# Vocabulary words a single prefix may expand to ("s" must not mean every
+# word starting with s)
+PREFIX_EXPANSIONS = 64
+PREFIX_MIN_LENGTH = 2
+
+SEARCH_LIMIT = 20
+
+# Relevance of a query token matching a title word
+EXACT, PREFIX, TYPO = 3, 2, 1
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Lower-case ASCII folding: "Amélie" -> "amelie"."""
+    text = unicodedata.normalize("NFKD", text or "")
+    return text.encode("ascii", "ignore").decode().lower()
+
+
+def tokenize(text):
+    return _WORD.findall(normalize(text))
+
+
+def _deletes(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def within_one_edit(a, b):
+    """Damerau-Levenshtein distance <= 1 (one insert, delete, substitution
+    or swap of neighbours)."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    return a[i:] == b[i + 1:]
+
+
+# ================= MOVIE SEARCH INDEX =================
+class MovieSearchIndex:
+    """In-process inverted index over movie titles, genres and languages.
+
+    Title words map to the ids of the movies using them; a sorted copy of
+    the vocabulary answers prefix queries with bisect, and a symmetric-
+    delete table (every word with one letter removed) finds words one typo
+    away without comparing against the whole vocabulary. Genre and
+    language are exact facets, with title-ordered lists per (genre,
+    language) so browsing by facet alone is a slice.
+
+    A query token matches title words exactly, by prefix or with one typo;
+    every token has to match (AND) and results are ranked by how well they
+    matched, then by title. Cost depends on the number of matches, not on
+    catalog size.
+    """
+
+    def __init__(self, movies=()):
+        self._lock = threading.Lock()
+        self._docs = {}
+        self._titles = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._deletes = {}
+        self._facets = {"genre": {}, "language": {}}
+        self._labels = {"genre": {}, "language": {}}
+        self._browse = {}
+        self._pairs = {}
+        for movie in movies:
+            self._add(movie)
+
+    # ----- writes -----
+    def add(self, movie):
+        """Index a movie, replacing its previous version."""
+        with self._lock:
+            self._remove(movie["id"])
+            self._add(movie)
+
+    def remove(self, movie_id):
+        with self._lock:
+            self._remove(movie_id)
+
+    def replace(self, movies):
+        """Re-index a whole catalog, swapping the new index in at once."""
+        index = MovieSearchIndex(movies)
+        with self._lock:
+            self.__dict__.update({k: v for k, v in index.__dict__.items() if k != "_lock"})
+
+    def _add(self, movie):
+        movie_id = movie["id"]
+        words = set(tokenize(movie["name"]))
+        doc = {
+            "movie": movie,
+            "words": words,
+            "genre": normalize(movie.get("genre")).strip(),
+            "language": normalize(movie.get("language")).strip()
+        }
+        self._docs[movie_id] = doc
+        self._titles[movie_id] = (movie["name"].lower(), movie_id)
+
+        for word in words:
+            ids = self._postings.get(word)
+            if ids is None:
+                ids = self._postings[word] = set()
+                bisect.insort(self._vocabulary, word)
+                if len(word) >= FUZZY_MIN_LENGTH - 1:
+                    for variant in _deletes(word):
+                        self._deletes.setdefault(variant, set()).add(word)
+            ids.add(movie_id)
+
+        for facet in ("genre", "language"):
+            if doc[facet]:
+                self._facets[facet].setdefault(doc[facet], set()).add(movie_id)
+                self._labels[facet].setdefault(doc[facet], movie.get(facet).strip())
+
+        pair = (doc["genre"], doc["language"])
+        self._pairs[pair] = self._pairs.get(pair, 0) + 1
+        for bucket in self._buckets(doc):
+            bisect.insort(self._browse.setdefault(bucket, []), self._titles[movie_id])
+
+    def _remove(self, movie_id):
+        doc = self._docs.pop(movie_id, None)
+        if doc is None:
+            return
+        title = self._titles.pop(movie_id)
+
+        for word in doc["words"]:
+            ids = self._postings[word]
+            ids.discard(movie_id)
+            if ids:
+                continue
+            del self._postings[word]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+            if len(word) >= FUZZY_MIN_LENGTH - 1:
+                for variant in _deletes(word):
+                    words = self._deletes[variant]
+                    words.discard(word)
+                    if not words:
+                        del self._deletes[variant]
+
+        for facet in ("genre", "language"):
+            ids = self._facets[facet].get(doc[facet])
+            if ids is not None:
+                ids.discard(movie_id)
+                if not ids:
+                    del self._facets[facet][doc[facet]]
+                    del self._labels[facet][doc[facet]]
+
+        pair = (doc["genre"], doc["language"])
+        self._pairs[pair] -= 1
+        if not self._pairs[pair]:
+            del self._pairs[pair]
+        for bucket in self._buckets(doc):
+            titles = self._browse[bucket]
+            del titles[bisect.bisect_left(titles, title)]
+            if not titles:
+                del self._browse[bucket]
+
+    @staticmethod
+    def _buckets(doc):
+        genre, language = doc["genre"] or None, doc["language"] or None
+        return {(None, None), (genre, None), (None, language), (genre, language)}
+
+    # ----- reads -----
+    def search(self, query="", genre=None, language=None, limit=SEARCH_LIMIT):
+        """-> {"total", "movies", "facets": {"genre": {..}, "language": {..}}}
+
+        Facet counts cover every match of ``query``; each facet's counts
+        honour the other facet's filter, so they show what picking a
+        value would return.
+        """
+        genre = normalize(genre).strip() or None
+        language = normalize(language).strip() or None
+        tokens = tokenize(query)
+        with self._lock:
+            if not tokens:
+                return self._browse_facets(genre, language, limit)
+
+            scores = self._match(tokens)
+            matches = scores.keys()
+            by_genre = self._facets["genre"].get(genre, set()) if genre else None
+            by_language = self._facets["language"].get(language, set()) if language else None
+
+            facets = {
+                "genre": self._facet_counts("genre", matches & by_language if language else matches),
+                "language": self._facet_counts("language", matches & by_genre if genre else matches)
+            }
+
+            if genre:
+                matches = matches & by_genre
+            if language:
+                matches = matches & by_language
+
+            # Best score first, then title; only the top ``limit`` get sorted
+            titles = self._titles
+            ranked = heapq.nsmallest(limit, matches, key=lambda movie_id: (-scores[movie_id], titles[movie_id]))
+            return {
+                "total": len(matches),
+                "movies": [self._docs[movie_id]["movie"] for movie_id in ranked],
+                "facets": facets
+            }
+
+    def _browse_facets(self, genre, language, limit):
+        """No text: filter by facets only, in title order."""
+        titles = self._browse.get((genre, language), [])
+        counts = {"genre": {}, "language": {}}
+        for (pair_genre, pair_language), count in self._pairs.items():
+            if pair_genre and (not language or pair_language == language):
+                counts["genre"][pair_genre] = counts["genre"].get(pair_genre, 0) + count
+            if pair_language and (not genre or pair_genre == genre):
+                counts["language"][pair_language] = counts["language"].get(pair_language, 0) + count
+
+        return {
+            "total": len(titles),
+            "movies": [self._docs[movie_id]["movie"] for _, movie_id in titles[:limit]],
+            "facets": {facet: self._labelled(facet, counts[facet]) for facet in counts}
+        }
+
+    def _facet_counts(self, facet, matches):
+        counts = {}
+        for value, ids in self._facets[facet].items():
+            # Set intersection runs in C; there are only a few facet values
+            count = len(ids & matches) if len(ids) > len(matches) else len(matches & ids)
+            if count:
+                counts[value] = count
+        return self._labelled(facet, counts)
+
+    def _labelled(self, facet, counts):
+        labels = self._labels[facet]
+        return dict(sorted(
+            ((labels[value], count) for value, count in counts.items()),
+            key=lambda item: (-item[1], item[0])
+        ))
+
+    def _match(self, tokens):
+        """movie id -> relevance for movies matching every token."""
+        scores = None
+        # Rarest token first keeps the running intersection small
+        for token_scores in sorted((self._token_matches(t) for t in tokens), key=len):
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    movie_id: score + token_scores[movie_id]
+                    for movie_id, score in scores.items() if movie_id in token_scores
+                }
+            if not scores:
+                return {}
+        return scores
+
+    def _token_matches(self, token):
+        """movie id -> best relevance of ``token`` against the movie's words."""
+        words = {}
+
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for word in self._typo_candidates(token):
+                words[word] = TYPO
+
+        if len(token) >= PREFIX_MIN_LENGTH:
+            i = bisect.bisect_left(self._vocabulary, token)
+            for word in self._vocabulary[i:i + PREFIX_EXPANSIONS]:
+                if not word.startswith(token):
+                    break
+                words[word] = PREFIX
+
+        if token in self._postings:
+            words[token] = EXACT
+
+        # Lowest relevance first, so better matches overwrite (in C)
+        matches = {}
+        for word, score in sorted(words.items(), key=lambda item: item[1]):
+            matches.update(dict.fromkeys(self._postings[word], score))
+        return matches
+
+    def _typo_candidates(self, token):
+        candidates = set(self._deletes.get(token, ()))
+        for variant in _deletes(token):
+            if variant in self._postings:
+                candidates.add(variant)
+            candidates.update(self._deletes.get(variant, ()))
+        return [word for word in candidates if within_one_edit(token, word)]
+
+    def __len__(self):
+        return len(self._docs)
@@ -0,0 +1,194 @@
+import json
+import os
+import re
+import string
+from itertools import repeat
+
+
+# ================= LEXICON =================
+DEFAULT_LEXICON = {
+    "positive": [
+        "amazing", "great", "excellent", "masterpiece", "good", "love",
+        "loved", "loves", "loving", "lovely", "brilliant", "awesome",
+        "fantastic", "superb", "enjoyed", "enjoyable", "fun", "beautiful",
+        "must watch"
+    ],
+    "negative": [
+        "bad", "boring", "waste", "poor", "predictable", "wasted",
+        "awful", "terrible", "worst", "dull", "disappointing", "hated",
+        "waste of time"
+    ],
+    "negations": ["not", "no", "never", "hardly", "without", "nothing", "neither", "nor"],
+    "intensifiers": {
+        "very": 1.5, "really": 1.5, "so": 1.3, "too": 1.3, "super": 1.5,
+        "extremely": 2.0, "absolutely": 2.0, "totally": 1.5, "truly": 1.5
+    }
+}
+
+# Words, contractions ("isn't") and clause-breaking punctuation
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[.!?;,]")
+CLAUSE_BREAKS = frozenset(".!?;,")
+
+# Fast path tokenizer works on UTF-8 bytes: a bytes.translate table blanks
+# out punctuation (keeping apostrophes) before split(), all in C
+_PUNCTUATION = string.punctuation.replace("'", "").encode()
+STRIP_PUNCTUATION = bytes.maketrans(_PUNCTUATION, b" " * len(_PUNCTUATION))
+
+# Typographic apostrophes ("isn’t") are read as plain ones
+APOSTROPHES = str.maketrans({"\u2019": "'", "\u2018": "'"})
+
+# How many preceding tokens a negation reaches
+NEGATION_WINDOW = 3
+
+
+# ================= SENTIMENT ENGINE =================
+class SentimentEngine:
+    """Lexicon-based sentiment scorer.
+
+    The lexicon is compiled once into a token -> polarity dict, a set of
+    modifier tokens (negations, intensifiers) and a first-token index for
+    multi-word phrases. Each comment is tokenized a single time, and
+    matches are whole tokens only (so "goodbye" is not "good").
+
+    Comments without negations or intensifiers, which is most of them, are
+    scored with C-level bytes, set and dict operations (``translate`` +
+    ``isdisjoint`` + ``sum(map(dict.get))``), with phrases patched in by
+    substring count over the full tokenization, so clause punctuation
+    still separates phrase words ("must, watch" is not "must watch").
+    Otherwise a token walk applies negation (flips polarity within
+    ``NEGATION_WINDOW`` tokens, stopped by punctuation) and intensifiers
+    (scale the next sentiment word). Typographic apostrophes count as
+    plain ones in both paths. Labels keep the Positive / Neutral /
+    Negative contract.
+    """
+
+    def __init__(self, lexicon=None):
+        lexicon = lexicon or DEFAULT_LEXICON
+
+        self.words = {}
+        self.phrases = {}
+        for polarity, key in ((1.0, "positive"), (-1.0, "negative")):
+            for entry in lexicon.get(key, []):
+                tokens = tuple(entry.lower().split())
+                if len(tokens) == 1:
+                    self.words[tokens[0]] = polarity
+                elif tokens:
+                    self.phrases.setdefault(tokens[0], []).append((tokens, polarity))
+
+        # Longest phrase first so "waste of time" wins over "waste"
+        for candidates in self.phrases.values():
+            candidates.sort(key=lambda p: len(p[0]), reverse=True)
+
+        self.negations = frozenset(w.lower() for w in lexicon.get("negations", []))
+        self.intensifiers = {w.lower(): float(v) for w, v in lexicon.get("intensifiers", {}).items()}
+
+        # Byte-keyed mirrors for the fast path
+        self.byte_words = {w.encode(): p for w, p in self.words.items()}
+        self.byte_modifiers = frozenset(w.encode() for w in self.negations | set(self.intensifiers))
+        self.byte_phrase_heads = frozenset(h.encode() for h in self.phrases)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def polarity(self, comment):
+        text = comment.lower().translate(APOSTROPHES)
+        raw = text.encode()
+        tokens = raw.translate(STRIP_PUNCTUATION).split()
+        if b"'" in raw:
+            # Apostrophes survive the table for contractions; quote marks
+            # around a word ('amazing') must not hide it from the lexicon
+            tokens = [token for token in (t.strip(b"'") for t in tokens) if token]
+
+        if not self.byte_modifiers.isdisjoint(tokens) or b"n't" in raw:
+            return self._walk(TOKEN_RE.findall(text))
+
+        total = sum(map(self.byte_words.get, tokens, repeat(0.0)))
+        if not self.byte_phrase_heads.isdisjoint(tokens):
+            total += self._phrase_correction(" ".join(TOKEN_RE.findall(text)))
+        return total
+
+    def _phrase_correction(self, joined):
+        """Swap the per-word scores of matched phrases for the phrase score."""
+        padded = f" {joined} "
+        correction = 0.0
+        for head in self._phrase_heads_in(padded):
+            for phrase, polarity in self.phrases[head]:
+                hits = padded.count(f" {' '.join(phrase)} ")
+                if hits:
+                    words_score = sum(self.words.get(t, 0.0) for t in phrase)
+                    correction += hits * (polarity - words_score)
+        return correction
+
+    def _phrase_heads_in(self, padded):
+        return [head for head in self.phrases if f" {head} " in padded]
+
+    def _walk(self, tokens):
+        words, phrases = self.words, self.phrases
+        negations, intensifiers = self.negations, self.intensifiers
+        total = 0.0
+        negate_until = -1
+        scale = 1.0
+        i, n = 0, len(tokens)
+
+        while i < n:
+            token = tokens[i]
+            polarity, length = words.get(token), 1
+
+            for phrase, phrase_polarity in phrases.get(token, ()):
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    polarity, length = phrase_polarity, len(phrase)
+                    break
+
+            if polarity is not None:
+                if i <= negate_until:
+                    polarity = -polarity
+                    negate_until = -1
+                total += polarity * scale
+                scale = 1.0
+            elif token in CLAUSE_BREAKS:
+                negate_until = -1
+                scale = 1.0
+            elif token in negations or token.endswith("n't"):
+                negate_until = i + NEGATION_WINDOW
+            elif token in intensifiers:
+                scale = intensifiers[token]
+            else:
+                scale = 1.0
+
+            i += length
+
+        return total
+
+    @staticmethod
+    def label(polarity):
+        if polarity > 0:
+            return "Positive"
+        elif polarity < 0:
+            return "Negative"
+        return "Neutral"
+
+    def score(self, comment):
+        return self.label(self.polarity(comment))
+
+    def score_batch(self, comments):
+        """Label many comments in one call; repeated comments are scored once."""
+        seen = {}
+        polarity, label = self.polarity, self.label
+        labels = []
+        for comment in comments:
+            result = seen.get(comment)
+            if result is None:
+                result = seen[comment] = label(polarity(comment))
+            labels.append(result)
+        return labels
+
+
+def load_engine():
+    """Default engine, using CINEMAPULSE_LEXICON (a JSON file) when set."""
+    path = os.getenv("CINEMAPULSE_LEXICON")
+    return SentimentEngine.from_file(path) if path else SentimentEngine()
+
+
+sentiment_engine = load_engine()
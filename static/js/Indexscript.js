@@ -136,6 +136,56 @@ function closeModal() {
     document.getElementById("movieModal").style.display = "none";
 }
 
+/* === BACKGROUND MOVIE DELETE === */
+// Deletes run as a background job when the server supports it; the
+// warning box shows progress until the job finishes.
+function pollDeleteJob(statusUrl) {
+    const warning = document.querySelector("#deleteWarning p");
+
+    fetch(statusUrl, { credentials: "same-origin" })
+        .then(res => res.json())
+        .then(job => {
+            if (job.status === "running") {
+                warning.innerText = `Deleting... ${job.deleted} reviews removed so far.`;
+                setTimeout(() => pollDeleteJob(statusUrl), 1000);
+            } else if (job.status === "done") {
+                window.location.reload();
+            } else {
+                warning.innerText = `Delete failed: ${job.error || job.message}`;
+            }
+        })
+        .catch(err => console.error("Delete job poll error:", err));
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    const form = document.getElementById("movieForm");
+    if (!form) return;
+
+    form.addEventListener("submit", (e) => {
+        if (!form.action.endsWith("/admin/movie/delete")) return;
+        e.preventDefault();
+
+        const data = new FormData(form);
+        data.append("background", "1");
+
+        fetch(form.action, { method: "POST", body: data, credentials: "same-origin" })
+            .then(res => {
+                const type = res.headers.get("content-type") || "";
+                if (!type.includes("application/json")) {
+                    window.location.reload();
+                    return null;
+                }
+                return res.json();
+            })
+            .then(job => {
+                if (job && job.status_url) {
+                    pollDeleteJob(job.status_url);
+                }
+            })
+            .catch(err => console.error("Delete error:", err));
+    });
+});
+
 // Helper to show/hide fields based on action
 function toggleInputVisibility(showAll) {
     const displayStyle = showAll ? "block" : "none";
@@ -182,23 +232,31 @@ document.addEventListener("DOMContentLoaded", function () {
     if (!ctx) return;
 
     // 1. Aggregation Logic: Calculate Average Rating per Genre
+    // The server sends averages over the whole catalog (the grid only shows
+    // one page); otherwise fall back to the cards on screen.
     const genreGroups = {}; // { Action: [4.5, 3.0], Drama: [5.0] }
+    const serverRatings = ctx.dataset.genreRatings ? JSON.parse(ctx.dataset.genreRatings) : null;
+    if (serverRatings) {
+        Object.entries(serverRatings).forEach(([genre, rating]) => {
+            genreGroups[genre] = [rating];
+        });
+    } else {
+        document.querySelectorAll(".movie-card").forEach(card => {
+            // Get clean data
+            const genreRaw = card.querySelector(".genre-tag").innerText;
+            const genre = genreRaw.split("•")[0].trim(); 
+            
+            const ratingRaw = card.querySelector(".rating-badge").innerText;
+            const rating = parseFloat(ratingRaw.replace("⭐", "").trim());
 
-    document.querySelectorAll(".movie-card").forEach(card => {
-        // Get clean data
-        const genreRaw = card.querySelector(".genre-tag").innerText;
-        const genre = genreRaw.split("•")[0].trim(); 
-        
-        const ratingRaw = card.querySelector(".rating-badge").innerText;
-        const rating = parseFloat(ratingRaw.replace("⭐", "").trim());
-
-        if (!genreGroups[genre]) {
-            genreGroups[genre] = [];
-        }
-        if(!isNaN(rating)) {
-            genreGroups[genre].push(rating);
-        }
-    });
+            if (!genreGroups[genre]) {
+                genreGroups[genre] = [];
+            }
+            if(!isNaN(rating)) {
+                genreGroups[genre].push(rating);
+            }
+        });
+    }
 
     // 2. Calculate Averages
     const labels = Object.keys(genreGroups);
@@ -271,6 +329,88 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 });
 
+/* === LAZY FEEDBACK LOADING === */
+// Cards only carry summary stats; reviews are fetched a page at a time
+// from /api/movies/<id>/feedbacks, following next_cursor on "Load more".
+const FEEDBACK_PAGE_SIZE = 10;
+
+function renderFeedback(fb, isAdmin) {
+    const bubble = document.createElement("div");
+    bubble.className = "feedback-bubble";
+
+    const body = document.createElement("div");
+    const rating = document.createElement("p");
+    rating.innerHTML = "<strong>Rating:</strong> ⭐ ";
+    rating.append(fb.rating);
+
+    const comment = document.createElement("p");
+    comment.textContent = fb.comment;
+
+    const meta = document.createElement("small");
+    meta.style.color = "#888";
+    meta.textContent = `By: ${fb.user_email} | ${fb.timestamp}`;
+
+    const sentiment = document.createElement("p");
+    sentiment.style.fontSize = "0.75rem";
+    sentiment.style.color = "#FFE66D";
+    sentiment.textContent = `AI Sentiment: ${fb.sentiment}`;
+
+    body.append(rating, comment, meta, sentiment);
+    bubble.appendChild(body);
+
+    if (isAdmin) {
+        const form = document.createElement("form");
+        form.method = "POST";
+        form.action = "/admin/feedback/delete";
+        form.className = "delete-fb-form";
+        form.innerHTML = `<input type="hidden" name="feedback_id">
+            <button type="submit" class="icon-btn-danger" title="Remove Feedback">
+                <i class="fas fa-times"></i>
+            </button>`;
+        form.querySelector("input").value = fb.id;
+        bubble.appendChild(form);
+    }
+
+    return bubble;
+}
+
+function loadFeedbacks(button) {
+    const list = button.closest(".feedback-section").querySelector(".feedback-list");
+    const cursor = button.dataset.cursor || "";
+
+    let url = `/api/movies/${encodeURIComponent(list.dataset.movieId)}/feedbacks?limit=${FEEDBACK_PAGE_SIZE}`;
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+
+    button.disabled = true;
+    fetch(url, { credentials: "same-origin" })
+        .then(res => res.json())
+        .then(data => {
+            if (!data.success) {
+                alert(data.message);
+                button.disabled = false;
+                return;
+            }
+
+            if (!cursor) list.innerHTML = "";
+            data.feedbacks.forEach(fb => list.appendChild(renderFeedback(fb, list.dataset.admin === "1")));
+            if (!list.children.length) {
+                list.innerHTML = '<p class="no-feedback">No feedback yet.</p>';
+            }
+
+            if (data.next_cursor && data.feedbacks.length) {
+                button.dataset.cursor = data.next_cursor;
+                button.innerHTML = '<i class="fas fa-angle-down"></i> Load more';
+                button.disabled = false;
+            } else {
+                button.style.display = "none";
+            }
+        })
+        .catch(err => {
+            console.error("Feedback load error:", err);
+            button.disabled = false;
+        });
+}
+
 //user dashboard
 
 function openFeedbackModal(movieName) {
@@ -281,9 +421,15 @@ function closeFeedbackModal() {
     document.getElementById("feedbackModal").style.display = "none";
 }
 function toggleFavorite(movieId, el) {
+    // Send the state we want, not "flip": a double click or a second tab
+    // can't undo the first request
+    const wanted = el.querySelector("i").classList.contains("fas") ? "0" : "1";
+    const body = new URLSearchParams({ favorite: wanted });
+
     fetch(`/movie/favorite/toggle/${movieId}`, {
         method: "POST",
-        credentials: "same-origin"   
+        credentials: "same-origin",
+        body: body
     })
     .then(res => res.json())
     .then(data => {
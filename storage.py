@@ -0,0 +1,832 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from itertools import chain
+
+from durability import WriteAheadLog
+from instrumentation import downstream
+
+# Feedback columns, in table and snapshot order
+FEEDBACK_FIELDS = ("id", "user_email", "movie_id", "rating", "comment", "sentiment", "timestamp")
+FEEDBACK_FIELD_SET = set(FEEDBACK_FIELDS)
+USER_FIELDS = ("id", "name", "password", "favorite_genre", "age_group")
+MOVIE_FIELDS = ("id", "name", "genre", "language", "image", "rating")
+
+
+def put_movie_entry(movies, old_key, key, movie):
+    """Move/replace a movie in a key -> movie dict. The existing record is
+    updated in place, so other references to it (movies_by_id) stay valid."""
+    current = movies.pop(old_key, None)
+    if current is not None and current["id"] == movie["id"]:
+        current.update(movie)
+        movie = current
+    movies[key] = movie
+    return movie
+
+
+# ================= MEMORY STORAGE =================
+class MemoryStorage:
+    """Tables held in this process: ``users`` (email -> user, favorites as
+    a set), ``movies`` (key -> movie) and ``feedbacks`` (a FeedbackStore).
+
+    Writes go through the methods below: each one changes the tables,
+    commits a record to the write-ahead log (a no-op when ``data_dir`` is
+    empty) and then hands the change to the listener, which keeps the
+    app's derived state (analytics, indexes, caches) in step. The tables
+    belong to one process; SQLiteStorage shares them between workers.
+    """
+
+    shared = False
+
+    def __init__(self, users, movies, feedbacks, data_dir=None, fsync_interval=0.0, snapshot_every=100000):
+        self.users = users
+        self.movies = movies
+        self.feedbacks = feedbacks
+        self.wal = WriteAheadLog(data_dir or None, self.capture, fsync_interval, snapshot_every)
+        self._listener = None
+        # Favorites are sets; the lock makes check-and-flip atomic across threads
+        self._favorites_lock = threading.Lock()
+
+    def open(self):
+        if self.wal.enabled:
+            self.recover()
+        return self
+
+    def listen(self, listener):
+        """``listener(op, args)`` is called after every write."""
+        self._listener = listener
+
+    def _notify(self, op, *args):
+        if self._listener:
+            self._listener(op, args)
+
+    def poll(self):
+        """Nothing to pick up: every write was made by this process."""
+
+    def version_stamp(self):
+        return None
+
+    @contextmanager
+    def feedback_rows(self):
+        yield list(self.feedbacks)
+
+    def iter_feedbacks(self, since=None):
+        """Stream feedbacks (``timestamp`` >= ``since``) for exports."""
+        return self.feedbacks.scan(since)
+
+    # ----- writes -----
+    def put_user(self, email, user):
+        self.users[email] = user
+        self.wal.commit("user_put", email, user)
+
+    def set_favorite(self, email, movie_id, wanted=None):
+        """Set (True/False) or flip (None) a favorite.
+        -> (is_favorite, total favorites), None for an unknown user."""
+        user = self.users.get(email)
+        if user is None:
+            return None
+
+        with self._favorites_lock:
+            favorites = user.setdefault("favorites", set())
+            is_favorite = movie_id not in favorites if wanted is None else wanted
+            if is_favorite:
+                favorites.add(movie_id)
+            else:
+                favorites.discard(movie_id)
+            total = len(favorites)
+            # Logged as the resulting state, so replaying it is idempotent
+            seq = self.wal.append("favorite", email, movie_id, is_favorite)
+
+        self.wal.sync(seq)
+        self._notify("favorite", email, movie_id, is_favorite)
+        return is_favorite, total
+
+    def add_feedback(self, feedback):
+        self.feedbacks.add(feedback)
+        self.wal.commit("feedback_put", feedback)
+        self._notify("feedback_put", feedback)
+        return feedback
+
+    def remove_feedback(self, feedback_id):
+        feedback = self.feedbacks.remove(feedback_id)
+        if feedback:
+            self.wal.commit("feedback_delete", feedback_id)
+            self._notify("feedback_delete", feedback)
+        return feedback
+
+    def set_sentiments(self, pairs):
+        """Bulk relabel: ``pairs`` of (feedback id, sentiment)."""
+        for feedback_id, sentiment in pairs:
+            feedback = self.feedbacks.get(feedback_id)
+            if feedback:
+                feedback["sentiment"] = sentiment
+        self.wal.commit("feedback_sentiments", pairs)
+        self._notify("feedback_sentiments", pairs)
+
+    def put_movie(self, old_key, key, movie):
+        """Add a movie (old_key == key) or edit/rename one."""
+        movie = put_movie_entry(self.movies, old_key, key, movie)
+        self.wal.commit("movie_put", old_key, key, movie)
+        self._notify("movie_put", old_key, key, movie)
+        return movie
+
+    def delete_movie(self, key):
+        """Delete a movie and its feedbacks; -> the movie or None."""
+        movie = self.movies.pop(key, None)
+        if movie is None:
+            return None
+        self.wal.commit("movie_delete", key, movie["id"])
+        self.feedbacks.remove_movie(movie["id"])
+        self._notify("movie_delete", key, movie["id"])
+        return movie
+
+    def put_movies(self, entries):
+        """Bulk add ``(key, movie)`` pairs. No change is sent to the
+        listener; the importer announces "bulk_import" once it is done."""
+        for key, movie in entries:
+            self.movies[key] = movie
+        self.wal.commit("movies_put", entries)
+
+    def add_feedbacks(self, items):
+        """Bulk add feedbacks (see put_movies)."""
+        self.feedbacks.load(items)
+        self.wal.commit("feedbacks_put", items)
+
+    def announce(self, op, *args):
+        """A change to derived state only (e.g. "analytics_rebuild")."""
+        self._notify(op, *args)
+
+    # ----- durability -----
+    def capture(self):
+        """Snapshot state; copies are taken up front so writers can go on."""
+        return {
+            "users": {
+                email: {**user, "favorites": set(user.get("favorites", ()))}
+                for email, user in list(self.users.items())
+            },
+            "movies": {key: dict(movie) for key, movie in list(self.movies.items())},
+            "feedback_fields": FEEDBACK_FIELDS,
+            "feedbacks": [
+                tuple(f[field] for field in FEEDBACK_FIELDS) if f.keys() == FEEDBACK_FIELD_SET else dict(f)
+                for f in self.feedbacks
+            ]
+        }
+
+    def restore(self, state):
+        self.users.clear()
+        self.users.update(state["users"])
+        self.movies.clear()
+        self.movies.update(state["movies"])
+        fields = state["feedback_fields"]
+        self.feedbacks.clear()
+        self.feedbacks.load(
+            dict(zip(fields, row)) if isinstance(row, tuple) else row
+            for row in state["feedbacks"]
+        )
+
+    def replay(self, op, args):
+        """Apply one logged write to the tables (derived state is rebuilt after)."""
+        if op == "user_put":
+            email, user = args
+            self.users[email] = user
+        elif op == "favorite":
+            email, movie_id, is_favorite = args
+            favorites = self.users.get(email, {}).setdefault("favorites", set())
+            if is_favorite:
+                favorites.add(movie_id)
+            else:
+                favorites.discard(movie_id)
+        elif op == "feedback_put":
+            self.feedbacks.add(args[0])
+        elif op == "feedbacks_put":
+            self.feedbacks.load(args[0])
+        elif op == "feedback_delete":
+            self.feedbacks.remove(args[0])
+        elif op == "feedback_sentiments":
+            for feedback_id, sentiment in args[0]:
+                feedback = self.feedbacks.get(feedback_id)
+                if feedback:
+                    feedback["sentiment"] = sentiment
+        elif op == "movie_put":
+            old_key, key, movie = args
+            self.movies.pop(old_key, None)
+            self.movies[key] = movie
+        elif op == "movies_put":
+            self.movies.update(args[0])
+        elif op == "movie_delete":
+            key, movie_id = args
+            self.movies.pop(key, None)
+            self.feedbacks.remove_movie(movie_id)
+        else:
+            print("Unknown WAL record:", op)
+
+    def recover(self):
+        """Load the latest snapshot and replay the log after it."""
+        start = time.perf_counter()
+        state, records = self.wal.recover()
+        first = next(records, None)
+        if state is not None:
+            self.restore(state)
+        elif first is not None:
+            # A log with no snapshot holds the whole history, seed data included
+            self.restore({"users": {}, "movies": {}, "feedback_fields": FEEDBACK_FIELDS, "feedbacks": []})
+        replayed = 0
+        for op, args in chain([first] if first is not None else [], records):
+            self.replay(op, args)
+            replayed += 1
+
+        if state is None and not replayed:
+            # First start: persist the seed data so its ids survive restarts
+            self.wal.snapshot()
+        print(
+            f"Recovered {len(self.users)} users, {len(self.movies)} movies, {len(self.feedbacks)} feedbacks "
+            f"({'snapshot + ' if state is not None else ''}{replayed} log records) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    def close(self):
+        self.wal.close()
+
+    def stats(self):
+        return {"backend": "memory", "wal": self.wal.stats() if self.wal.enabled else None}
+
+
+# ================= SQLITE STORAGE =================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY, id TEXT, name TEXT, password TEXT, favorite_genre TEXT, age_group TEXT
+);
+CREATE TABLE IF NOT EXISTS favorites (
+    user_email TEXT NOT NULL, movie_id TEXT NOT NULL, PRIMARY KEY (user_email, movie_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS movies (
+    key TEXT PRIMARY KEY, id TEXT NOT NULL UNIQUE, name TEXT, genre TEXT, language TEXT, image TEXT, rating REAL
+);
+CREATE TABLE IF NOT EXISTS feedbacks (
+    id TEXT PRIMARY KEY, user_email TEXT NOT NULL, movie_id TEXT NOT NULL, rating INTEGER,
+    comment TEXT, sentiment TEXT, timestamp TEXT NOT NULL
+);
+-- Newest-first reads, keyset pages and counts per movie / per user are
+-- range scans of these
+CREATE INDEX IF NOT EXISTS feedbacks_by_movie ON feedbacks (movie_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS feedbacks_by_user ON feedbacks (user_email, timestamp, id);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, op TEXT NOT NULL, args TEXT NOT NULL
+);
+"""
+
+# Statements are constants so each pooled connection compiles them once
+# and reuses the prepared statement from its cache afterwards
+_FEEDBACK_COLUMNS = ", ".join(FEEDBACK_FIELDS)
+FEEDBACK_GET = f"SELECT {_FEEDBACK_COLUMNS} FROM feedbacks WHERE id = ?"
+FEEDBACK_EXISTS = "SELECT 1 FROM feedbacks WHERE id = ?"
+FEEDBACK_ALL = f"SELECT {_FEEDBACK_COLUMNS} FROM feedbacks"
+FEEDBACK_COUNT = "SELECT COUNT(*) FROM feedbacks"
+FEEDBACK_PUT = f"INSERT OR REPLACE INTO feedbacks ({_FEEDBACK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+FEEDBACK_DELETE = "DELETE FROM feedbacks WHERE id = ?"
+FEEDBACK_DELETE_MOVIE = "DELETE FROM feedbacks WHERE movie_id = ?"
+FEEDBACK_SET_SENTIMENT = "UPDATE feedbacks SET sentiment = ? WHERE id = ?"
+FOR_MOVIE = {
+    True: f"SELECT {_FEEDBACK_COLUMNS} FROM feedbacks WHERE movie_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+    False: f"SELECT {_FEEDBACK_COLUMNS} FROM feedbacks WHERE movie_id = ? ORDER BY timestamp, id LIMIT ?",
+}
+FOR_USER = {
+    True: f"SELECT {_FEEDBACK_COLUMNS} FROM feedbacks WHERE user_email = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+    False: f"SELECT {_FEEDBACK_COLUMNS} FROM feedbacks WHERE user_email = ? ORDER BY timestamp, id LIMIT ?",
+}
+PAGE_FOR_MOVIE = (
+    f"SELECT {_FEEDBACK_COLUMNS} FROM feedbacks WHERE movie_id = ? AND (timestamp, id) < (?, ?) "
+    "ORDER BY timestamp DESC, id DESC LIMIT ?"
+)
+# Export pages walk the rowid, so each page is a short read of its own
+FEEDBACK_PAGE = f"SELECT rowid, {_FEEDBACK_COLUMNS} FROM feedbacks WHERE rowid > ? AND timestamp >= ? ORDER BY rowid LIMIT ?"
+COUNT_FOR_MOVIE = "SELECT COUNT(*) FROM feedbacks WHERE movie_id = ?"
+COUNT_FOR_USER = "SELECT COUNT(*) FROM feedbacks WHERE user_email = ?"
+
+USER_GET = (
+    f"SELECT {', '.join(USER_FIELDS)}, "
+    "(SELECT group_concat(movie_id) FROM favorites WHERE user_email = users.email) "
+    "FROM users WHERE email = ?"
+)
+USER_EXISTS = "SELECT 1 FROM users WHERE email = ?"
+USER_EMAILS = "SELECT email FROM users"
+USER_COUNT = "SELECT COUNT(*) FROM users"
+USER_PUT = f"INSERT OR REPLACE INTO users (email, {', '.join(USER_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)"
+FAVORITE_EXISTS = "SELECT 1 FROM favorites WHERE user_email = ? AND movie_id = ?"
+FAVORITE_ADD = "INSERT OR IGNORE INTO favorites (user_email, movie_id) VALUES (?, ?)"
+FAVORITE_REMOVE = "DELETE FROM favorites WHERE user_email = ? AND movie_id = ?"
+FAVORITE_CLEAR = "DELETE FROM favorites WHERE user_email = ?"
+FAVORITE_COUNT = "SELECT COUNT(*) FROM favorites WHERE user_email = ?"
+
+MOVIE_ALL = f"SELECT key, {', '.join(MOVIE_FIELDS)} FROM movies"
+MOVIE_ID = "SELECT id FROM movies WHERE key = ?"
+MOVIE_PUT = f"INSERT OR REPLACE INTO movies (key, {', '.join(MOVIE_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+MOVIE_DELETE = "DELETE FROM movies WHERE key = ?"
+
+CHANGE_ADD = "INSERT INTO changes (created, op, args) VALUES (?, ?, ?)"
+CHANGES_AFTER = "SELECT seq, op, args FROM changes WHERE seq > ? AND seq <= ? ORDER BY seq"
+CHANGES_PRUNE = "DELETE FROM changes WHERE created < ?"
+# The sequence survives pruning, unlike MAX(seq)
+LAST_SEQ = "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'changes'), 0)"
+
+# Prepared statements kept per connection (sqlite3's LRU statement cache)
+STATEMENT_CACHE_SIZE = 256
+# Pruning of old changes runs on every this many writes
+PRUNE_EVERY = 1000
+# Seed data is copied in once, when user_version is still 0
+SCHEMA_VERSION = 1
+
+
+class ConnectionPool:
+    """Per-process pool of SQLite connections.
+
+    Connections are opened lazily, up to ``size``, and handed out LIFO so
+    the most recently used one (with its statements already prepared) is
+    reused first; a thread finding the pool exhausted waits for one. A
+    forked child (gunicorn --preload) starts a pool of its own instead of
+    using its parent's connections.
+    """
+
+    def __init__(self, path, size=8, timeout=30.0, synchronous="FULL"):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._open_count = 0
+        self._stats = {"opened": 0, "acquired": 0, "waited": 0}
+
+    @contextmanager
+    def connection(self, operation="query"):
+        """A connection for one unit of work, timed as a downstream call
+        named ``operation`` (waiting for a free connection included)."""
+        with downstream("sqlite", operation, os.path.basename(self.path)):
+            conn = self._acquire()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def _acquire(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+        self._stats["acquired"] += 1
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._open_count < self.size
+            if can_open:
+                self._open_count += 1
+        if not can_open:
+            self._stats["waited"] += 1
+            return self._idle.get(timeout=self.timeout)
+        try:
+            return self._open()
+        except Exception:
+            with self._lock:
+                self._open_count -= 1
+            raise
+
+    def _open(self):
+        # Autocommit mode: transactions are explicit BEGIN ... COMMIT
+        conn = sqlite3.connect(
+            self.path, timeout=self.timeout, isolation_level=None,
+            check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        self._stats["opened"] += 1
+        return conn
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def stats(self):
+        return {**self._stats, "size": self.size, "open": self._open_count, "idle": self._idle.qsize()}
+
+
+class SQLiteUsers:
+    """``users`` for SQLiteStorage: reads like the email -> user dict
+    (``get``, ``in``, ``len``, iteration); writes go through the storage."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def get(self, email, default=None):
+        with self.pool.connection("users") as conn:
+            row = conn.execute(USER_GET, (email,)).fetchone()
+        if row is None:
+            return default
+        user = dict(zip(USER_FIELDS, row))
+        user["favorites"] = set(row[-1].split(",")) if row[-1] else set()
+        return user
+
+    def __getitem__(self, email):
+        user = self.get(email)
+        if user is None:
+            raise KeyError(email)
+        return user
+
+    def __contains__(self, email):
+        with self.pool.connection("users") as conn:
+            return conn.execute(USER_EXISTS, (email,)).fetchone() is not None
+
+    def __iter__(self):
+        with self.pool.connection("users") as conn:
+            return iter([email for email, in conn.execute(USER_EMAILS)])
+
+    def __len__(self):
+        with self.pool.connection("users") as conn:
+            return conn.execute(USER_COUNT).fetchone()[0]
+
+
+class SQLiteFeedbackStore:
+    """The read side of FeedbackStore over the ``feedbacks`` table; writes
+    go through the storage. Per-movie and per-user reads are range scans
+    of the (movie_id | user_email, timestamp, id) indexes, in the same
+    (timestamp, id) order FeedbackStore keeps."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @staticmethod
+    def _row(row):
+        return dict(zip(FEEDBACK_FIELDS, row))
+
+    def _query(self, sql, params):
+        with self.pool.connection("feedbacks") as conn:
+            return [dict(zip(FEEDBACK_FIELDS, row)) for row in conn.execute(sql, params)]
+
+    def _scalar(self, sql, params=()):
+        with self.pool.connection("feedbacks") as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def __len__(self):
+        return self._scalar(FEEDBACK_COUNT)
+
+    def __iter__(self):
+        return iter(self._query(FEEDBACK_ALL, ()))
+
+    def __contains__(self, feedback_id):
+        with self.pool.connection("feedbacks") as conn:
+            return conn.execute(FEEDBACK_EXISTS, (feedback_id,)).fetchone() is not None
+
+    def get(self, feedback_id):
+        rows = self._query(FEEDBACK_GET, (feedback_id,))
+        return rows[0] if rows else None
+
+    def for_movie(self, movie_id, newest_first=True, limit=None):
+        return self._query(FOR_MOVIE[newest_first], (movie_id, -1 if limit is None else limit))
+
+    def for_user(self, user_email, newest_first=True, limit=None):
+        return self._query(FOR_USER[newest_first], (user_email, -1 if limit is None else limit))
+
+    def page_for_movie(self, movie_id, after=None, limit=10):
+        """Same contract as FeedbackStore.page_for_movie; one extra row is
+        read to tell whether another page follows."""
+        if after is None:
+            rows = self._query(FOR_MOVIE[True], (movie_id, limit + 1))
+        else:
+            rows = self._query(PAGE_FOR_MOVIE, (movie_id, *after, limit + 1))
+        page = rows[:limit]
+        last_key = (page[-1]["timestamp"], page[-1]["id"]) if len(rows) > limit else None
+        return page, last_key
+
+    def count_for_movie(self, movie_id):
+        return self._scalar(COUNT_FOR_MOVIE, (movie_id,))
+
+    def count_for_user(self, user_email):
+        return self._scalar(COUNT_FOR_USER, (user_email,))
+
+
+class _ChangeStamp:
+    """DataVersion stamp: the last change this process applied. ``poll()``
+    runs before every request, so every worker reports the same version
+    for the same data."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def read(self):
+        return str(self.storage.applied_seq)
+
+    def bump(self):
+        """Writes already advance the change sequence."""
+
+
+class SQLiteStorage:
+    """Tables in a SQLite database (WAL mode) shared by several worker
+    processes; same write methods as MemoryStorage.
+
+    ``users`` and ``feedbacks`` read straight from the database through a
+    per-process connection pool. ``movies`` is a per-process copy of the
+    (small) catalog, which the analytics and indexes hold on to.
+
+    Every write commits its table change together with a row in
+    ``changes``. ``poll()`` reads the changes this process has not applied
+    yet, updates the ``movies`` copy and hands each one to the listener,
+    in commit order and including this process's own writes, so every
+    worker applies the same sequence to its derived state. Changes older
+    than ``retention`` seconds are pruned; a process that falls further
+    behind than that reloads and sends a "reset" instead.
+    """
+
+    shared = True
+
+    def __init__(self, path, pool_size=8, synchronous="FULL", retention=3600.0):
+        self.path = path
+        self.retention = retention
+        self.pool = ConnectionPool(path, pool_size, synchronous=synchronous)
+        self.users = SQLiteUsers(self.pool)
+        self.feedbacks = SQLiteFeedbackStore(self.pool)
+        self.movies = {}
+        self.applied_seq = 0
+        self._listener = None
+        self._poll_lock = threading.RLock()
+        self._stats = {"writes": 0, "polls": 0, "applied": 0, "resets": 0}
+
+    def open(self, users=None, movies=None, feedbacks=()):
+        """Create the schema, copy the seed tables into a new database and
+        load the movie catalog."""
+        with self.pool.connection() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+        with self.transaction() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._seed(conn, users or {}, movies or {}, feedbacks)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._load_movies()
+        return self
+
+    def _seed(self, conn, users, movies, feedbacks):
+        for email, user in users.items():
+            self._put_user(conn, email, user)
+        conn.executemany(MOVIE_PUT, [
+            (key, *(movie.get(field) for field in MOVIE_FIELDS)) for key, movie in movies.items()
+        ])
+        conn.executemany(FEEDBACK_PUT, [tuple(f[field] for field in FEEDBACK_FIELDS) for f in feedbacks])
+
+    def _load_movies(self):
+        with self.read() as conn:
+            seq = conn.execute(LAST_SEQ).fetchone()[0]
+            rows = conn.execute(MOVIE_ALL).fetchall()
+        self.movies.clear()
+        for row in rows:
+            self.movies[row[0]] = dict(zip(MOVIE_FIELDS, row[1:]))
+        self.applied_seq = seq
+
+    def _merge_movies(self):
+        """Add movies written without a change of their own (bulk import)."""
+        with self.pool.connection() as conn:
+            rows = conn.execute(MOVIE_ALL).fetchall()
+        for row in rows:
+            if row[0] not in self.movies:
+                self.movies[row[0]] = dict(zip(MOVIE_FIELDS, row[1:]))
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction; IMMEDIATE takes the write lock up front, so
+        concurrent writers queue on busy_timeout instead of failing to
+        upgrade a read lock."""
+        with self.pool.connection("write") as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def read(self):
+        """Read transaction: every statement sees the same snapshot."""
+        with self.pool.connection("read") as conn:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+
+    def listen(self, listener):
+        self._listener = listener
+
+    def version_stamp(self):
+        return _ChangeStamp(self)
+
+    def _log(self, conn, op, *args):
+        seq = conn.execute(CHANGE_ADD, (time.time(), op, json.dumps(args))).lastrowid
+        if seq % PRUNE_EVERY == 0:
+            conn.execute(CHANGES_PRUNE, (time.time() - self.retention,))
+        self._stats["writes"] += 1
+
+    # ----- change feed -----
+    def poll(self, upto=None):
+        """Apply the changes committed since the last poll (up to ``upto``)."""
+        with self._poll_lock:
+            self._stats["polls"] += 1
+            with self.pool.connection("poll") as conn:
+                rows = conn.execute(CHANGES_AFTER, (self.applied_seq, upto or 2 ** 62)).fetchall()
+            if rows and rows[0][0] != self.applied_seq + 1:
+                # Changes this process never applied have been pruned
+                self._reset()
+                return
+            for seq, op, args in rows:
+                if seq <= self.applied_seq:
+                    # Already applied by a poll nested in a listener
+                    continue
+                self.applied_seq = seq
+                self._apply(op, json.loads(args))
+
+    def _apply(self, op, args):
+        if op == "movie_put":
+            old_key, key, movie = args
+            args = [old_key, key, put_movie_entry(self.movies, old_key, key, movie)]
+        elif op == "movie_delete":
+            self.movies.pop(args[0], None)
+        elif op == "bulk_import":
+            self._merge_movies()
+        self._stats["applied"] += 1
+        if self._listener:
+            try:
+                self._listener(op, args)
+            except Exception as e:
+                print(f"Change {op} could not be applied:", e)
+
+    def _reset(self):
+        print(f"[STORAGE] change feed pruned past seq {self.applied_seq}; reloading")
+        self._stats["resets"] += 1
+        self._load_movies()
+        if self._listener:
+            self._listener("reset", [])
+
+    @contextmanager
+    def feedback_rows(self):
+        """Every feedback as of one change seq, with polling held off until
+        the block ends: derived state rebuilt from the rows then continues
+        with exactly the changes committed after them."""
+        with self._poll_lock:
+            while True:
+                with self.read() as conn:
+                    seq = conn.execute(LAST_SEQ).fetchone()[0]
+                    rows = conn.execute(FEEDBACK_ALL).fetchall()
+                # Changes up to seq (already in the rows) still update the
+                # rest of the derived state
+                self.poll(upto=seq)
+                if self.applied_seq == seq:
+                    break
+            yield [dict(zip(FEEDBACK_FIELDS, row)) for row in rows]
+
+    def iter_feedbacks(self, since=None, page_size=1000):
+        """Stream feedbacks (``timestamp`` >= ``since``) for exports, a
+        page at a time, without holding a connection between pages."""
+        last_rowid = 0
+        while True:
+            with self.pool.connection("export") as conn:
+                rows = conn.execute(FEEDBACK_PAGE, (last_rowid, since or "", page_size)).fetchall()
+            for row in rows:
+                yield dict(zip(FEEDBACK_FIELDS, row[1:]))
+            if len(rows) < page_size:
+                return
+            last_rowid = rows[-1][0]
+
+    # ----- writes -----
+    def _put_user(self, conn, email, user):
+        conn.execute(USER_PUT, (email, *(user.get(field) for field in USER_FIELDS)))
+        conn.execute(FAVORITE_CLEAR, (email,))
+        conn.executemany(FAVORITE_ADD, [(email, movie_id) for movie_id in user.get("favorites", ())])
+
+    def put_user(self, email, user):
+        with self.transaction() as conn:
+            self._put_user(conn, email, user)
+
+    def set_favorite(self, email, movie_id, wanted=None):
+        with self.transaction() as conn:
+            if conn.execute(USER_EXISTS, (email,)).fetchone() is None:
+                return None
+            current = conn.execute(FAVORITE_EXISTS, (email, movie_id)).fetchone() is not None
+            is_favorite = not current if wanted is None else wanted
+            if is_favorite != current:
+                conn.execute(FAVORITE_ADD if is_favorite else FAVORITE_REMOVE, (email, movie_id))
+            total = conn.execute(FAVORITE_COUNT, (email,)).fetchone()[0]
+            self._log(conn, "favorite", email, movie_id, is_favorite)
+        self.poll()
+        return is_favorite, total
+
+    def add_feedback(self, feedback):
+        with self.transaction() as conn:
+            conn.execute(FEEDBACK_PUT, tuple(feedback[field] for field in FEEDBACK_FIELDS))
+            self._log(conn, "feedback_put", feedback)
+        self.poll()
+        return feedback
+
+    def remove_feedback(self, feedback_id):
+        with self.transaction() as conn:
+            row = conn.execute(FEEDBACK_GET, (feedback_id,)).fetchone()
+            if row is None:
+                return None
+            feedback = dict(zip(FEEDBACK_FIELDS, row))
+            conn.execute(FEEDBACK_DELETE, (feedback_id,))
+            # The whole feedback, so other workers can take it out of their counters
+            self._log(conn, "feedback_delete", feedback)
+        self.poll()
+        return feedback
+
+    def set_sentiments(self, pairs):
+        with self.transaction() as conn:
+            conn.executemany(FEEDBACK_SET_SENTIMENT, [(sentiment, feedback_id) for feedback_id, sentiment in pairs])
+            self._log(conn, "feedback_sentiments", pairs)
+        self.poll()
+
+    def put_movie(self, old_key, key, movie):
+        with self.transaction() as conn:
+            if old_key != key:
+                conn.execute(MOVIE_DELETE, (old_key,))
+            conn.execute(MOVIE_PUT, (key, *(movie.get(field) for field in MOVIE_FIELDS)))
+            self._log(conn, "movie_put", old_key, key, movie)
+        self.poll()
+        return self.movies.get(key)
+
+    def delete_movie(self, key):
+        with self.transaction() as conn:
+            row = conn.execute(MOVIE_ID, (key,)).fetchone()
+            if row is None:
+                return None
+            movie_id = row[0]
+            conn.execute(MOVIE_DELETE, (key,))
+            conn.execute(FEEDBACK_DELETE_MOVIE, (movie_id,))
+            self._log(conn, "movie_delete", key, movie_id)
+        movie = self.movies.get(key) or {"id": movie_id}
+        self.poll()
+        return movie
+
+    def put_movies(self, entries):
+        """Bulk add in one transaction, without a change per movie: this
+        process sees them at once, the others when "bulk_import" is
+        announced at the end of the import."""
+        with self.transaction() as conn:
+            conn.executemany(MOVIE_PUT, [
+                (key, *(movie.get(field) for field in MOVIE_FIELDS)) for key, movie in entries
+            ])
+        for key, movie in entries:
+            self.movies[key] = movie
+
+    def add_feedbacks(self, items):
+        """Bulk add in one transaction (see put_movies)."""
+        with self.transaction() as conn:
+            conn.executemany(FEEDBACK_PUT, [tuple(f[field] for field in FEEDBACK_FIELDS) for f in items])
+
+    def announce(self, op, *args):
+        with self.transaction() as conn:
+            self._log(conn, op, *args)
+        self.poll()
+
+    # ----- shutdown / metrics -----
+    def close(self):
+        self.pool.close()
+
+    def stats(self):
+        with self.pool.connection() as conn:
+            last_seq = conn.execute(LAST_SEQ).fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            **self._stats,
+            "applied_seq": self.applied_seq,
+            "last_seq": last_seq,
+            "pool": self.pool.stats()
+        }
+
+
+def open_storage(spec, users, movies, feedbacks, data_dir=None, fsync_interval=0.0,
+                 snapshot_every=100000, pool_size=8, retention=3600.0):
+    """``sqlite:<path>`` -> SQLiteStorage, anything else -> MemoryStorage.
+
+    ``users``, ``movies`` and ``feedbacks`` are the seed tables. The memory
+    backend starts from them unless ``data_dir`` holds a log to recover;
+    the SQLite backend copies them into a new database. A write is
+    fsynced before it returns unless ``fsync_interval`` is set (for
+    SQLite: synchronous=FULL, or NORMAL, which syncs at checkpoints).
+    """
+    if spec.startswith("sqlite:"):
+        storage = SQLiteStorage(
+            spec[len("sqlite:"):], pool_size, "NORMAL" if fsync_interval else "FULL", retention
+        )
+        return storage.open(users, movies, feedbacks)
+    return MemoryStorage(users, movies, feedbacks, data_dir, fsync_interval, snapshot_every).open()
@@ -0,0 +1,97 @@
+"""Shared setup for the CinemaPulse tests (``python -m pytest tests``).
+
+app.py and aws_app.py configure themselves from the environment when they
+are imported, once per test run, so each is imported by one session
+fixture: ``smtp_app`` (in-memory storage, mail sent to a local SMTP sink)
+and ``aws`` (DynamoDB and SNS mocked by moto).
+"""
+import email
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+# ================= SMTP SINK =================
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Minimal SMTP debug server: accepts every message, except subjects
+    listed in ``reject`` which get a 550."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.messages = []
+        self.reject = set()
+        self.connections = 0
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                self.reply("250 sink")
+            elif command == b"DATA":
+                self.reply("354 end with .")
+                data = b"".join(iter(lambda: self.rfile.readline(), b".\r\n"))
+                message = email.message_from_bytes(data)
+                if message["Subject"] in self.server.reject:
+                    self.reply("550 rejected")
+                else:
+                    self.server.messages.append(message)
+                    self.reply("250 queued")
+            elif command == b"QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+# ================= APPS =================
+@pytest.fixture(scope="session")
+def smtp_app():
+    """app.py on in-memory storage -> (app module, SMTP sink)."""
+    pytest.importorskip("flask_mail")
+    sink = SMTPSink()
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    os.environ.update(
+        MAIL_SERVER="127.0.0.1", MAIL_PORT=str(sink.server_address[1]), MAIL_FROM="admin@example.com",
+        MAIL_STARTTLS="False", MAIL_SSL_TLS="False", MAIL_USERNAME="", MAIL_PASSWORD="",
+        CINEMAPULSE_STORAGE="memory", CINEMAPULSE_DATA_DIR=tempfile.mkdtemp()
+    )
+    import app
+    yield app, sink
+    sink.shutdown()
+
+
+@pytest.fixture(scope="session")
+def aws():
+    """aws_app.py against moto, with the tables of create_tables.py."""
+    moto = pytest.importorskip("moto")
+    os.environ.update(
+        AWS_ACCESS_KEY_ID="test", AWS_SECRET_ACCESS_KEY="test", AWS_DEFAULT_REGION="us-east-1",
+        MOTO_ACCOUNT_ID="288761745613"
+    )
+    with moto.mock_aws():
+        import boto3
+        import create_tables
+        create_tables.create_tables(boto3.resource("dynamodb", region_name="us-east-1"))
+        import aws_app
+        yield aws_app
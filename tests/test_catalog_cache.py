@@ -0,0 +1,24 @@
+"""CatalogCache.generation: moves with catalog changes, not with reloads."""
+from catalog_cache import CatalogCache
+
+
+def test_generation_moves_only_when_the_catalog_changes():
+    rows = [{"id": "1", "name": "Dune"}]
+    cache = CatalogCache(lambda: [dict(row) for row in rows])
+    first = cache.generation
+
+    cache.invalidate()
+    assert cache.generation == first
+
+    rows.append({"id": "2", "name": "Jawan"})
+    cache.invalidate()
+    assert cache.generation == first + 1
+
+
+def test_forced_invalidate_moves_the_generation():
+    cache = CatalogCache(lambda: [{"id": "1", "name": "Dune"}])
+    first = cache.generation
+
+    cache.invalidate(force=True)
+    assert cache.generation > first
+    assert cache.movies() == [{"id": "1", "name": "Dune"}]
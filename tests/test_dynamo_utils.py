@@ -0,0 +1,67 @@
+"""dynamo_utils batch reads and writes against moto."""
+import pytest
+
+from dynamo_utils import batch_delete, batch_get
+
+
+@pytest.fixture
+def table(aws):
+    table = aws.dynamodb.create_table(
+        TableName="CinemaPulse-Scratch",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    with table.batch_writer() as batch:
+        for i in range(250):
+            batch.put_item(Item={"id": str(i), "n": i, "name": f"movie {i}"})
+    yield table
+    table.delete()
+
+
+def test_batch_get_reads_every_chunk_as_plain_values(aws, table):
+    keys = [{"id": str(i)} for i in range(250)] + [{"id": "7"}, {"id": "missing"}]
+    items = batch_get(aws.dynamodb, table.name, keys, ["id", "name"])
+
+    assert sorted(int(item["id"]) for item in items) == list(range(250))
+    assert {"id": "7", "name": "movie 7"} in items
+
+
+def test_batch_get_falls_back_to_get_item(aws, table, monkeypatch):
+    client = aws.dynamodb.meta.client
+
+    def throttled(RequestItems):
+        return {"Responses": {}, "UnprocessedKeys": RequestItems}
+
+    monkeypatch.setattr(client, "batch_get_item", throttled)
+    items = batch_get(aws.dynamodb, table.name, [{"id": "1"}, {"id": "2"}], ["id", "n"], max_retries=0)
+
+    assert sorted(items, key=lambda item: item["id"]) == [{"id": "1", "n": 1}, {"id": "2", "n": 2}]
+
+
+def test_batch_delete_retries_unprocessed_items(aws, table, monkeypatch):
+    client = aws.dynamodb.meta.client
+    write = client.batch_write_item
+    calls = []
+
+    def throttle_first(RequestItems):
+        calls.append(len(RequestItems[table.name]))
+        if len(calls) == 1:
+            return {"UnprocessedItems": RequestItems}
+        return write(RequestItems=RequestItems)
+
+    monkeypatch.setattr(client, "batch_write_item", throttle_first)
+    keys = [{"id": str(i)} for i in range(30)]
+    assert batch_delete(client, table.name, keys, base_delay=0) == 30
+
+    assert calls == [25, 25, 5]
+    assert not batch_get(aws.dynamodb, table.name, keys)
+    assert len(batch_get(aws.dynamodb, table.name, [{"id": "30"}])) == 1
+
+
+def test_batch_delete_falls_back_to_delete_item(aws, table, monkeypatch):
+    client = aws.dynamodb.meta.client
+    monkeypatch.setattr(client, "batch_write_item", lambda RequestItems: {"UnprocessedItems": RequestItems})
+
+    assert batch_delete(client, table.name, [{"id": "1"}, {"id": "2"}], max_retries=0) == 2
+    assert not batch_get(aws.dynamodb, table.name, [{"id": "1"}, {"id": "2"}])
@@ -0,0 +1,68 @@
+"""Parallel favorite toggles against aws_app.py: no lost updates.
+
+benchmarks/bench_favorites.py times the same workload; these are its
+correctness checks.
+"""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+THREADS = 16
+
+
+@pytest.fixture
+def user(aws):
+    email = f"{uuid.uuid4().hex}@example.com"
+    aws.users_table.put_item(Item={"email": email, "name": "fan", "password": "x", "dashboard_version": 0})
+    yield email
+    aws.users_table.delete_item(Key={"email": email})
+
+
+def toggle_in_parallel(aws, email, work, data=None):
+    """POST one toggle per movie id in ``work`` from a pool of clients."""
+    clients = threading.local()
+
+    def toggle(movie_id):
+        if not hasattr(clients, "client"):
+            clients.client = aws.app.test_client()
+            with clients.client.session_transaction() as sess:
+                sess["user_email"] = email
+        res = clients.client.post(f"/movie/favorite/toggle/{movie_id}", data=data or {})
+        assert res.status_code == 200 and res.json["success"], res.data
+        return res.json["is_favorite"]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(toggle, work))
+
+
+def favorites(aws, email):
+    return set(aws.users_table.get_item(Key={"email": email})["Item"].get("favorites", []))
+
+
+@pytest.mark.parametrize("clicks", [1, 4, 5])
+def test_parallel_flips_lose_no_updates(aws, user, clicks):
+    movie_ids = [str(uuid.uuid4()) for _ in range(10)]
+    toggle_in_parallel(aws, user, [movie_id for movie_id in movie_ids for _ in range(clicks)])
+
+    # An odd number of flips leaves a favorite, an even number does not
+    assert favorites(aws, user) == (set(movie_ids) if clicks % 2 else set())
+
+
+def test_parallel_explicit_toggles_are_idempotent(aws, user):
+    movie_ids = [str(uuid.uuid4()) for _ in range(10)]
+    results = toggle_in_parallel(aws, user, movie_ids * 5, {"favorite": "1"})
+
+    assert all(results)
+    assert favorites(aws, user) == set(movie_ids)
+
+
+def test_toggling_twice_restores_the_original_state(aws, user):
+    kept, other = str(uuid.uuid4()), str(uuid.uuid4())
+    toggle_in_parallel(aws, user, [kept])
+    before = favorites(aws, user)
+
+    assert toggle_in_parallel(aws, user, [other]) == [True]
+    assert toggle_in_parallel(aws, user, [other]) == [False]
+    assert favorites(aws, user) == before == {kept}
@@ -0,0 +1,207 @@
+"""NotificationOutbox: digests, retries, backpressure, and the two real
+senders (app.py over SMTP, aws_app.py over SNS PublishBatch)."""
+import time
+
+import pytest
+
+import notifications
+from notifications import NotificationOutbox
+
+
+class Recorder:
+    """Sender that records batches and fails the first ``failures`` calls,
+    after marking the first ``deliver_before_failing`` items sent."""
+
+    def __init__(self, failures=0, deliver_before_failing=0):
+        self.failures = failures
+        self.deliver_before_failing = deliver_before_failing
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append([item["subject"] for item in batch])
+        if self.failures:
+            self.failures -= 1
+            for item in batch[:self.deliver_before_failing]:
+                item["sent"] = True
+            raise RuntimeError("send failed")
+
+
+# ================= DIGESTS =================
+def test_digest_subjects_are_coalesced_into_one_message():
+    sender = Recorder()
+    outbox = NotificationOutbox(sender, digest_subjects=("User Login",), digest_window=3600)
+    for name in ("ann", "bob", "cy"):
+        assert outbox.submit("User Login", f"{name} logged in")
+    outbox.submit("New Movie Added", "Dune")
+
+    assert outbox.stats()["pending_digests"] == 3
+    assert outbox.stats()["coalesced"] == 2
+    outbox.flush_digests()
+    assert outbox.stats()["queue_depth"] == 1  # digest window still open
+
+    outbox.flush_digests(force=True)
+    items = [outbox._queue.get_nowait() for _ in range(2)]
+    digest = items[1]
+    assert digest["subject"] == "User Login (3 events)"
+    assert digest["message"] == "- ann logged in\n- bob logged in\n- cy logged in"
+
+
+def test_digest_of_one_event_keeps_its_subject():
+    outbox = NotificationOutbox(Recorder(), digest_subjects=("Admin Login",))
+    outbox.submit("Admin Login", "admin logged in")
+    outbox.flush_digests(force=True)
+    item = outbox._queue.get_nowait()
+    assert (item["subject"], item["message"]) == ("Admin Login", "admin logged in")
+
+
+def test_digests_are_kept_per_recipient_list():
+    outbox = NotificationOutbox(Recorder(), digest_subjects=("User Login",))
+    outbox.submit("User Login", "a", to=["a@x"])
+    outbox.submit("User Login", "b", to=["b@x"])
+    outbox.flush_digests(force=True)
+    assert outbox.stats()["queue_depth"] == 2
+
+
+# ================= RETRIES =================
+def test_failed_batches_are_retried_with_exponential_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(notifications.time, "sleep", delays.append)
+    sender = Recorder(failures=2)
+    outbox = NotificationOutbox(sender, base_delay=0.5)
+
+    outbox._deliver([{"subject": "a", "queued_at": time.time()}])
+
+    assert delays == [0.5, 1.0]
+    assert len(sender.batches) == 3
+    stats = outbox.stats()
+    assert (stats["retries"], stats["sent"], stats["failed"]) == (2, 1, 0)
+
+
+def test_retry_resends_only_the_items_not_marked_sent(monkeypatch):
+    monkeypatch.setattr(notifications.time, "sleep", lambda delay: None)
+    sender = Recorder(failures=1, deliver_before_failing=2)
+    outbox = NotificationOutbox(sender)
+
+    outbox._deliver([{"subject": s, "queued_at": time.time()} for s in "abc"])
+
+    assert sender.batches == [["a", "b", "c"], ["c"]]
+    assert outbox.stats()["sent"] == 3
+
+
+def test_batch_is_given_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(notifications.time, "sleep", lambda delay: None)
+    sender = Recorder(failures=10)
+    outbox = NotificationOutbox(sender, max_retries=3)
+
+    outbox._deliver([{"subject": s, "queued_at": time.time()} for s in "ab"])
+
+    assert len(sender.batches) == 4
+    stats = outbox.stats()
+    assert (stats["retries"], stats["failed"], stats["sent"]) == (3, 2, 0)
+
+
+# ================= BACKPRESSURE =================
+def test_submit_drops_when_the_queue_is_full():
+    outbox = NotificationOutbox(Recorder(), maxsize=2)  # not started: nothing drains
+    assert outbox.submit("a", "1")
+    assert outbox.submit("b", "2")
+    assert not outbox.submit("c", "3")
+    stats = outbox.stats()
+    assert (stats["enqueued"], stats["dropped"], stats["queue_depth"]) == (2, 1, 2)
+
+
+def test_submit_waits_block_timeout_before_dropping():
+    outbox = NotificationOutbox(Recorder(), maxsize=1, block_timeout=0.2)
+    outbox.submit("a", "1")
+    started = time.time()
+    assert not outbox.submit("b", "2")
+    assert time.time() - started >= 0.2
+
+
+def test_workers_batch_the_queue_and_stop_drains_it():
+    sender = Recorder()
+    outbox = NotificationOutbox(sender, workers=1, batch_size=5, batch_wait=0.2)
+    for i in range(12):
+        outbox.submit(f"s{i}", "m")
+    outbox.start()
+    outbox.stop()
+
+    assert sorted(s for batch in sender.batches for s in batch) == sorted(f"s{i}" for i in range(12))
+    assert max(len(batch) for batch in sender.batches) <= 5
+    assert outbox.stats()["sent"] == 12
+
+
+# ================= SMTP (app.py) =================
+def test_smtp_batch_is_delivered_over_one_connection(smtp_app):
+    app, sink = smtp_app
+    sink.messages.clear()
+    connections = sink.connections
+    outbox = NotificationOutbox(app.send_email_batch, workers=1, batch_wait=0.1).start()
+    for i in range(3):
+        outbox.submit(f"Review {i}", f"body {i}", ["user@example.com"])
+    outbox.stop()
+
+    assert sorted(m["Subject"] for m in sink.messages) == ["Review 0", "Review 1", "Review 2"]
+    assert sink.messages[0]["To"] == "user@example.com"
+    assert sink.connections == connections + 1
+    assert outbox.stats()["sent"] == 3
+
+
+def test_smtp_failure_retries_only_unsent_messages(smtp_app, monkeypatch):
+    app, sink = smtp_app
+    monkeypatch.setattr(notifications.time, "sleep", lambda delay: None)
+    sink.messages.clear()
+    sink.reject = {"second"}
+    outbox = NotificationOutbox(app.send_email_batch, max_retries=1)
+
+    batch = [
+        {"subject": s, "message": "m", "to": ["user@example.com"], "queued_at": time.time()}
+        for s in ("first", "second")
+    ]
+    outbox._deliver(batch)
+    sink.reject = set()
+
+    assert [m["Subject"] for m in sink.messages] == ["first"]
+    stats = outbox.stats()
+    assert (stats["sent"], stats["retries"], stats["failed"]) == (1, 1, 1)
+
+
+# ================= SNS (aws_app.py) =================
+def test_publish_batch_is_chunked_by_ten(aws):
+    topic = aws.sns.create_topic(Name="CinemaPulse-Topic")["TopicArn"]
+    assert topic == aws.SNS_TOPIC_ARN
+    sizes = []
+
+    def count(params, **kwargs):
+        sizes.append(len(params["PublishBatchRequestEntries"]))
+
+    aws.sns.meta.events.register("provide-client-params.sns.PublishBatch", count)
+    try:
+        batch = [{"subject": f"s{i}", "message": "m"} for i in range(25)]
+        aws.publish_sns_batch(batch)
+    finally:
+        aws.sns.meta.events.unregister("provide-client-params.sns.PublishBatch", count)
+        aws.sns.delete_topic(TopicArn=topic)
+
+    assert sizes == [10, 10, 5]
+    assert all(item.get("sent") for item in batch)
+
+
+def test_publish_batch_failure_keeps_earlier_chunks_sent(aws):
+    topic = aws.sns.create_topic(Name="CinemaPulse-Topic")["TopicArn"]
+    calls = []
+
+    def delete_topic_after_first_chunk(params, **kwargs):
+        calls.append(len(params["PublishBatchRequestEntries"]))
+        if len(calls) == 2:
+            aws.sns.delete_topic(TopicArn=topic)
+
+    aws.sns.meta.events.register("provide-client-params.sns.PublishBatch", delete_topic_after_first_chunk)
+    try:
+        batch = [{"subject": f"s{i}", "message": "m"} for i in range(15)]
+        with pytest.raises(Exception):
+            aws.publish_sns_batch(batch)
+    finally:
+        aws.sns.meta.events.unregister("provide-client-params.sns.PublishBatch", delete_topic_after_first_chunk)
+
+    assert [bool(item.get("sent")) for item in batch] == [True] * 10 + [False] * 5
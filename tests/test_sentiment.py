@@ -0,0 +1,29 @@
+"""SentimentEngine: the fast path and the token walk agree."""
+import pytest
+
+from sentiment import TOKEN_RE, SentimentEngine
+
+engine = SentimentEngine()
+
+
+@pytest.mark.parametrize("comment, label", [
+    ("It was 'amazing'", "Positive"),
+    ("It was ‘amazing’", "Positive"),
+    ("'Boring', honestly", "Negative"),
+    ("It isn’t good", "Negative"),
+    ("A must watch", "Positive"),
+    ("A must, watch", "Neutral"),
+])
+def test_labels(comment, label):
+    assert engine.score(comment) == label
+
+
+@pytest.mark.parametrize("comment", [
+    "It was 'amazing'",
+    "'great' fun, 'waste of time'",
+    "the movie's 'lovely' ending",
+    "''",
+])
+def test_fast_path_matches_the_walk(comment):
+    text = comment.lower()
+    assert engine.polarity(comment) == engine._walk(TOKEN_RE.findall(text))
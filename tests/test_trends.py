@@ -0,0 +1,78 @@
+"""Trends go back to Stable once a movie stops getting reviews, on the
+cards, the admin dashboard and its ETag, without another review write."""
+import time
+import uuid
+
+FIVE_DAYS = 5 * 24 * 3600
+
+
+def positive_review(movie_id):
+    return {
+        "id": str(uuid.uuid4()),
+        "user_email": "fan@example.com",
+        "movie_id": movie_id,
+        "rating": 5,
+        "comment": "amazing",
+        "sentiment": "Positive",
+        "timestamp": time.strftime("%Y-%m-%d %H:%M")
+    }
+
+
+def admin_client(flask_app):
+    client = flask_app.test_client()
+    client.post("/admin/login", data={"email": "admin@example.com", "password": "admin123"})
+    return client
+
+
+def move_clock(monkeypatch, seconds):
+    later = time.time() + seconds
+    monkeypatch.setattr(time, "time", lambda: later)
+    return later
+
+
+# ================= app.py =================
+def test_app_trend_is_read_from_the_buckets(smtp_app, monkeypatch):
+    app, _ = smtp_app
+    movie = {
+        "id": str(uuid.uuid4()), "name": "Trend Test", "genre": "Drama",
+        "language": "English", "image": "x", "rating": 0.0
+    }
+    app.store.put_movie("trend_test", "trend_test", movie)
+    for _ in range(3):
+        app.store.add_feedback(positive_review(movie["id"]))
+
+    client = admin_client(app.app)
+    response = client.get("/admin/dashboard")
+    etag = response.headers["ETag"].strip('"')
+    with app.app.test_request_context():
+        assert "Trending Up" in app.movie_card(movie, False, time.time())
+    assert app.current_analytics(movie["id"], time.time())["trend"] == "Trending Up"
+
+    later = move_clock(monkeypatch, FIVE_DAYS)
+
+    assert app.current_analytics(movie["id"], later)["trend"] == "Stable"
+    assert client.get("/admin/dashboard", headers={"If-None-Match": etag}).status_code == 200
+    with app.app.test_request_context():
+        card = app.movie_card(movie, False, later)
+    assert "Trending Up" not in card and "Stable" in card
+    # Matches the trend API, which always read the buckets
+    assert client.get(f"/api/movies/{movie['id']}/trend").json["trend"] == "Stable"
+
+
+# ================= aws_app.py =================
+def test_aws_trend_is_read_from_the_buckets(aws, monkeypatch):
+    movie_id = str(uuid.uuid4())
+    aws.analytics_table.put_item(Item={**aws.default_analytics_payload(movie_id), "trend_buckets": {}})
+    for _ in range(3):
+        aws.record_feedback(positive_review(movie_id))
+
+    assert aws.get_analytics_for_movies([movie_id])[movie_id]["trend"] == "Trending Up"
+
+    later = move_clock(monkeypatch, FIVE_DAYS)
+
+    analytics = aws.get_analytics_for_movies([movie_id], later)[movie_id]
+    assert analytics["trend"] == "Stable"
+    assert "trend_buckets" not in analytics
+    # The stored attribute is unchanged; only the read is current
+    stored = aws.analytics_table.get_item(Key={"movie_id": movie_id})["Item"]
+    assert stored["trend"] == "Trending Up"
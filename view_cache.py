@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+
+
+# ================= VIEW MODEL CACHE =================
+class ViewModelCache:
+    """Bounded LRU cache of materialized view models with version checks.
+
+    Each entry is stored together with the version token it was built
+    from. ``get(key, version, build)`` returns the cached value while the
+    caller's current version matches and rebuilds it otherwise, so writers
+    invalidate an entry simply by bumping whatever the version is derived
+    from (a per-user counter, the catalog generation ...).
+
+    Size is capped at ``maxsize`` entries and, when ``weigh(value)`` is
+    given, at ``max_weight`` total (e.g. bytes of cached HTML); the least
+    recently used entries are evicted first.
+    """
+
+    def __init__(self, name="views", maxsize=10000, weigh=None, max_weight=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.weigh = weigh
+        self.max_weight = max_weight
+        self._entries = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, key, version, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[1]
+            self._counters["misses"] += 1
+            if entry is not None:
+                self._counters["stale"] += 1
+
+        # Built outside the lock; two concurrent misses just build twice
+        value = build()
+
+        weight = self.weigh(value) if self.weigh else 0
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (version, value, weight)
+            self._weight += weight
+            while self._entries and (
+                len(self._entries) > self.maxsize
+                or (self.max_weight is not None and self._weight > self.max_weight)
+            ):
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._weight -= evicted
+                self._counters["evictions"] += 1
+        return value
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._weight -= entry[2]
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when ``key`` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._weight = 0
+            else:
+                self._drop(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            stats["weight"] = self._weight
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["capacity"] = self.maxsize
+        stats["max_weight"] = self.max_weight
+        return stats
+
+
+# ================= HTML FRAGMENTS =================
+# Cached fragments are stored split around per-user slots (e.g. the
+# favorite heart's class), so a shared render can be personalised with a
+# string join instead of a Jinja render.
+FAVORITE_SLOT = "__favorite_class__"
+
+
+def split_fragment(html, slot=FAVORITE_SLOT):
+    return tuple(html.split(slot))
+
+
+def fill_fragment(parts, value):
+    return value.join(parts)
+
+
+def fragment_size(parts):
+    return sum(len(part) for part in parts)